@@ -0,0 +1,178 @@
+"""Cohort analytics over every stored submission.
+
+Running aggregates (counts per tier and domain, score sums, a score histogram,
+per-quarter trends and per-dimension averages) live in a small SQLite table that is updated in place
+as each result is recorded, so nothing ever rescans the sheet. The table has
+one row per group rather than per submission, and readers share an in-memory
+snapshot refreshed every few seconds, so reading the aggregates costs the same
+with a hundred submissions as with hundreds of thousands.
+"""
+import functools
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import resources
+from scoring import DIMENSIONS
+
+HISTOGRAM_BUCKET = 0.5
+SNAPSHOT_TTL = 5.0
+TREND_QUARTERS = 4
+
+# Column positions in a results sheet / journal row
+ROW_TIMESTAMP, ROW_DOMAIN, ROW_TIER, ROW_SCORE, ROW_SUBMISSION_ID = 0, 5, 6, 7, 9
+# The per-dimension scores follow, one column each in `scoring.DIMENSIONS` order
+ROW_DIMENSIONS = 10
+
+
+def quarter_of(timestamp):
+    return f"{timestamp.year}-Q{(timestamp.month - 1) // 3 + 1}"
+
+
+def histogram_bucket(score):
+    return f"{int(score / HISTOGRAM_BUCKET) * HISTOGRAM_BUCKET:.1f}"
+
+
+def row_dimensions(row):
+    """`{dimension: score}` from a results row; rows from before the columns have none."""
+    values = list(row[ROW_DIMENSIONS:ROW_DIMENSIONS + len(DIMENSIONS)])
+    return {dim: float(value) for dim, value in zip(DIMENSIONS, values) if value not in ("", None)}
+
+
+class CohortAnalytics:
+
+    def __init__(self, path, snapshot_ttl=SNAPSHOT_TTL):
+        self.path = path
+        self.snapshot_ttl = snapshot_ttl
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._snapshot_at = 0.0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS aggregates ("
+                " kind TEXT NOT NULL, key TEXT NOT NULL,"
+                " count INTEGER NOT NULL, score_sum REAL NOT NULL,"
+                " PRIMARY KEY (kind, key))"
+            )
+            # Submission IDs already counted, so replays are harmless
+            self._conn.execute("CREATE TABLE IF NOT EXISTS counted (submission_id TEXT PRIMARY KEY)")
+
+    def record(self, submission_id, timestamp, domain, tier, score, dimensions=None):
+        """Fold one result into the aggregates; returns False if already counted.
+
+        `dimensions` maps a dimension to its score for this submission.
+        """
+        quarter = quarter_of(timestamp)
+        groups = [
+            ("all", "", score),
+            ("tier", tier, score),
+            ("domain", domain, score),
+            ("histogram", histogram_bucket(score), score),
+            ("quarter", quarter, score),
+            ("tier_quarter", f"{tier}|{quarter}", score),
+            *[("dimension", dim, value) for dim, value in (dimensions or {}).items()],
+        ]
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO counted (submission_id) VALUES (?)", (submission_id,))
+            if cursor.rowcount == 0:
+                return False
+            self._conn.executemany(
+                "INSERT INTO aggregates (kind, key, count, score_sum) VALUES (?, ?, 1, ?)"
+                " ON CONFLICT (kind, key) DO UPDATE SET"
+                " count = count + 1, score_sum = score_sum + excluded.score_sum",
+                [(kind, key, float(value)) for kind, key, value in groups],
+            )
+            self._snapshot = None
+        return True
+
+    def record_row(self, row):
+        """Record a results sheet row (see `start_results_job` in app.py).
+
+        Rows written before submission IDs existed are keyed by their content.
+        """
+        timestamp = datetime.strptime(str(row[ROW_TIMESTAMP]), "%Y-%m-%d %H:%M:%S")
+        score = float(row[ROW_SCORE])
+        submission_id = row[ROW_SUBMISSION_ID] if len(row) > ROW_SUBMISSION_ID else ""
+        if not submission_id:
+            submission_id = "row-" + hashlib.sha1("|".join(map(str, row)).encode()).hexdigest()
+        return self.record(submission_id, timestamp, row[ROW_DOMAIN], row[ROW_TIER], score, row_dimensions(row))
+
+    # --- reads ---
+
+    def snapshot(self):
+        """All aggregates as `{kind: {key: (count, score_sum)}}`."""
+        with self._lock:
+            if self._snapshot is None or time.monotonic() - self._snapshot_at > self.snapshot_ttl:
+                snapshot = {}
+                for kind, key, count, score_sum in self._conn.execute(
+                        "SELECT kind, key, count, score_sum FROM aggregates"):
+                    snapshot.setdefault(kind, {})[key] = (count, score_sum)
+                self._snapshot = snapshot
+                self._snapshot_at = time.monotonic()
+            return self._snapshot
+
+    def total(self):
+        return self.snapshot().get("all", {}).get("", (0, 0.0))[0]
+
+    def tier_distribution(self):
+        return {tier: count for tier, (count, _) in sorted(self.snapshot().get("tier", {}).items())}
+
+    def domain_counts(self):
+        return {domain: count for domain, (count, _) in self.snapshot().get("domain", {}).items()}
+
+    def average_score(self, tier=None):
+        kind, key = ("tier", tier) if tier else ("all", "")
+        count, score_sum = self.snapshot().get(kind, {}).get(key, (0, 0.0))
+        return round(score_sum / count, 2) if count else None
+
+    def dimension_averages(self):
+        """Average score of each dimension over the submissions that recorded it."""
+        groups = self.snapshot().get("dimension", {})
+        return {dim: round(groups[dim][1] / groups[dim][0], 2) for dim in DIMENSIONS if dim in groups}
+
+    def score_histogram(self):
+        return {bucket: count for bucket, (count, _) in sorted(self.snapshot().get("histogram", {}).items())}
+
+    def score_trend(self, tier=None, quarters=TREND_QUARTERS):
+        """Average score for the latest `quarters` quarters, oldest first."""
+        if tier:
+            prefix = f"{tier}|"
+            groups = {k[len(prefix):]: v for k, v in self.snapshot().get("tier_quarter", {}).items()
+                      if k.startswith(prefix)}
+        else:
+            groups = self.snapshot().get("quarter", {})
+        latest = sorted(groups)[-quarters:]
+        return {quarter: round(groups[quarter][1] / groups[quarter][0], 2) for quarter in latest}
+
+
+@functools.lru_cache(maxsize=None)
+def get_analytics():
+    """The process-wide cohort analytics store."""
+    return CohortAnalytics(resources.data_path("analytics.sqlite3"))
+
+
+def backfill_from_sheet():
+    """Seed the aggregates from every row already in the results sheet."""
+    analytics = get_analytics()
+    rows = resources.sheet.call(lambda ws: ws.get_all_values())
+    added = 0
+    for row in rows:
+        try:
+            added += analytics.record_row(row)
+        except (ValueError, IndexError):
+            continue  # header or hand-edited rows
+    return added
+
+
+if __name__ == "__main__":
+    if "--backfill" in sys.argv:
+        print(f"Recorded {backfill_from_sheet()} submissions from the sheet")
+    analytics = get_analytics()
+    print(f"{analytics.total()} submissions, tiers: {analytics.tier_distribution()}")
+    print(f"Trend: {analytics.score_trend()}")
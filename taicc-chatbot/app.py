@@ -1,139 +1,114 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from fpdf import FPDF
-import google.generativeai as genai
-import json
-from io import BytesIO
-from PIL import Image
-import os
-import requests
 import streamlit.components.v1 as components
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import razorpay
-import time
-
-genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
-
-# Razorpay Test Credentials
-RAZORPAY_KEY_ID = "rzp_live_RMHZLGJemmVdVW"
-RAZORPAY_KEY_SECRET = "pICu87X4NLHZtUt11cW73RBn"
-
-# Initialize Razorpay client
-razorpay_client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
-
-def check_razorpay_payment_status(order_id):
-    try:
-        payments = razorpay_client.order.payments(order_id)
-        for payment in payments.get('items', []):
-            if payment['status'] == 'captured':  # Payment successful
-                return True
-        return False
-    except Exception as e:
-        print(f"Error checking payment status: {e}")
-        return False
-
-def create_order(amount=1):
-    order = razorpay_client.order.create({
-        "amount": amount * 100,  # Razorpay expects paise
-        "currency": "INR",
-        "payment_capture": 1
-    })
-    return order
+import uuid
+import metrics
+import payments
+import resources
+import session_store
+import startup
+from question_bank import get_question_bank, domain_explanations, tier_explanations
+from scoring import score_map, readiness_levels, maturity_descriptions, determine_maturity, score_answers, OVERALL
+from reports import generate_professional_summary, personalize, ReportStream
+from pdf_report import build_pdf
+from assessment import build_row, render_peer_charts, save_result
+from pipeline import get_results_pipeline, REPORT_POOL, TASK_PENDING, TASK_RUNNING, TASK_DONE, TASK_FAILED
+from llm_gateway import get_llm_gateway
+
+# Seconds between checks of the shared payment status cache on the payment page
+PAYMENT_REFRESH_SECONDS = 2
+# Questions shown per page of the assessment; each page reruns on its own
+QUESTIONS_PER_SECTION = 5
+ANSWER_LABELS = list(score_map.keys())
 
 # -----------------------------
 # --- CONFIGURATION & SETUP ---
 # -----------------------------
-# Load questions JSON
-file_path = os.path.join(os.path.dirname(__file__), "questions_full.json")
-with open(file_path, "r") as f:
-    questions = json.load(f)
-
 # Streamlit page config
 st.set_page_config(page_title="TAICC AI Readiness", layout="wide")
-#genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
-
-# Score mapping and readiness levels
-score_map = {"Not at all": 1, "Slightly": 2, "Moderately": 3, "Very": 4, "Fully": 5}
-readiness_levels = [
-    (0, 1.0, "Beginner"),
-    (1.1, 2.0, "Emerging"),
-    (2.1, 3.0, "Established"),
-    (3.1, 4.0, "Advanced"),
-    (4.1, 5.0, "AI Leader")
-]
-
-# Extract domains and tiers from JSON
-domains = list(questions.keys())
-tiers = list(next(iter(questions.values())).keys())  # assumes all domains have same tiers
-
-# Domain and Tier explanations
-domain_explanations = {
-    "BFSI": "Banking, Financial Services, and Insurance including NBFCs, Co-op Banks, Stock Broking, and more.",
-    "Manufacturing": "Industries such as Automobiles, Textiles, and Machinery.",
-    "Healthcare": "Hospitals, diagnostics, health-tech platforms, and telemedicine.",
-    "Hospitality": "Hotels, resorts, restaurants, and travel accommodations.",
-    "Pharma": "Pharmaceutical research, biotech, and medicine production.",
-    "Travel and Tourism": "Tour operators, online travel platforms, airlines, etc.",
-    "Construction": "Infrastructure, civil engineering, and public works.",
-    "Real Estate": "Residential and commercial property development and sales.",
-    "Education & EdTech": "Schools, universities, online learning platforms.",
-    "Retail & E-commerce": "Retail chains, marketplaces, and D2C brands.",
-    "Logistics & Supply Chain": "Warehousing, distribution, and delivery services.",
-    "Agritech": "Smart farming, agri-inputs, and precision agriculture.",
-    "IT & ITES": "Software companies, IT services, and BPOs.",
-    "Legal & Compliance": "Law firms, compliance tools, and contract automation.",
-    "Energy & Utilities": "Power generation, oil & gas, renewables.",
-    "Telecommunications": "Network providers, internet services, and 5G tech.",
-    "Media & Entertainment": "Broadcasting, streaming platforms, and gaming.",
-    "PropTech": "Real estate technology platforms.",
-    "FMCG & Consumer Goods": "Packaged goods and fast-moving consumer brands.",
-    "Public Sector": "Government departments, PSUs, and public welfare.",
-    "Automotive": "OEMs, auto ancillaries, and connected vehicles.",
-    "Environmental & Sustainability": "Climate tech, carbon tracking, and ESG.",
-    "Smart Cities": "Urban tech, IoT infrastructure, and city planning."
-}
 
-tier_explanations = {
-    "Tier 1": "Enterprise Leaders – Large organizations with significant AI investments and robust strategies.",
-    "Tier 2": "Strategic Innovators – Established companies actively experimenting and implementing AI.",
-    "Tier 3": "Growth Enablers – Mid-sized firms beginning structured AI adoption efforts.",
-    "Tier 4": "Agile Starters – Startups or small businesses with a high willingness to explore AI.",
-    "Tier 5": "Traditional Operators – Individuals or firms with minimal or no current AI engagement."
-}
+# Serves /metrics when METRICS_PORT is set; started once per process
+metrics.start_metrics_server()
 
-# -----------------------------
-# --- GOOGLE SHEETS SETUP ---
-# -----------------------------
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-creds = ServiceAccountCredentials.from_json_keyfile_dict(st.secrets["gcp_service_account"], scope)
-client = gspread.authorize(creds)
-sheet = client.open(st.secrets["SHEET_NAME"]).sheet1
+# Question bank is parsed, validated and indexed once per process
+question_bank = get_question_bank()
+domains = question_bank.domains
+tiers = question_bank.tiers
+
+
+def new_answers():
+    """One slot per question ID in the bank, holding its 1-5 score; 0 means unanswered."""
+    return np.zeros(len(question_bank.texts), dtype=np.int8)
 
 # -----------------------------
 # --- SESSION STATE SETUP ---
 # -----------------------------
+def checkpoint():
+    """Save progress under the session's resume token so any replica can pick it up."""
+    token = st.session_state.get("session_token")
+    if token is None:
+        token = st.session_state.session_token = session_store.new_token()
+        st.query_params["session"] = token
+    try:
+        session_store.get_session_store().save(token, session_store.snapshot(st.session_state))
+    except Exception as e:
+        print(f"Could not checkpoint session {token}: {e}")
+
+
+def resume_session():
+    """Restore the checkpoint named by the `session` URL parameter, if any."""
+    token = st.query_params.get("session")
+    if not token:
+        return
+    try:
+        data = session_store.get_session_store().load(token)
+    except Exception as e:
+        print(f"Could not load session {token}: {e}")
+        return
+    if data:
+        session_store.restore(st.session_state, data, new_answers())
+        st.session_state.session_token = token
+
+
 if "page" not in st.session_state:
     st.session_state.page = "login"
-    st.session_state.answers = {}
+    st.session_state.answers = new_answers()
+    st.session_state.question_section = 0
     st.session_state.section_scores = {}
     st.session_state.user_data = {}
     st.session_state.selected_domain = ""
     st.session_state.selected_tier = ""
     st.session_state.start_time = datetime.now()
     st.session_state.paid = False  # <-- NEW: track if user has paid
+    resume_session()
 
 # -----------------------------
 # --- PAYMENT FUNCTION ---
 # -----------------------------
-import streamlit.components.v1 as components
-import time
-import streamlit as st
-
 def navigate_to_questions():
     st.session_state.page = "questions"
-    st.experimental_rerun()
+    checkpoint()
+    st.rerun()
+
+
+@st.fragment(run_every=PAYMENT_REFRESH_SECONDS)
+def payment_status_panel(order_id):
+    """Re-runs on its own timer and only reads the poller's status cache."""
+    status = resources.get_payment_poller().status(order_id)
+    if status == payments.STATUS_CAPTURED:
+        st.session_state.paid = True
+        checkpoint()
+        st.rerun()
+    elif status == payments.STATUS_EXPIRED:
+        st.warning("We could not confirm your payment in time.")
+        if st.button("🔄 Start a new payment"):
+            del st.session_state["order_id"]
+            st.rerun()
+    else:
+        st.info("Awaiting payment completion...")
+
 
 def payment_screen():
     st.subheader("💳 Payment Required")
@@ -141,13 +116,20 @@ def payment_screen():
 
     # Create Razorpay order once per session
     if "order_id" not in st.session_state:
-        order = razorpay_client.order.create({
-            "amount": 100,
-            "currency": "INR",
-            "payment_capture": 1
-        })
+        order = payments.create_order(resources.get_razorpay_client(), amount=1)
         st.session_state["order_id"] = order["id"]
         st.session_state["order_amount"] = order["amount"]
+        checkpoint()
+
+    # Initialize session flags if not present
+    if "paid" not in st.session_state:
+        st.session_state.paid = False
+
+    if st.session_state.paid:
+        st.success("✅ Payment confirmed!")
+        if st.button("➡️ Continue to Assessment"):
+            navigate_to_questions()
+        return
 
     payment_html = f"""
     <html>
@@ -155,7 +137,7 @@ def payment_screen():
     <body>
     <script>
         var options = {{
-            "key": "{RAZORPAY_KEY_ID}",
+            "key": "{resources.get_secret('RAZORPAY_KEY_ID', '')}",
             "amount": "{st.session_state['order_amount']}",
             "currency": "INR",
             "name": "TAICC Partners",
@@ -169,26 +151,10 @@ def payment_screen():
     """
     components.html(payment_html, height=650)
 
-    # Initialize session flags if not present
-    if "paid" not in st.session_state:
-        st.session_state.paid = False
-
-    # Poll payment status (implement your check_razorpay_payment_status function)
-    if not st.session_state.paid:
-        with st.spinner("Checking payment status..."):
-            for _ in range(12):
-                if check_razorpay_payment_status(st.session_state["order_id"]):
-                    st.session_state.paid = True
-                    break
-                time.sleep(5)
-
-    if st.session_state.paid:
-        st.success("✅ Payment confirmed!")
-        if st.button("➡️ Continue to Assessment"):
-            st.session_state.page = "questions"
-            st.stop()  # Stop execution here to let Streamlit rerun cleanly next time
-    else:
-        st.info("Awaiting payment completion...")
+    # The shared poller confirms the order in the background; this page only
+    # re-checks its cached status, never the Razorpay API itself.
+    resources.get_payment_poller().watch(st.session_state["order_id"])
+    payment_status_panel(st.session_state["order_id"])
 
 
 
@@ -221,6 +187,49 @@ def login_screen():
             st.session_state.selected_domain = domain
             st.session_state.selected_tier = tier
             st.session_state.page = "payment"
+            checkpoint()
+
+
+def record_answer(qid):
+    st.session_state.answers[qid] = score_map[st.session_state[f"Q{qid}"]]
+
+
+def change_section(step):
+    st.session_state.question_section += step
+    checkpoint()
+
+
+@st.fragment
+def question_section(questions):
+    """One page of questions. Answering only reruns this fragment, not the page."""
+    answers = st.session_state.answers
+    qids = np.fromiter((qid for qid, _ in questions), dtype=np.intp, count=len(questions))
+    answered = int(np.count_nonzero(answers[qids]))
+    st.progress(answered / len(questions), text=f"{answered} of {len(questions)} answered")
+
+    section_count = -(-len(questions) // QUESTIONS_PER_SECTION)
+    section = min(st.session_state.question_section, section_count - 1)
+    st.caption(f"Section {section + 1} of {section_count}")
+    start = section * QUESTIONS_PER_SECTION
+    for qid, q in questions[start:start + QUESTIONS_PER_SECTION]:
+        # No default: a question only counts once the user picks an answer
+        index = int(answers[qid]) - 1 if answers[qid] else None
+        st.radio(q, ANSWER_LABELS, index=index, key=f"Q{qid}",
+                 on_change=record_answer, args=(qid,))
+
+    back, forward = st.columns(2)
+    if section > 0:
+        back.button("⬅️ Previous", on_click=change_section, args=(-1,))
+    if section < section_count - 1:
+        forward.button("Next ➡️", on_click=change_section, args=(1,))
+    elif forward.button("Submit", disabled=answered < len(questions)):
+        st.session_state.submission_id = uuid.uuid4().hex
+        st.session_state.end_time = datetime.now()
+        st.session_state.page = "results"
+        checkpoint()
+        st.rerun()
+    if section == section_count - 1 and answered < len(questions):
+        st.caption("Answer every question to submit.")
 
 
 def question_screen():
@@ -231,294 +240,141 @@ def question_screen():
 
     domain = st.session_state.selected_domain
     tier = st.session_state.selected_tier
-    questions_for_tier = questions[domain][tier]
-
-    for idx, q in enumerate(questions_for_tier):
-        key = f"Q{idx}-{q}"
-        val = st.radio(q, list(score_map.keys()), key=key)
-        st.session_state.answers[key] = score_map[val]
-
-    progress = int(len(st.session_state.answers) / len(questions_for_tier) * 100)
-    st.progress(progress)
-
-    if st.button("Submit"):
-        st.session_state.page = "results"
+    question_section(question_bank.for_tier(domain, tier))
 
 
 def calculate_scores():
-    values = list(st.session_state.answers.values())
-    avg = round(sum(values) / len(values), 2)
-    st.session_state.section_scores = {"Overall Score": avg}
-
-
-def determine_maturity(avg):
-    for low, high, label in readiness_levels:
-        if low <= avg <= high:
-            return label
-    return "Undefined"
-
-
-def generate_professional_summary():
-    avg_score = list(st.session_state.section_scores.values())[0]
-    maturity = determine_maturity(avg_score)
-    user = st.session_state.user_data
-    client_name = user.get("Name", "[Client Name]")
-    company_name = user.get("Company", "[Company Name]")
-
-    prompt = f"""
-    You are a senior AI consultant preparing a comprehensive AI readiness report for a corporate client.
-
-    Client Details:
-    - Name: {client_name}
-    - Company: {company_name}
-    - AI Readiness Score: {avg_score} ({maturity})
-
-    --- Report Requirements ---
-    1. Executive Summary
-    2. Current Maturity Level
-    3. Detailed Strengths and Weaknesses Analysis
-    4. Actionable Recommendations
-    5. Potential Business Impact
-    6. Conclusion and Call to Action
-
-    Use a formal business tone with bullet points, tables, and clear sections. Justify an investment price of ₹199.
-    """
-    model = genai.GenerativeModel("gemini-2.5-flash-lite-preview-09-2025")
-    response = model.generate_content(prompt)
-    generated_text = response.text
-
-    report_text = (
-        f"Client: {client_name}\n"
-        f"Company: {company_name}\n"
-        f"Email: {user.get('Email', '')}\n"
-        f"Phone: {user.get('Phone', '')}\n\n"
-        f"{generated_text.strip()}"
-    )
-    return maturity, report_text
-
-
-import matplotlib.pyplot as plt
-import tempfile
-from fpdf import FPDF
-from io import BytesIO
-import requests
-from PIL import Image
-import streamlit as st
-import re
-
-def safe_text(text):
-    """Encode text to latin-1 compatible string by replacing unsupported chars."""
-    if isinstance(text, bytes):
-        text = text.decode('utf-8', errors='replace')
-    return text.encode('latin-1', errors='replace').decode('latin-1')
-
-def clean_report_text(text):
-    text = re.sub(r'[\*\#\_`>~-]+', '', text)           # Remove *, #, _, `, >, ~, -
-    text = re.sub(r'\[[^\]]*\]\([^\)]*\)', '', text)    # Remove markdown links [text](url)
-    text = re.sub(r'\n\s*\n+', '\n\n', text)             # Reduce multiple newlines
-    text = re.sub(r'^\s+|\s+$', '', text)                 # Trim leading/trailing spaces
-    text = re.sub(r'\s{2,}', ' ', text)                   # Reduce multiple spaces to single
-
-    # Add spacing before section numbers for clarity, e.g. "1. Section"
-    text = re.sub(r'(\d+\.)', r'\n\n\1', text)
-    return text.strip()
-
-
-def generate_bar_chart(scores):
-    plt.figure(figsize=(6, 3))
-    plt.bar(scores.keys(), scores.values(), color='skyblue')
-    plt.title("AI Scores by Section")
-    plt.ylim(0, 5)
-    plt.tight_layout()
-    tmpfile = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-    plt.savefig(tmpfile.name)
-    plt.close()
-    return tmpfile.name
-
-def generate_pie_chart(tier_dist):
-    plt.figure(figsize=(5, 5))
-    plt.pie(tier_dist.values(), labels=tier_dist.keys(), autopct='%1.1f%%')
-    plt.title("Tier Distribution")
-    tmpfile = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-    plt.savefig(tmpfile.name)
-    plt.close()
-    return tmpfile.name
-
-def generate_line_chart(score_trend):
-    plt.figure(figsize=(6, 3))
-    plt.plot(list(score_trend.keys()), list(score_trend.values()), marker='o', linestyle='-')
-    plt.title("AI Readiness Score Trend")
-    plt.ylim(0, 5)
-    plt.tight_layout()
-    tmpfile = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-    plt.savefig(tmpfile.name)
-    plt.close()
-    return tmpfile.name
-
-def download_pdf(full_report_text, maturity, scores, tier_distribution, score_trend):
-    # Extract executive summary and detailed report
-    if "Executive Summary" in full_report_text:
-        summary_start = full_report_text.index("Executive Summary")
-        detailed_start = full_report_text.index("1.", summary_start)
-        executive_summary = full_report_text[summary_start:detailed_start].strip()
-        detailed_report = full_report_text[detailed_start:].strip()
-    else:
-        executive_summary = full_report_text[:500]
-        detailed_report = full_report_text[500:]
-
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-
-    # Logo and title block
-    logo_url = "https://i.postimg.cc/441ZWPjs/Whats-App-Image-2025-02-20-at-11-29-36.jpg"
-    response = requests.get(logo_url)
-    logo_image = Image.open(BytesIO(response.content))
-    logo_path = "temp_logo.png"
-    logo_image.save(logo_path)
-    pdf.image(logo_path, x=10, y=8, w=40)
-
-    pdf.set_font("Arial", 'B', 16)
-    pdf.cell(0, 10, "TAICC AI Readiness Assessment Report", ln=True, align="C")
-    pdf.ln(15)
-
-    # Watermark image
-    watermark = logo_image.convert("RGBA").resize((100, 100))
-    alpha = watermark.split()[3].point(lambda p: p * 0.1)
-    watermark.putalpha(alpha)
-    watermark.save("temp_watermark.png")
-    pdf.image("temp_watermark.png", x=60, y=100, w=90)
-
-    # User info block
-    pdf.set_font("Arial", size=12)
-    pdf.cell(0, 8, "User Details:", ln=True)
-    for k, v in st.session_state.user_data.items():
-        pdf.cell(0, 8, f"{k}: {v}", ln=True)
-    pdf.ln(5)
-    pdf.cell(0, 8, f"AI Maturity Level: {maturity}", ln=True)
-    pdf.ln(10)
-
-    # Executive Summary Section
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(0, 10, "Executive Summary", ln=True)
-    pdf.set_font("Arial", size=12)
-    pdf.multi_cell(0, 8, safe_text(clean_report_text(executive_summary)))
-
-    # Add bar chart after executive summary
-    bar_chart_path = generate_bar_chart(scores)
-    pdf.ln(10)
-    pdf.image(bar_chart_path, x=pdf.l_margin, w=pdf.w - 2*pdf.l_margin)
-
-    # Detailed Report Section
-    pdf.ln(20)
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(0, 10, "Detailed Report", ln=True)
-    pdf.set_font("Arial", size=12)
-    pdf.multi_cell(0, 8, safe_text(clean_report_text(detailed_report)))
-
-
-    # Insert pie chart after detailed report
-    pie_chart_path = generate_pie_chart(tier_distribution)
-    pdf.ln(10)
-    pdf.image(pie_chart_path, x=pdf.l_margin, w=pdf.w - 2*pdf.l_margin)
-
-    # Insert line chart last
-    pdf.ln(20)
-    line_chart_path = generate_line_chart(score_trend)
-    pdf.image(line_chart_path, x=pdf.l_margin, w=pdf.w - 2*pdf.l_margin)
-
-    # Footer
-    pdf.ln(10)
-    pdf.set_font("Arial", 'I', 10)
-    pdf.cell(0, 10, "Report generated by TAICC AI Readiness Assessment Tool", ln=True, align="C")
-
-    # Streamlit download button
-    pdf_bytes = pdf.output(dest="S").encode("latin-1")
-    
-    
-    st.download_button(
-        label="Download Full Professional Report (PDF)",
-        data=pdf_bytes,
-        file_name="TAICC_AI_Readiness_Report.pdf",
-        mime="application/pdf"
-    )
-    
-    st.download_button(
-        label="Download Full Professional Report (PDF)",
-        data=pdf_bytes,
-        file_name="TAICC_AI_Readiness_Report.pdf",
-        mime="application/pdf"
-    )
+    answers = st.session_state.answers
+    qids = np.flatnonzero(answers)
+    st.session_state.section_scores = score_answers(dict(zip(qids.tolist(), answers[qids].tolist())))
+    return st.session_state.section_scores
 
 
 def show_maturity_levels():
     st.markdown("### AI Maturity Levels Explained")
     df_levels = pd.DataFrame([
-        {"Score Range": "0.0 - 1.0", "Level": "Beginner", "Description": "Just starting AI journey, minimal awareness."},
-        {"Score Range": "1.1 - 2.0", "Level": "Emerging", "Description": "Early experiments, limited AI integration."},
-        {"Score Range": "2.1 - 3.0", "Level": "Established", "Description": "Defined AI strategy, some successful projects."},
-        {"Score Range": "3.1 - 4.0", "Level": "Advanced", "Description": "Mature AI adoption, integrated into processes."},
-        {"Score Range": "4.1 - 5.0", "Level": "AI Leader", "Description": "Industry-leading AI innovation and scale."},
+        {"Score Range": f"{low:.1f} - {high:.1f}", "Level": label, "Description": maturity_descriptions[label]}
+        for low, high, label in readiness_levels
     ])
     st.table(df_levels)
 
 
+def claim_submission(submission_id):
+    """Whether this replica should journal the submission: only the first claim wins."""
+    try:
+        return session_store.get_session_store().claim(submission_id)
+    except Exception as e:
+        # The journal still drops a second write on this node
+        print(f"Could not claim submission {submission_id}: {e}")
+        return True
+
+
+def start_results_job(scores, maturity):
+    """Queue the slow results work once per submission; later calls are no-ops."""
+    submission_id = st.session_state.submission_id
+    pipeline = get_results_pipeline()
+    job = pipeline.get(submission_id)
+    if job is not None:
+        return job
+    user = dict(st.session_state.user_data)
+    domain = st.session_state.selected_domain
+    tier = st.session_state.selected_tier
+    avg_score = scores[OVERALL]
+
+    row = build_row(st.session_state.end_time, user, domain, tier, avg_score, maturity, submission_id, scores)
+
+    # A session resumed here after another replica claimed it only rebuilds the
+    # report (usually from the shared report cache); the row is already saved
+    persist = (lambda: save_result(submission_id, row)) if claim_submission(submission_id) else (lambda: None)
+
+    # The report's gateway deadline and timings start now, not when a worker is free;
+    # a shed report only serves the cache or the template, so it needs no report thread
+    report_stream = ReportStream()
+    admission = get_llm_gateway().admission()
+    return pipeline.submit(submission_id, {
+        "summary": (lambda: generate_professional_summary(user, domain, tier, avg_score, maturity, report_stream,
+                                                          admission=admission),
+                    (), REPORT_POOL if admission.waiting else None),
+        "charts": (lambda: render_peer_charts(scores, tier, avg_score), ()),
+        "pdf": (lambda report, charts: build_pdf(user, report, maturity, charts), ("summary", "charts")),
+        "persist": (persist, ()),
+    }, context={"report_stream": report_stream, "user": user, "avg_score": avg_score})
+
+
+RESULTS_TASK_LABELS = {
+    "summary": "Writing your AI readiness report",
+    "charts": "Rendering benchmark charts",
+    "pdf": "Building your PDF report",
+    "persist": "Saving your results",
+}
+
+
+@st.fragment(run_every=0.5)
+def results_progress(submission_id):
+    """Shows task progress and the report as it streams in, then reruns the page."""
+    job = get_results_pipeline().get(submission_id)
+    if job is None or job.done():
+        st.rerun()
+    icons = {TASK_PENDING: "⏳", TASK_RUNNING: "🔄", TASK_DONE: "✅", TASK_FAILED: "❌"}
+    for name, status in job.statuses().items():
+        st.write(f"{icons[status]} {RESULTS_TASK_LABELS[name]}")
+
+    # Only render complete lines so half-streamed table rows don't flicker
+    streamed = job.context["report_stream"].text()
+    streamed = streamed[:streamed.rfind("\n") + 1]
+    if streamed:
+        st.markdown(personalize(streamed, job.context["user"], job.context["avg_score"]))
+
+
 def results_screen():
-    calculate_scores()
+    scores = calculate_scores()
+    maturity = determine_maturity(scores[OVERALL])
     st.title("AI Readiness Assessment Results")
-    df = pd.DataFrame(list(st.session_state.section_scores.items()), columns=["Section", "Score"])
+    df = pd.DataFrame(list(scores.items()), columns=["Section", "Score"])
     st.bar_chart(df.set_index("Section"))
-
-    maturity, detailed_report = generate_professional_summary()
     st.success(f"Your AI Maturity Level: **{maturity}**")
-    st.markdown(detailed_report)
+
+    job = start_results_job(scores, maturity)
+    if not job.done():
+        results_progress(job.submission_id)
+        return
+
+    detailed_report = job.result("summary")
+    if detailed_report is None:
+        st.error(f"❌ Could not generate your report: {job.error('summary')}")
+    else:
+        st.markdown(detailed_report)
+        timings = job.context["report_stream"].timings()
+        if timings["fallback"]:
+            st.info("Our AI report service is busy, so this is your standard readiness report. "
+                    "Your scores and maturity level are unaffected.")
+        elif not timings["cached"] and timings["total_time"] is not None:
+            st.caption(f"Report generated in {timings['total_time']:.1f}s "
+                       f"(first words after {timings['time_to_first_token'] or 0:.1f}s)")
 
     show_maturity_levels()
-    time_taken = datetime.now() - st.session_state.start_time
+    time_taken = st.session_state.end_time - st.session_state.start_time
     st.caption(f"⏱️ Time taken: {time_taken.seconds // 60} min {time_taken.seconds % 60} sec")
 
-    # Extract scores from session_state answers grouped by category (example, adjust as you have categories)
-    # Here assuming questions and answers are structured by domain, you may adapt logic as needed
-    section_scores = st.session_state.section_scores  # This is your calculated overall scores dict
-    
-    # For tier distribution, count how many users answered selecting each tier or however tiers are tracked
-    # Example from your saved session state variable or compute dummy from selected tier
-    tier_distribution = {
-        st.session_state.selected_tier: 1,  # Simplest case - 1 user
-        # Add other tiers if needed or get statistics from your DB
-    }
-
-    # For score trend, if you have historical data, pull it from DB or session, else sample below:
-    score_trend = {
-        "Q1": 2.8,
-        "Q2": 3.1,
-        "Q3": 3.7,
-        "Q4": 4.0
-    }
-
-    # Pass actual data
-    download_pdf(detailed_report, maturity, section_scores, tier_distribution, score_trend)
-
-    # -----------------------------
-    # --- SAVE TO GOOGLE SHEETS ---
-    # -----------------------------
-    try:
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        row = [
-            now,
-            st.session_state.user_data.get("Name", ""),
-            st.session_state.user_data.get("Company", ""),
-            st.session_state.user_data.get("Email", ""),
-            st.session_state.user_data.get("Phone", ""),
-            st.session_state.selected_domain,
-            st.session_state.selected_tier,
-            list(st.session_state.section_scores.values())[0],
-            maturity
-        ]
-        sheet.append_row(row)
-        st.success("✅ Results saved to Google Sheets successfully!")
-    except Exception as e:
-        st.error(f"❌ Could not save to Google Sheets: {e}")
+    # Every rerun (including download clicks) serves the same finished PDF bytes
+    pdf_bytes = job.result("pdf")
+    if pdf_bytes is not None:
+        for key in ("download_pdf_top", "download_pdf_bottom"):
+            st.download_button(
+                label="Download Full Professional Report (PDF)",
+                data=pdf_bytes,
+                file_name="TAICC_AI_Readiness_Report.pdf",
+                mime="application/pdf",
+                key=key
+            )
+    elif detailed_report is not None:
+        st.error(f"❌ Could not build the PDF report: {job.error('pdf')}")
+
+    # Rows reach Google Sheets from the journal's background flusher
+    if job.error("persist") is None:
+        st.success("✅ Results saved successfully!")
+    else:
+        st.error(f"❌ Could not save your results: {job.error('persist')}")
 
 
 # -----------------------------
@@ -537,9 +393,11 @@ def main_router():
         results_screen()
     else:
         st.session_state.page = "login"
-        st.experimental_rerun()
+        st.rerun()
 
 if __name__ == "__main__":
     main_router()
+    # With WARM_UP set, heavy report dependencies load once the first page is out
+    startup.warm_up_in_background()
 
 
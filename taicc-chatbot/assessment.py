@@ -0,0 +1,266 @@
+"""Streamlit-free assessment core and bulk assessment CLI.
+
+Everything the results page does for one user (scoring, the Gemini report,
+benchmark charts, the PDF and saving the result) is available here as plain
+functions, plus a batch entry point that generates reports on a thread pool
+with a cap on concurrent LLM calls and renders the PDFs in worker processes.
+
+    python assessment.py answers.jsonl --out results/ --workers 8 --processes 4
+
+Input is JSONL or CSV. Each record has `name`, `company`, `email`, `phone`,
+`domain`, `tier` and its answers, either as an `answers` list (JSONL) or as
+`Q1`..`Q20` columns (CSV), in question order for that domain and tier. Answers
+may be labels from `score_map` ("Not at all" .. "Fully") or numbers 1-5. An
+optional `submission_id` is kept; otherwise one is generated. Results are
+written to `results.jsonl` in the output directory, with one PDF per row.
+A row whose report is the template served when Gemini was unavailable has a
+`fallback` reason, and counts against the exit status like a failed row.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import batch_pdf
+from analytics import get_analytics, quarter_of
+from pdf_report import render_charts
+from llm_gateway import get_llm_gateway
+from persistence import get_submission_journal
+from question_bank import get_question_bank
+from reports import ReportStream, generate_professional_summary
+from scoring import DIMENSIONS, OVERALL, determine_maturity, score_batch, score_map
+
+# A batch can wait for a gateway slot far longer than a user on the page can
+BATCH_QUEUE_TIMEOUT = 10 * 60
+USER_FIELDS = ("Name", "Company", "Email", "Phone")
+
+
+# -----------------------------
+# --- SINGLE ASSESSMENT ---
+# -----------------------------
+def answer_value(answer):
+    """Turn an answer label or number into its 1-5 score."""
+    if isinstance(answer, str):
+        answer = answer.strip()
+        if answer in score_map:
+            return score_map[answer]
+    value = int(float(answer))
+    if not 1 <= value <= 5:
+        raise ValueError(f"Answer {answer!r} is outside 1-5")
+    return value
+
+
+def resolve_answers(domain, tier, answers):
+    """Map positional answers onto `{question_id: value}` for the domain and tier."""
+    try:
+        questions = get_question_bank().for_tier(domain, tier)
+    except KeyError:
+        raise ValueError(f"Unknown domain/tier: {domain!r} / {tier!r}") from None
+    if len(answers) != len(questions):
+        raise ValueError(f"Expected {len(questions)} answers, got {len(answers)}")
+    return {qid: answer_value(a) for (qid, _), a in zip(questions, answers)}
+
+
+def build_row(timestamp, user, domain, tier, avg_score, maturity, submission_id, scores=None):
+    """A results sheet row, ending with the per-dimension `scores` (blank if unknown)."""
+    scores = scores or {}
+    return [
+        timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+        user.get("Name", ""),
+        user.get("Company", ""),
+        user.get("Email", ""),
+        user.get("Phone", ""),
+        domain,
+        tier,
+        avg_score,
+        maturity,
+        submission_id,
+        *[scores.get(dim, "") for dim in DIMENSIONS],
+    ]
+
+
+def save_result(submission_id, row):
+    """Journal the row for Google Sheets and fold it into the cohort analytics."""
+    if get_submission_journal().enqueue(submission_id, row):
+        get_analytics().record_row(row)
+
+
+def render_peer_charts(scores, tier, avg_score):
+    """Charts benchmarked against every stored submission."""
+    analytics = get_analytics()
+    # Until peers exist, the charts show just this submission
+    tier_distribution = analytics.tier_distribution() or {tier: 1}
+    score_trend = analytics.score_trend(tier) or {quarter_of(datetime.now()): avg_score}
+    return render_charts(scores, tier_distribution, score_trend)
+
+
+# -----------------------------
+# --- BATCH ---
+# -----------------------------
+def _user(record):
+    return {field: str(record.get(field.lower(), record.get(field, "")) or "") for field in USER_FIELDS}
+
+
+def _record_answers(record):
+    if "answers" in record:
+        return record["answers"]
+    columns = sorted((k for k in record if k[:1] == "Q" and k[1:].isdigit()), key=lambda k: int(k[1:]))
+    return [record[k] for k in columns if record[k] not in ("", None)]
+
+
+def read_records(path):
+    """Yield input records from a `.jsonl` or `.csv` file ('-' reads JSONL from stdin)."""
+    if path == "-":
+        for line in sys.stdin:
+            if line.strip():
+                yield json.loads(line)
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _pdf_job(record, result):
+    """The `batch_pdf.render_job` input for one assessed record."""
+    user = _user(record)
+    return {"submission_id": result["submission_id"], "name": user["Name"], "company": user["Company"],
+            "email": user["Email"], "phone": user["Phone"], "tier": result["tier"],
+            "scores": result["scores"], "maturity": result["maturity"], "report": result["report"]}
+
+
+def run_batch(records, workers=None, llm_concurrency=None,
+              build_pdfs=True, save=False, processes=None):
+    """Assess many records, yielding one result dict per record as it finishes.
+
+    All records are scored in one vectorized call up front. Report generation
+    mostly waits on Gemini, so it runs on `workers` threads with at most
+    `llm_concurrency` calls in flight (default: the gateway's
+    `LLM_MAX_CONCURRENCY`), each waiting up to `BATCH_QUEUE_TIMEOUT` for a
+    gateway slot. A row served the template report carries its `fallback`
+    reason. Charts and PDF layout are CPU-bound and
+    hold the GIL, so each finished report is rendered on a pool of
+    `processes` worker processes instead. A record that fails yields a result
+    with an `error`.
+    """
+    prepared, results, seen = [], [], set()
+    for line_no, record in enumerate(records, 1):
+        submission_id = str(record.get("submission_id") or uuid.uuid4().hex)
+        if submission_id in seen:
+            results.append({"line": line_no, "submission_id": submission_id, "error": "Duplicate submission_id"})
+            continue
+        seen.add(submission_id)
+        try:
+            batch_pdf.pdf_name(submission_id)
+            answers = resolve_answers(record.get("domain"), record.get("tier"), _record_answers(record))
+        except (ValueError, TypeError) as e:
+            results.append({"line": line_no, "submission_id": submission_id, "error": str(e)})
+            continue
+        prepared.append((line_no, submission_id, record, answers))
+    yield from results
+
+    if not prepared:
+        return
+    scores_frame = score_batch({sid: answers for _, sid, _, answers in prepared})
+    llm_slots = threading.BoundedSemaphore(llm_concurrency or get_llm_gateway().max_concurrency)
+
+    def assess(line_no, submission_id, record):
+        user, domain, tier = _user(record), record["domain"], record["tier"]
+        scores = {k: float(v) for k, v in scores_frame.loc[submission_id].dropna().items()}
+        avg_score = scores[OVERALL]
+        maturity = determine_maturity(avg_score)
+        result = {"line": line_no, "submission_id": submission_id, "name": user["Name"],
+                  "company": user["Company"], "domain": domain, "tier": tier,
+                  "scores": scores, "maturity": maturity}
+        stream = ReportStream(live=False)
+        with llm_slots:
+            result["report"] = generate_professional_summary(user, domain, tier, avg_score, maturity,
+                                                             stream, BATCH_QUEUE_TIMEOUT)
+        if stream.fallback:
+            result["fallback"] = stream.fallback
+        if save:
+            save_result(submission_id, build_row(datetime.now(), user, domain, tier,
+                                                 avg_score, maturity, submission_id, scores))
+        return result
+
+    pdf_pool = None
+    if build_pdfs:
+        # Spawned rather than forked, as the report threads are already running
+        # when the first worker starts
+        pdf_pool = batch_pdf.worker_pool(processes, batch_pdf.peer_snapshot(),
+                                         multiprocessing.get_context("spawn"))
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool, \
+            pdf_pool or contextlib.nullcontext():
+        reporting = {pool.submit(assess, line_no, sid, record): (line_no, sid, record)
+                     for line_no, sid, record, _ in prepared}
+        rendering = {}
+        while reporting or rendering:
+            finished, _ = wait([*reporting, *rendering], return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in rendering:
+                    result = rendering.pop(future)
+                    try:
+                        _, pdf, error = future.result()
+                    except Exception as e:  # the worker process itself died
+                        pdf, error = None, e
+                    if error is None:
+                        result["pdf"] = pdf
+                    else:
+                        result["error"] = f"PDF failed: {error}"
+                    yield result
+                    continue
+                line_no, submission_id, record = reporting.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield {"line": line_no, "submission_id": submission_id, "error": str(e)}
+                    continue
+                if pdf_pool is None:
+                    yield result
+                else:
+                    rendering[pdf_pool.submit(batch_pdf.render_job, _pdf_job(record, result))] = result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run AI readiness assessments in bulk.")
+    parser.add_argument("input", help="JSONL or CSV file of answers, or '-' for JSONL on stdin")
+    parser.add_argument("--out", default="assessment_results", help="output directory")
+    parser.add_argument("--workers", type=int, default=None, help="report threads (default: CPU count)")
+    parser.add_argument("--processes", type=int, default=None, help="PDF processes (default: CPU count)")
+    parser.add_argument("--llm-concurrency", type=int, default=None,
+                        help="maximum concurrent Gemini calls (default: LLM_MAX_CONCURRENCY)")
+    parser.add_argument("--no-pdf", action="store_true", help="skip PDF reports")
+    parser.add_argument("--save", action="store_true", help="also save results to Google Sheets")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    done = failed = fallbacks = 0
+    with open(os.path.join(args.out, "results.jsonl"), "w", encoding="utf-8") as out:
+        for result in run_batch(read_records(args.input), args.workers, args.llm_concurrency,
+                                build_pdfs=not args.no_pdf, save=args.save, processes=args.processes):
+            pdf = result.pop("pdf", None)
+            if pdf is not None:
+                result["pdf_path"] = os.path.join(args.out, batch_pdf.pdf_name(result["submission_id"]))
+                with open(result["pdf_path"], "wb") as f:
+                    f.write(pdf)
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            failed += "error" in result
+            fallbacks += "fallback" in result
+            done += 1
+            print(f"\r{done} assessed, {failed} failed, {fallbacks} template reports", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    return 1 if failed or fallbacks else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
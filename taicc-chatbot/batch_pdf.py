@@ -0,0 +1,196 @@
+"""Parallel batch rendering of PDF reports.
+
+Chart rendering and PDF layout are CPU-bound and hold the GIL, so this spreads
+them over a process pool. Each worker warms matplotlib, fonts and the branding
+assets once when it starts and reuses them for every report it builds; peer
+benchmark data is read once in the parent and shared with every worker.
+
+    python batch_pdf.py results.jsonl --out reports.zip --processes 8
+    python batch_pdf.py --bench 40
+
+Input is JSONL in the format `assessment.py` writes: `submission_id`, `name`,
+`company`, `email`, `phone`, `tier`, `scores`, `maturity` and `report`. The
+output is a directory, or a zip archive when `--out` ends in `.zip`.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pdf_report
+from analytics import get_analytics, quarter_of
+
+# Submission IDs become PDF file names, so they may not carry path characters
+SUBMISSION_ID = re.compile(r"[A-Za-z0-9_-]+")
+
+_peers = {}
+
+
+def pdf_name(submission_id):
+    """The PDF file name for `submission_id`; raises ValueError for an unsafe ID."""
+    if not isinstance(submission_id, str) or not SUBMISSION_ID.fullmatch(submission_id):
+        raise ValueError(f"Invalid submission_id {submission_id!r}: use only letters, digits, '_' and '-'")
+    return f"{submission_id}.pdf"
+
+
+def _init_worker(peers):
+    """Runs once in each worker process."""
+    global _peers
+    _peers = peers
+    pdf_report.warm_up()
+
+
+def render_job(job):
+    """Render one assessment result in a worker to `(submission_id, pdf_bytes, error)`.
+
+    A job that fails comes back with no PDF and the error message, so one bad
+    record never aborts the rest of the batch.
+    """
+    try:
+        pdf_name(job.get("submission_id"))
+        user = {"Name": job.get("name", ""), "Company": job.get("company", ""),
+                "Email": job.get("email", ""), "Phone": job.get("phone", "")}
+        scores = job["scores"]
+        tier = job.get("tier", "")
+        tier_distribution = _peers.get("tier_distribution") or {tier: 1}
+        score_trend = (_peers.get("score_trends", {}).get(tier)
+                       or {quarter_of(datetime.now()): scores.get("Overall Score", 0)})
+        charts = pdf_report.render_charts(scores, tier_distribution, score_trend)
+        return job["submission_id"], pdf_report.build_pdf(user, job["report"], job["maturity"], charts), None
+    except Exception as e:
+        return job.get("submission_id"), None, f"{type(e).__name__}: {e}"
+
+
+def worker_pool(processes=None, peers=None, mp_context=None):
+    """A process pool whose workers are warmed up and share `peers`."""
+    return ProcessPoolExecutor(max_workers=processes, mp_context=mp_context,
+                               initializer=_init_worker, initargs=(peers or {},))
+
+
+def peer_snapshot():
+    """The benchmark data every report shares, read once in the parent."""
+    analytics = get_analytics()
+    tiers = analytics.tier_distribution()
+    return {
+        "tier_distribution": tiers,
+        "score_trends": {tier: analytics.score_trend(tier) for tier in tiers},
+    }
+
+
+class _Output:
+    """Writes PDFs into a directory or a zip archive."""
+
+    def __init__(self, path):
+        self.path = path
+        self.zip = None
+        if path.lower().endswith(".zip"):
+            self.zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED)
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def write(self, name, data):
+        # Names come from pdf_name, but never let one leave the directory or archive
+        if os.path.basename(name) != name or name in ("", ".", ".."):
+            raise ValueError(f"Unsafe output name {name!r}")
+        if self.zip:
+            self.zip.writestr(name, data)
+        else:
+            with open(os.path.join(self.path, name), "wb") as f:
+                f.write(data)
+
+    def close(self):
+        if self.zip:
+            self.zip.close()
+
+
+def render_batch(jobs, out, processes=None, peers=None, progress=None, chunksize=4):
+    """Render every job to `out`; returns `(rendered, failures, seconds)`.
+
+    `failures` lists `(submission_id, error)` for the jobs that did not render.
+    `progress(done, failed, elapsed)` is called after each job finishes.
+    """
+    output = _Output(out)
+    started = time.perf_counter()
+    done, failures = 0, []
+    try:
+        with worker_pool(processes, peers) as pool:
+            for submission_id, pdf, error in pool.map(render_job, jobs, chunksize=chunksize):
+                if error is None:
+                    output.write(pdf_name(submission_id), pdf)
+                    done += 1
+                else:
+                    failures.append((submission_id, error))
+                if progress:
+                    progress(done, len(failures), time.perf_counter() - started)
+    finally:
+        output.close()
+    return done, failures, time.perf_counter() - started
+
+
+def read_jobs(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                job = json.loads(line)
+                if "error" not in job and job.get("report"):
+                    yield job
+
+
+def synthetic_jobs(count):
+    """Reports with a realistic body, for benchmarking."""
+    import fakes
+    from scoring import DIMENSIONS
+    report = "Client: Benchmark\nCompany: Bench Co\n\n" + fakes.FAKE_REPORT * 3
+    for i in range(count):
+        scores = {dim: round(1 + (i + j) % 40 / 10, 2) for j, dim in enumerate(DIMENSIONS)}
+        scores["Overall Score"] = round(sum(scores.values()) / len(scores), 2)
+        yield {"submission_id": f"bench-{i:05d}", "name": "Benchmark", "company": "Bench Co",
+               "tier": f"Tier {i % 5 + 1}", "scores": scores, "maturity": "Established",
+               "report": report}
+
+
+def benchmark(count, worker_counts, out):
+    """Print reports/second for each worker count."""
+    jobs = list(synthetic_jobs(count))
+    print(f"{'workers':>8} {'reports':>8} {'seconds':>8} {'reports/s':>10}")
+    for workers in worker_counts:
+        done, _, seconds = render_batch(jobs, os.path.join(out, f"bench-{workers}"), processes=workers)
+        print(f"{workers:>8} {done:>8} {seconds:>8.2f} {done / seconds:>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render PDF reports in parallel.")
+    parser.add_argument("input", nargs="?", help="JSONL of assessment results")
+    parser.add_argument("--out", default="reports", help="output directory or .zip file")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-peers", action="store_true", help="skip the cohort benchmark data")
+    parser.add_argument("--bench", type=int, metavar="N",
+                        help="benchmark N synthetic reports at 1, 2, 4, ... CPU count workers")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        cpus = os.cpu_count() or 1
+        counts = sorted({min(2 ** i, cpus) for i in range(cpus.bit_length() + 1)})
+        benchmark(args.bench, counts, args.out)
+        return 0
+    if not args.input:
+        parser.error("an input file is required unless --bench is given")
+
+    def progress(done, failed, elapsed):
+        print(f"\r{done} reports, {failed} failed, {done / elapsed:.1f}/s", end="", file=sys.stderr)
+
+    peers = None if args.no_peers else peer_snapshot()
+    done, failures, seconds = render_batch(read_jobs(args.input), args.out, args.processes, peers, progress)
+    print(f"\nRendered {done} reports in {seconds:.1f}s into {args.out}", file=sys.stderr)
+    for submission_id, error in failures:
+        print(f"  {submission_id}: {error}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Offline helper for maintaining `question_dimensions.json`.
+
+The app never guesses a question's dimension: `scoring.DimensionMap` refuses a
+question bank with any question missing from the reviewed mapping. These
+keyword rules only draft labels for new or changed questions, which a person
+then checks before they go into the mapping.
+
+    python dimension_rules.py            # coverage report and unmapped questions
+    python dimension_rules.py --suggest  # draft labels for unmapped questions as JSON
+"""
+import argparse
+import collections
+import json
+import re
+import sys
+
+from question_bank import get_question_bank
+from scoring import DIMENSIONS, load_question_dimensions
+
+DIMENSION_KEYWORDS = {
+    "AI Strategy": [
+        "strategy", "strategic", "roadmap", "roi", "kpis", "budget", "investing", "investment",
+        "governance", "policy", "policies", "leadership", "leader", "board", "vision", "innovation",
+        "compliance", "regulatory", "ethics", "bias", "responsible", "risk", "pilot", "pilots",
+        "exploring", "experimenting", "explored", "use cases", "business goals", "partners",
+        "partnership", "consultants", "vendors", "transformation", "offerings",
+    ],
+    "Data Readiness": [
+        "data", "datasets", "dataset", "analytics", "dashboards", "dashboard", "insights",
+        "reporting", "reports", "forecast", "forecasting", "predictive", "prediction", "predict",
+        "trends", "metrics", "tracking", "track", "measure", "analyze", "analysis", "analyzed",
+        "anomaly", "modeling",
+    ],
+    "Tech Infrastructure": [
+        "infrastructure", "cloud", "apis", "api", "integrated", "integrate", "integrating",
+        "integration", "platform", "platforms", "systems", "erp", "iot", "edge", "pipelines",
+        "deployed", "deployment", "mlops", "llms", "llm", "open source", "fine", "models",
+        "automation", "automate", "automated", "computer vision", "sensors", "digital twin", "scale",
+    ],
+    "Workforce & Culture": [
+        "staff", "employees", "employee", "team", "teams", "training", "trained", "upskill",
+        "upskilling", "skills", "skilled", "talent", "workforce", "culture", "hr", "hiring",
+        "awareness", "aware", "literacy", "internal", "faculty", "workshops", "certification",
+    ],
+    "Customer Experience": [
+        "customer", "customers", "client", "clients", "guest", "guests", "patient", "patients",
+        "student", "students", "user", "users", "consumer", "consumers", "chatbot", "chatbots",
+        "personalized", "personalization", "personalize", "recommendation", "recommendations",
+        "feedback", "sentiment", "reviews", "support", "engagement", "marketing", "campaigns",
+        "booking", "service", "assistants", "multilingual", "citizens", "passengers", "travelers",
+    ],
+}
+_KEYWORD_PATTERNS = {
+    dim: re.compile(r"\b(?:" + "|".join(re.escape(k) for k in kws) + r")\b")
+    for dim, kws in DIMENSION_KEYWORDS.items()
+}
+
+
+def classify_question(text):
+    """The dimension whose keywords occur most often in the question, or None."""
+    text = text.lower()
+    best, best_hits = None, 0
+    for dim, pattern in _KEYWORD_PATTERNS.items():
+        hits = len(pattern.findall(text))
+        if hits > best_hits:
+            best, best_hits = dim, hits
+    return best
+
+
+def unmapped(bank, mapping):
+    """Question texts of the bank that the mapping does not label, in bank order."""
+    return list(dict.fromkeys(t for t in bank.texts if t not in mapping))
+
+
+def incomplete_sets(bank, mapping):
+    """`(domain, tier, missing dimensions)` for every set not covering all dimensions."""
+    for domain in bank.domains:
+        for tier in bank.tiers:
+            covered = {mapping.get(t) for _, t in bank.for_tier(domain, tier)}
+            missing = [dim for dim in DIMENSIONS if dim not in covered]
+            if missing:
+                yield domain, tier, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Review the question -> dimension mapping.")
+    parser.add_argument("--suggest", action="store_true",
+                        help="print draft labels for unmapped questions as JSON")
+    args = parser.parse_args(argv)
+
+    bank = get_question_bank()
+    mapping = load_question_dimensions().get("dimensions", {})
+    missing = unmapped(bank, mapping)
+    if args.suggest:
+        json.dump({t: classify_question(t) for t in missing}, sys.stdout, indent=2)
+        print()
+        return 1 if missing else 0
+
+    counts = collections.Counter(mapping[t] for t in bank.texts if t in mapping)
+    for dim in DIMENSIONS:
+        print(f"{dim:<22} {counts[dim]:>5} ({counts[dim] / len(bank):.0%})")
+    gaps = list(incomplete_sets(bank, mapping))
+    print(f"{len(gaps)} of {len(bank.domains) * len(bank.tiers)} sets lack a dimension")
+    for domain, tier, dims in gaps:
+        print(f"  {domain} / {tier}: {', '.join(dims)}")
+    print(f"{len(missing)} unmapped questions")
+    for text in missing:
+        print(f"  [{classify_question(text) or '?'}] {text}")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
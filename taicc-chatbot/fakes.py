@@ -0,0 +1,217 @@
+"""Local stand-ins for external services, for development and load testing.
+
+Enable the fake Gemini model in the app with `GEMINI_FAKE=1`; `GEMINI_FAKE_DELAY`
+sets the seconds between streamed chunks. `loadtest.py` installs all of the
+stand-ins (Gemini, Razorpay, the results sheet, the logo CDN and the Redis
+session store) in-process.
+
+Every stand-in takes a `latency` in seconds per call and a `failure_rate`
+between 0 and 1, and counts its calls in `calls`.
+"""
+import random
+import threading
+import time
+from io import BytesIO
+
+FAKE_REPORT = """## Executive Summary
+[CLIENT_NAME], this report assesses the AI readiness of [COMPANY_NAME], which scored [SCORE] out of 5.
+
+## 1. Current Maturity Level
+Your organization shows a developing foundation for AI adoption.
+
+## 2. Detailed Strengths and Weaknesses Analysis
+| Area | Strength | Weakness |
+|------|----------|----------|
+| Strategy | Leadership interest | No formal roadmap |
+| Data | Core systems digitized | Fragmented data sources |
+
+## 3. Actionable Recommendations
+- Appoint an AI program owner.
+- Consolidate customer and operations data.
+- Pilot one high-value use case within 90 days.
+
+## 4. Potential Business Impact
+Structured adoption can reduce operating costs and improve customer response times.
+
+## 5. Conclusion and Call to Action
+An investment of ₹199 in the detailed roadmap is the next step.
+"""
+
+
+class FakeServiceError(Exception):
+    """An injected failure."""
+
+
+class FakeService:
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _call(self, name):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise FakeServiceError(f"Injected {type(self).__name__} failure in {name}")
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel(FakeService):
+    """Mimics `genai.GenerativeModel.generate_content`, including `stream=True`.
+
+    Streaming yields `chunk_size`-character chunks, the first after
+    `first_token_delay` seconds and the rest `delay` seconds apart.
+    """
+
+    def __init__(self, text=FAKE_REPORT, chunk_size=40, delay=0.05, first_token_delay=None,
+                 failure_rate=0.0):
+        super().__init__(failure_rate=failure_rate)
+        self.text = text
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.first_token_delay = delay if first_token_delay is None else first_token_delay
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self._call("generate_content")
+        if stream:
+            return self._stream()
+        time.sleep(self.first_token_delay + self.delay * (len(self.text) // self.chunk_size))
+        return FakeResponse(self.text)
+
+    def _stream(self):
+        time.sleep(self.first_token_delay)
+        for i in range(0, len(self.text), self.chunk_size):
+            if i:
+                time.sleep(self.delay)
+            yield FakeResponse(self.text[i:i + self.chunk_size])
+
+
+class FakeRazorpayClient(FakeService):
+    """Mimics the `razorpay.Client` calls the app makes.
+
+    Orders report a captured payment from their `capture_after`-th status
+    check, like a user finishing checkout while the poller waits.
+    """
+
+    def __init__(self, latency=0.05, failure_rate=0.0, capture_after=1):
+        super().__init__(latency, failure_rate)
+        self.capture_after = capture_after
+        self.order = self
+        self._checks = {}
+
+    def create(self, data):
+        self._call("order.create")
+        return {"id": f"order_{random.getrandbits(56):014x}", "amount": data["amount"],
+                "currency": data.get("currency", "INR"), "status": "created"}
+
+    def payments(self, order_id):
+        self._call("order.payments")
+        with self._lock:
+            self._checks[order_id] = checks = self._checks.get(order_id, 0) + 1
+        status = "captured" if checks >= self.capture_after else "created"
+        return {"items": [{"order_id": order_id, "status": status}]}
+
+
+class FakeWorksheet(FakeService):
+    """Mimics the gspread worksheet calls the app makes; keeps rows in memory."""
+
+    def __init__(self, latency=0.1, failure_rate=0.0):
+        super().__init__(latency, failure_rate)
+        self.rows = []
+        self.spreadsheet = self
+
+    def append_rows(self, rows, **kwargs):
+        self._call("append_rows")
+        with self._lock:
+            self.rows.extend(rows)
+
+    def append_row(self, row, **kwargs):
+        self.append_rows([row])
+
+    def get_all_values(self):
+        self._call("get_all_values")
+        with self._lock:
+            return [list(row) for row in self.rows]
+
+    def get_values(self, range_name):
+        """Rows from an "A<n>:O" style range; `n` is 1-based like the sheet."""
+        self._call("get_values")
+        start = int("".join(c for c in range_name.split(":")[0] if c.isdigit()) or 1)
+        with self._lock:
+            return [list(row) for row in self.rows[start - 1:]]
+
+    def col_values(self, col):
+        self._call("col_values")
+        with self._lock:
+            return [row[col - 1] if len(row) >= col else "" for row in self.rows]
+
+    def fetch_sheet_metadata(self):
+        self._call("fetch_sheet_metadata")
+        return {"sheets": [{"properties": {"title": "Sheet1"}}]}
+
+
+def fake_logo_png(size=(300, 120)):
+    from PIL import Image
+    buffer = BytesIO()
+    Image.new("RGB", size, (51, 153, 204)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FakeHTTPResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise FakeServiceError(f"HTTP {self.status_code}")
+
+
+class FakeHTTPSession(FakeService):
+    """Stands in for the shared `requests.Session`; every GET returns the logo."""
+
+    def __init__(self, latency=0.2, failure_rate=0.0, content=None):
+        super().__init__(latency, failure_rate)
+        self.content = content or fake_logo_png()
+
+    def get(self, url, **kwargs):
+        self._call("get")
+        return FakeHTTPResponse(self.content)
+
+
+class FakeRedis(FakeService):
+    """An in-memory stand-in for the Redis commands the session store uses."""
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        super().__init__(latency, failure_rate)
+        self._values = {}
+
+    def get(self, name):
+        self._call("get")
+        with self._lock:
+            return self._values[name][0] if self._live(name) else None
+
+    def _live(self, name):
+        """Whether `name` holds an unexpired value; drops it once expired."""
+        value, expires_at = self._values.get(name, (None, None))
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._values[name]
+            return False
+        return value is not None
+
+    def set(self, name, value, ex=None, nx=False):
+        self._call("set")
+        with self._lock:
+            if nx and self._live(name):
+                return None
+            self._values[name] = (value.encode() if isinstance(value, str) else value,
+                                  time.monotonic() + ex if ex else None)
+        return True
@@ -0,0 +1,342 @@
+"""Local columnar mirror of every assessment ever submitted.
+
+Past submissions live in two places with different shapes: the results sheet
+(one `assessment.build_row` row per submission; newer rows end with their
+per-dimension scores) and older CSV exports such as
+`ai_readiness_data.csv` (per-dimension scores, a free-text Summary and a
+"Level" label, kept as `legacy_level`, but no domain, tier or submission ID).
+Both are normalized into one Parquet dataset under the data directory,
+partitioned by month and domain, which analyses query locally instead of
+pulling the sheet through gspread.
+
+Sheet syncs are incremental. The store remembers how many sheet rows it has
+seen and a fingerprint of the last one, and fetches only the rows after that
+point. If that row has moved (the sheet was edited above it), it rescans the
+whole sheet. Either way a row is added only if its submission ID is not yet
+in the dataset: rows are appended out of timestamp order by flusher retries
+and by each replica's own flusher, so a timestamp mark cannot tell old rows
+from late ones. The newest timestamp seen is kept as `high_water` for
+reporting. Legacy CSVs are read in
+chunks, so quoted multi-line summaries never have to fit in memory at once,
+and each file is ingested only once.
+
+    python history_store.py --sync
+    python history_store.py --ingest-csv ai_readiness_data.csv
+    python history_store.py --summary domain,tier --since 2025-01-01
+"""
+import argparse
+import functools
+import hashlib
+import json
+import os
+import sys
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+import resources
+from analytics import ROW_DIMENSIONS, ROW_DOMAIN, ROW_SCORE, ROW_SUBMISSION_ID, ROW_TIER, ROW_TIMESTAMP, row_dimensions
+from scoring import DIMENSIONS, determine_maturity
+
+CSV_CHUNK_ROWS = 5000
+# Through the last dimension score column
+SHEET_COLUMNS = "A{start}:" + chr(ord("A") + ROW_DIMENSIONS + len(DIMENSIONS) - 1)
+LEGACY_DOMAIN = "Unspecified"
+STATE_FILE = "_sync_state.json"
+
+SCHEMA = pa.schema([
+    ("submission_id", pa.string()),
+    ("timestamp", pa.timestamp("s")),
+    ("name", pa.string()),
+    ("company", pa.string()),
+    ("email", pa.string()),
+    ("phone", pa.string()),
+    ("domain", pa.string()),
+    ("tier", pa.string()),
+    ("score", pa.float64()),
+    ("maturity", pa.string()),
+    # The legacy export's "Level" (e.g. "Basic"); not a question bank tier
+    ("legacy_level", pa.string()),
+    *[(dimension, pa.float64()) for dimension in DIMENSIONS],
+    ("summary", pa.string()),
+    ("source", pa.string()),
+    ("month", pa.string()),
+])
+PARTITIONING = ds.partitioning(pa.schema([("month", pa.string()), ("domain", pa.string())]), flavor="hive")
+
+
+def _record(timestamp, **fields):
+    record = dict.fromkeys(SCHEMA.names)
+    record.update(fields, timestamp=timestamp, month=timestamp.strftime("%Y-%m"))
+    return record
+
+
+def sheet_record(row):
+    """Normalize a results sheet row; raises ValueError for headers and hand edits."""
+    timestamp = datetime.strptime(str(row[ROW_TIMESTAMP]), "%Y-%m-%d %H:%M:%S")
+    score = float(row[ROW_SCORE])
+    row = list(row) + [""] * (ROW_SUBMISSION_ID + 1 - len(row))
+    submission_id = row[ROW_SUBMISSION_ID] or (
+        "row-" + hashlib.sha1("|".join(map(str, row[:ROW_SUBMISSION_ID])).encode()).hexdigest())
+    return _record(
+        timestamp, submission_id=submission_id, name=row[1], company=row[2], email=row[3],
+        phone=str(row[4]), domain=row[ROW_DOMAIN] or LEGACY_DOMAIN, tier=row[ROW_TIER],
+        score=score, maturity=row[8], source="sheet", **row_dimensions(row),
+    )
+
+
+def _fingerprint(row):
+    return hashlib.sha1("|".join(map(str, row)).encode()).hexdigest()
+
+
+def legacy_record(row):
+    """Normalize a row of the legacy CSV export (a dict of its columns)."""
+    timestamp = datetime.fromisoformat(row["Timestamp"]).replace(microsecond=0)
+    dimensions = {d: float(row[d]) for d in DIMENSIONS if row.get(d) not in (None, "")}
+    score = round(sum(dimensions.values()) / len(dimensions), 2) if dimensions else None
+    key = "|".join(str(row.get(c, "")) for c in ("Timestamp", "Email", "Name"))
+    return _record(
+        timestamp, submission_id="legacy-" + hashlib.sha1(key.encode()).hexdigest(),
+        name=row.get("Name"), company=row.get("Company"), email=row.get("Email"),
+        phone=row.get("Phone"), domain=LEGACY_DOMAIN, legacy_level=row.get("Level"), score=score,
+        maturity=determine_maturity(score) if score is not None else None,
+        summary=row.get("Summary"), source="legacy_csv", **dimensions,
+    )
+
+
+def _month_range(since=None, until=None):
+    expression = None
+    if since:
+        expression = ds.field("month") >= since[:7]
+    if until:
+        bound = ds.field("month") <= until[:7]
+        expression = bound if expression is None else expression & bound
+    return expression
+
+
+def filter_expression(filters=None, since=None, until=None):
+    """A dataset filter from `{column: value or list of values}` and a date range.
+
+    `since`/`until` are ISO dates or datetimes; they also prune whole months.
+    A date-only `until` includes that whole day.
+    """
+    expression = _month_range(since, until)
+    terms = []
+    for column, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set, frozenset)):
+            terms.append(ds.field(column).isin(list(value)))
+        else:
+            terms.append(ds.field(column) == value)
+    if since:
+        terms.append(ds.field("timestamp") >= pa.scalar(datetime.fromisoformat(since), pa.timestamp("s")))
+    if until:
+        try:
+            next_day = datetime.combine(date.fromisoformat(until), datetime.min.time()) + timedelta(days=1)
+        except ValueError:
+            terms.append(ds.field("timestamp") <= pa.scalar(datetime.fromisoformat(until), pa.timestamp("s")))
+        else:
+            terms.append(ds.field("timestamp") < pa.scalar(next_day, pa.timestamp("s")))
+    for term in terms:
+        expression = term if expression is None else expression & term
+    return expression
+
+
+class HistoryStore:
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._state_path = os.path.join(path, STATE_FILE)
+
+    # --- sync state ---
+
+    def state(self):
+        try:
+            with open(self._state_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"sheet_rows": 0, "last_row": None, "high_water": None, "legacy_files": {}}
+
+    def _save_state(self, state):
+        temporary = f"{self._state_path}.{uuid.uuid4().hex}"
+        with open(temporary, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(temporary, self._state_path)
+
+    # --- writes ---
+
+    def _append(self, records):
+        if not records:
+            return 0
+        table = pa.Table.from_pylist(records, schema=SCHEMA)
+        ds.write_dataset(
+            table, self.path, format="parquet", partitioning=PARTITIONING,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        return table.num_rows
+
+    def sync_sheet(self, get_values=None):
+        """Append sheet rows not yet mirrored; returns the number added.
+
+        `get_values(range)` fetches a cell range as lists of strings; it
+        defaults to the shared results sheet.
+        """
+        get_values = get_values or (lambda cells: resources.sheet.call(lambda ws: ws.get_values(cells)))
+        with self._lock:
+            state = self.state()
+            seen = state["sheet_rows"]
+            rows = get_values(SHEET_COLUMNS.format(start=seen)) if seen else []
+            if rows and _fingerprint(rows[0]) == state.get("last_row"):
+                # The last row seen is where we left it: everything after it is new
+                first_row, rows = seen + 1, rows[1:]
+            else:
+                first_row, rows = 1, get_values(SHEET_COLUMNS.format(start=1))
+
+            # Rows arrive out of timestamp order (flusher retries, one flusher per
+            # replica), so only the submission ID says whether a row is new
+            known = self._submission_ids()
+            records = []
+            for row in rows:
+                try:
+                    record = sheet_record(row)
+                except (ValueError, IndexError):
+                    continue  # header or hand-edited rows
+                if record["submission_id"] in known:
+                    continue
+                known.add(record["submission_id"])
+                records.append(record)
+
+            added = self._append(records)
+            if records:
+                newest = max(r["timestamp"] for r in records).isoformat()
+                state["high_water"] = max(newest, state["high_water"] or newest)
+            state["sheet_rows"] = first_row - 1 + len(rows)
+            if rows or first_row == 1:
+                state["last_row"] = _fingerprint(rows[-1]) if rows else None
+            self._save_state(state)
+        return added
+
+    def _submission_ids(self):
+        return set(self.dataset().to_table(columns=["submission_id"])["submission_id"].to_pylist())
+
+    def ingest_csv(self, csv_path, chunk_rows=CSV_CHUNK_ROWS):
+        """Stream a legacy CSV export into the dataset once; returns rows added."""
+        csv_path = os.path.abspath(csv_path)
+        stat = os.stat(csv_path)
+        fingerprint = f"{stat.st_size}:{int(stat.st_mtime)}"
+        with self._lock:
+            state = self.state()
+            if state["legacy_files"].get(csv_path) == fingerprint:
+                return 0
+            added = 0
+            for chunk in pd.read_csv(csv_path, dtype=str, keep_default_na=False, chunksize=chunk_rows):
+                records = []
+                for row in chunk.to_dict("records"):
+                    try:
+                        records.append(legacy_record(row))
+                    except (ValueError, KeyError):
+                        continue
+                added += self._append(records)
+            state["legacy_files"][csv_path] = fingerprint
+            self._save_state(state)
+        return added
+
+    def compact(self):
+        """Rewrite the dataset as one file per partition after many small syncs."""
+        with self._lock:
+            table = self.dataset().to_table()
+            if not table.num_rows:
+                return 0
+            # A row synced twice (e.g. a resync after a hand edit) keeps one copy
+            frame = table.to_pandas().drop_duplicates("submission_id", keep="last")
+            table = pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+            old_files = self.dataset().files
+            ds.write_dataset(
+                table, self.path, format="parquet", partitioning=PARTITIONING,
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            for file in old_files:
+                os.remove(file)
+        return table.num_rows
+
+    # --- reads ---
+
+    def dataset(self):
+        return ds.dataset(self.path, schema=SCHEMA, format="parquet", partitioning=PARTITIONING,
+                          exclude_invalid_files=True, ignore_prefixes=["_", "."])
+
+    def scan(self, columns=None, filters=None, since=None, until=None):
+        """Matching submissions as a DataFrame, e.g. `scan(filters={"tier": "Tier 2"})`."""
+        table = self.dataset().to_table(columns=columns, filter=filter_expression(filters, since, until))
+        return table.to_pandas()
+
+    def summarize(self, group_by, filters=None, since=None, until=None):
+        """Submission count and score statistics per group, as a DataFrame."""
+        group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+        table = self.dataset().to_table(columns=[*group_by, "score"],
+                                        filter=filter_expression(filters, since, until))
+        stats = table.group_by(group_by).aggregate([
+            ("score", "count"), ("score", "mean"), ("score", "min"), ("score", "max"),
+        ])
+        frame = stats.to_pandas().rename(columns={
+            "score_count": "count", "score_mean": "average_score",
+            "score_min": "min_score", "score_max": "max_score",
+        })
+        return frame.sort_values(group_by).reset_index(drop=True)
+
+    def peer_percentile(self, score, domain=None, tier=None):
+        """Share of past submissions (in the domain/tier, if given) scoring below `score`."""
+        filters = {k: v for k, v in (("domain", domain), ("tier", tier)) if v}
+        scores = self.dataset().to_table(columns=["score"], filter=filter_expression(filters))["score"]
+        scores = scores.drop_null()
+        if not len(scores):
+            return None
+        below = pc.sum(pc.less(scores, score)).as_py() or 0
+        return round(100 * below / len(scores), 1)
+
+
+@functools.lru_cache(maxsize=None)
+def get_history_store():
+    """The process-wide history store under the data directory."""
+    return HistoryStore(resources.data_path("history"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain and query the local submission history.")
+    parser.add_argument("--sync", action="store_true", help="pull new rows from the results sheet")
+    parser.add_argument("--ingest-csv", metavar="PATH", action="append", default=[],
+                        help="ingest a legacy CSV export (repeatable)")
+    parser.add_argument("--compact", action="store_true", help="merge small files")
+    parser.add_argument("--summary", metavar="COLUMNS", help="comma-separated group-by columns")
+    parser.add_argument("--domain")
+    parser.add_argument("--tier")
+    parser.add_argument("--since", help="ISO date")
+    parser.add_argument("--until", help="ISO date")
+    args = parser.parse_args(argv)
+
+    store = get_history_store()
+    for path in args.ingest_csv:
+        print(f"Ingested {store.ingest_csv(path)} rows from {path}")
+    if args.sync:
+        print(f"Synced {store.sync_sheet()} new rows from the results sheet")
+    if args.compact:
+        print(f"Compacted {store.compact()} rows")
+    filters = {k: v for k, v in (("domain", args.domain), ("tier", args.tier)) if v}
+    if args.summary:
+        with pd.option_context("display.width", 200, "display.max_columns", None):
+            print(store.summarize(args.summary.split(","), filters, args.since, args.until).to_string(index=False))
+    else:
+        print(f"{len(store.scan(['submission_id'], filters, args.since, args.until))} submissions in {store.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Admission control for Gemini calls.
+
+Every report generation in the process passes through one gateway that caps
+the calls in flight and their rate (a token bucket sized to the API quota).
+Requests beyond that wait in a bounded queue until their deadline. When the
+queue is full or the deadline passes, `slot()` raises `GatewayRejected` and
+the caller serves a template report instead (see `reports.fallback_report_body`),
+so latency stays bounded however many users submit at once.
+
+A job joins the queue when it is submitted, not when a worker thread gets to
+it: `admission()` takes its place and starts its deadline, and the job later
+passes the `Admission` to `slot()`. Time spent waiting for a thread therefore
+counts against the deadline, and `queued` is the real backlog.
+
+Configured with `LLM_MAX_CONCURRENCY`, `LLM_RATE_PER_MINUTE`, `LLM_MAX_QUEUE`,
+`LLM_QUEUE_TIMEOUT` and `LLM_CALL_TIMEOUT` (seconds).
+"""
+import contextlib
+import threading
+import time
+
+import metrics
+import resources
+
+MAX_CONCURRENCY = 4
+RATE_PER_MINUTE = 60
+MAX_QUEUE = 32
+QUEUE_TIMEOUT = 10.0
+CALL_TIMEOUT = 60.0
+
+
+class GatewayRejected(Exception):
+    """The request was not admitted; `reason` is "shed" or "queue_timeout"."""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+class LLMTimeout(Exception):
+    pass
+
+
+class Admission:
+    """A job's place in the gateway queue, from submission until it gets a slot."""
+
+    def __init__(self, gateway, queue_timeout, shed):
+        self.gateway = gateway
+        self.queue_timeout = queue_timeout
+        self.queued_at = time.monotonic()
+        self.deadline = self.queued_at + queue_timeout
+        self.shed = shed
+        self.waiting = not shed
+
+    def release(self):
+        """Leave the queue without a call, e.g. when the report was cached."""
+        with self.gateway._cond:
+            self.gateway._dequeue(self)
+
+
+class LLMGateway:
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, rate_per_minute=RATE_PER_MINUTE,
+                 max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT, call_timeout=CALL_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.rate = rate_per_minute / 60.0
+        # A full bucket allows a burst of up to one call per concurrency slot
+        self.burst = max(1.0, float(max_concurrency))
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.call_timeout = call_timeout
+        self._cond = threading.Condition()
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.queue_timeouts = 0
+        self.fallbacks = 0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _try_admit(self, now):
+        self._refill(now)
+        if self.in_flight < self.max_concurrency and self._tokens >= 1:
+            self._tokens -= 1
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        return False
+
+    def admission(self, queue_timeout=None):
+        """Join the queue now; the deadline runs from this call.
+
+        The admission is shed at once if more jobs are already waiting than
+        the free slots and `max_queue` can take.
+        """
+        queue_timeout = self.queue_timeout if queue_timeout is None else queue_timeout
+        with self._cond:
+            shed = self.queued - (self.max_concurrency - self.in_flight) >= self.max_queue
+            if not shed:
+                self.queued += 1
+        return Admission(self, queue_timeout, shed)
+
+    def _dequeue(self, admission):
+        if admission.waiting:
+            admission.waiting = False
+            self.queued -= 1
+
+    @contextlib.contextmanager
+    def slot(self, queue_timeout=None, admission=None):
+        """Hold one call slot for the block, which receives the per-call timeout.
+
+        `admission` is the queue place taken when the job was submitted; without
+        one, the job joins the queue now. Raises `GatewayRejected` if the queue
+        was full or no slot frees up before the admission's deadline.
+        """
+        admission = admission or self.admission(queue_timeout)
+        with self._cond:
+            if admission.shed:
+                self.shed += 1
+                raise GatewayRejected("shed", f"Report queue is full ({self.max_queue} waiting)")
+            try:
+                while True:
+                    now = time.monotonic()
+                    remaining = admission.deadline - now
+                    if remaining <= 0:
+                        self.queue_timeouts += 1
+                        raise GatewayRejected(
+                            "queue_timeout", f"No report slot within {admission.queue_timeout:g}s")
+                    if self._try_admit(now):
+                        break
+                    if self.in_flight < self.max_concurrency:
+                        remaining = min(remaining, (1 - self._tokens) / self.rate)
+                    self._cond.wait(remaining)
+            finally:
+                self._dequeue(admission)
+        metrics.observe("llm.queue_wait", time.monotonic() - admission.queued_at)
+        try:
+            yield self.call_timeout
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify()
+
+    def record_fallback(self):
+        with self._cond:
+            self.fallbacks += 1
+
+    def stats(self):
+        with self._cond:
+            requests = self.admitted + self.shed + self.queue_timeouts
+            return {
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "admitted": self.admitted,
+                "shed": self.shed,
+                "queue_timeouts": self.queue_timeouts,
+                "fallbacks": self.fallbacks,
+                "fallback_ratio": round(self.fallbacks / requests, 4) if requests else 0.0,
+            }
+
+
+def _build_gateway():
+    setting = resources.get_secret
+    gateway = LLMGateway(
+        max_concurrency=int(setting("LLM_MAX_CONCURRENCY", MAX_CONCURRENCY)),
+        rate_per_minute=float(setting("LLM_RATE_PER_MINUTE", RATE_PER_MINUTE)),
+        max_queue=int(setting("LLM_MAX_QUEUE", MAX_QUEUE)),
+        queue_timeout=float(setting("LLM_QUEUE_TIMEOUT", QUEUE_TIMEOUT)),
+        call_timeout=float(setting("LLM_CALL_TIMEOUT", CALL_TIMEOUT)),
+    )
+    metrics.gauge("taicc_llm_gateway", "Gemini admission control: queue depth, sheds and fallbacks.",
+                  gateway.stats)
+    return gateway
+
+
+# A LazyResource rather than lru_cache: concurrent first calls must share one gateway
+gateway = resources.LazyResource("llm gateway", _build_gateway)
+
+
+def get_llm_gateway():
+    """The process-wide gateway, sized from the `LLM_*` settings."""
+    return gateway.get()
@@ -0,0 +1,250 @@
+"""Load test: simulated users through the whole app against local stand-ins.
+
+Each simulated user drives `app.py` with Streamlit's AppTest through login,
+payment, the questions and the results page, while Gemini, Razorpay, the
+results sheet, the logo CDN and the session store are replaced by the
+stand-ins in `fakes.py`, each with its own latency and failure rate. Users
+share one process, so they share the clients, caches, poller and pipeline
+exactly as real sessions do.
+
+AppTest is not thread-safe, so script runs are serialized; everything a run
+hands off (payment polling, report streaming, charts, PDFs and the Sheets
+flush) still overlaps across users. A warm-up user runs first so one-time
+imports and branding downloads are not charged to the measured sessions.
+
+    python loadtest.py --users 50 --concurrency 10
+    python loadtest.py --users 20 --gemini-delay 0.1 --failure-rate 0.05 --json before.json
+
+The report covers throughput, per-step tail latency, memory per session,
+outbound calls per session and the per-phase timings from `metrics.py`.
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fakes
+import metrics
+import resources
+import session_store
+from question_bank import get_question_bank
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+STEPS = ("login", "payment", "questions", "results")
+POLL_INTERVAL = 0.2
+
+_script_lock = threading.Lock()
+
+
+class SessionFailed(Exception):
+    pass
+
+
+def install_fakes(args):
+    """Swap every external client for a local stand-in; returns them by name."""
+    services = {
+        "gemini": fakes.FakeGeminiModel(delay=args.gemini_delay, failure_rate=args.failure_rate),
+        "razorpay": fakes.FakeRazorpayClient(args.razorpay_latency, args.failure_rate),
+        "sheets": fakes.FakeWorksheet(args.sheets_latency, args.failure_rate),
+        "logo": fakes.FakeHTTPSession(args.logo_latency, args.failure_rate),
+        "sessions": fakes.FakeRedis(args.redis_latency, args.failure_rate),
+    }
+    resources.gemini_model.set(services["gemini"])
+    resources.razorpay_client.set(services["razorpay"])
+    resources.sheet.set(services["sheets"])
+    resources.http_session.set(services["logo"])
+    session_store.store.set(session_store.RedisSessionStore(services["sessions"]))
+    return services
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _run(at):
+    with _script_lock:
+        at.run()
+
+
+def _wait_for(at, ready, timeout):
+    deadline = time.monotonic() + timeout
+    while not ready(at):
+        if at.exception:
+            raise SessionFailed(at.exception[0].message)
+        if time.monotonic() > deadline:
+            raise SessionFailed(f"Timed out on the {at.session_state.page} page")
+        time.sleep(POLL_INTERVAL)
+        _run(at)
+
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def simulate_user(user_no, args, sessions):
+    """Run one user through the app; returns `(step timings, error)`."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(args.seed + user_no)
+    timings = {}
+    at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    sessions.append(at)
+    try:
+        started = time.perf_counter()
+        _run(at)
+        for field, value in zip(at.text_input, (f"User {user_no}", "Load Test Co",
+                                                f"user{user_no}@example.com", "9999999999")):
+            field.input(value)
+        bank = get_question_bank()
+        at.selectbox[0].set_value(rng.choice(bank.domains))
+        at.selectbox[1].set_value(rng.choice(bank.tiers))
+        _button(at, "Start Assessment").click()
+        _run(at)
+        timings["login"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _wait_for(at, lambda at: any(b.label == "➡️ Continue to Assessment" for b in at.button),
+                  args.timeout)
+        _button(at, "➡️ Continue to Assessment").click()
+        _run(at)
+        timings["payment"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        while at.session_state.page == "questions":
+            for radio in at.radio:
+                radio.set_value(rng.choice(radio.options))
+            _run(at)
+            labels = [b.label for b in at.button]
+            _button(at, "Submit" if "Submit" in labels else "Next ➡️").click()
+            _run(at)
+            if at.exception:
+                raise SessionFailed(at.exception[0].message)
+        timings["questions"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _wait_for(at, lambda at: at.download_button or at.error, args.timeout)
+        timings["results"] = time.perf_counter() - started
+        if at.error:
+            raise SessionFailed(at.error[0].value)
+        return timings, None
+    except Exception as e:
+        return timings, f"{type(e).__name__}: {e}"
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def run(args):
+    services = install_fakes(args)
+    for _ in range(args.warmup):
+        simulate_user(-1, args, [])
+    calls_before = {name: s.calls for name, s in services.items()}
+    metrics.registry.reset()
+    sessions = []
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        outcomes = list(pool.map(lambda n: simulate_user(n, args, sessions), range(args.users)))
+    wall = time.perf_counter() - started
+    rss_after = _rss_bytes()
+
+    completed = [t for t, error in outcomes if error is None]
+    errors = [error for _, error in outcomes if error is not None]
+    latency = {}
+    for step in STEPS + ("total",):
+        values = [sum(t.values()) if step == "total" else t[step]
+                  for t in completed if step == "total" or step in t]
+        latency[step] = {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95),
+                         "p99": percentile(values, 0.99), "max": max(values, default=None)}
+    state_sizes = []
+    for at in sessions:
+        state = at.session_state._state.filtered_state
+        try:
+            state_sizes.append(len(pickle.dumps(state)))
+        except Exception:
+            continue
+    return {
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "completed": len(completed),
+        "failed": len(errors),
+        "errors": sorted(set(errors)),
+        "wall_seconds": wall,
+        "sessions_per_second": len(completed) / wall if wall else 0.0,
+        "latency": latency,
+        "rss_bytes_per_session": (rss_after - rss_before) / args.users,
+        "session_state_bytes": sum(state_sizes) / len(state_sizes) if state_sizes else 0,
+        "calls_per_session": {name: (s.calls - calls_before[name]) / args.users
+                              for name, s in services.items()},
+        "phases": metrics.summary(),
+    }
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def print_report(report):
+    print(f"{report['users']} users, {report['concurrency']} concurrent: "
+          f"{report['completed']} completed, {report['failed']} failed in {report['wall_seconds']:.1f}s "
+          f"({report['sessions_per_second']:.2f} sessions/s)")
+    for error in report["errors"]:
+        print(f"  error: {error}")
+    print(f"\n{'step (ms)':<12} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for step, q in report["latency"].items():
+        print(f"{step:<12} {_ms(q['p50']):>8} {_ms(q['p95']):>8} {_ms(q['p99']):>8} {_ms(q['max']):>8}")
+    print(f"\nMemory: {report['rss_bytes_per_session'] / 1e6:.2f} MB RSS growth per session, "
+          f"{report['session_state_bytes'] / 1e3:.1f} kB session state")
+    print("Outbound calls per session: " + ", ".join(
+        f"{name} {calls:.2f}" for name, calls in report["calls_per_session"].items()))
+    print(f"\n{'phase (ms)':<22} {'count':>6} {'errors':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for phase, s in report["phases"].items():
+        print(f"{phase:<22} {s['count']:>6} {s['errors']:>6} {_ms(s['p50']):>8} {_ms(s['p95']):>8} {_ms(s['p99']):>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the app against local stand-ins.")
+    parser.add_argument("--users", type=int, default=10, help="simulated users in total")
+    parser.add_argument("--concurrency", type=int, default=5, help="users in flight at once")
+    parser.add_argument("--gemini-delay", type=float, default=0.05, help="seconds between streamed chunks")
+    parser.add_argument("--razorpay-latency", type=float, default=0.05)
+    parser.add_argument("--sheets-latency", type=float, default=0.1)
+    parser.add_argument("--logo-latency", type=float, default=0.2)
+    parser.add_argument("--redis-latency", type=float, default=0.002)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of calls to each service that fail")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per step")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured users run first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    # Keep the run's journal, analytics and report cache out of the real data directory
+    os.environ.setdefault("TAICC_DATA_DIR", tempfile.mkdtemp(prefix="taicc-loadtest-"))
+    os.environ.setdefault("REPORT_CACHE_BACKEND", "memory")
+    os.environ.pop("LOGO_PATH", None)
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Latency, error and cache metrics for external calls and render phases.
+
+Each phase (the Gemini call, Razorpay polling, the Sheets append, the logo
+download, chart rendering, PDF output and every results pipeline task) is
+wrapped in `timed()`, which records its duration in a per-phase histogram and
+counts the failures. Cache hit ratios and queue depths are read at scrape
+time from gauge callbacks.
+
+Set `METRICS_PORT` to serve everything in the Prometheus text format from
+`http://<host>:<port>/metrics`. Set `TAICC_TRACE` to also append every timed
+phase of a traced submission to `.data/traces/<submission id>.jsonl`.
+"""
+import bisect
+import collections
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, from a cached chart up to a slow Gemini report
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+# Recent observations kept per phase for the quantile estimates
+SAMPLE_WINDOW = 1024
+
+
+class Histogram:
+    """Cumulative bucket counts plus a window of recent samples for quantiles."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window=SAMPLE_WINDOW):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+        self.recent = collections.deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+    def quantile(self, q):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def _label(value):
+    """A label value escaped for the text format: backslash, quote and newline."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _help(text):
+    return str(text).replace("\\", "\\\\").replace("\n", "\\n")
+
+
+class Registry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases = {}
+        self._gauges = {}
+
+    def _histogram(self, phase):
+        histogram = self._phases.get(phase)
+        if histogram is None:
+            histogram = self._phases[phase] = Histogram()
+        return histogram
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            self._histogram(phase).observe(seconds)
+
+    def error(self, phase):
+        with self._lock:
+            self._histogram(phase).errors += 1
+
+    def reset(self):
+        with self._lock:
+            self._phases.clear()
+
+    def gauge(self, name, help_text, read):
+        """Register `read()`, returning `{label value: number}`, as gauge `name`."""
+        self._gauges[name] = (help_text, read)
+
+    def summary(self):
+        """`{phase: {"count", "errors", "p50", "p95", "p99"}}` for quick inspection."""
+        with self._lock:
+            return {
+                phase: dict(count=h.count, errors=h.errors,
+                            **{f"p{int(q * 100)}": h.quantile(q) for q in QUANTILES})
+                for phase, h in sorted(self._phases.items())
+            }
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP taicc_phase_seconds Duration of each external call and render phase.",
+            "# TYPE taicc_phase_seconds histogram",
+        ]
+        quantiles = [
+            "# HELP taicc_phase_quantile_seconds Recent latency quantiles of each phase.",
+            "# TYPE taicc_phase_quantile_seconds gauge",
+        ]
+        errors = [
+            "# HELP taicc_phase_errors_total Failed calls of each phase.",
+            "# TYPE taicc_phase_errors_total counter",
+        ]
+        with self._lock:
+            for name, h in sorted(self._phases.items()):
+                phase = _label(name)
+                cumulative = 0
+                bounds = [repr(float(b)) for b in h.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, h.counts):
+                    cumulative += count
+                    lines.append(f'taicc_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {cumulative}')
+                lines.append(f'taicc_phase_seconds_sum{{phase="{phase}"}} {h.sum:.6f}')
+                lines.append(f'taicc_phase_seconds_count{{phase="{phase}"}} {h.count}')
+                for q in QUANTILES:
+                    value = h.quantile(q)
+                    if value is not None:
+                        quantiles.append(f'taicc_phase_quantile_seconds{{phase="{phase}",quantile="{q}"}} {value:.6f}')
+                errors.append(f'taicc_phase_errors_total{{phase="{phase}"}} {h.errors}')
+        lines += quantiles + errors
+
+        for name, (help_text, read) in sorted(self._gauges.items()):
+            try:
+                values = read()
+            except Exception as e:
+                print(f"Could not read metric {name}: {e}")
+                continue
+            lines.append(f"# HELP {name} {_help(help_text)}")
+            lines.append(f"# TYPE {name} gauge")
+            for label, value in sorted(values.items()):
+                selector = f'{{name="{_label(label)}"}}' if label else ""
+                lines.append(f"{name}{selector} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+observe = registry.observe
+gauge = registry.gauge
+summary = registry.summary
+render = registry.render
+
+
+# -----------------------------
+# --- TIMING & TRACES ---
+# -----------------------------
+_trace = threading.local()
+
+
+@contextlib.contextmanager
+def tracing(trace_id):
+    """Attribute phases timed on this thread to `trace_id` (a submission ID)."""
+    previous = getattr(_trace, "id", None)
+    _trace.id = trace_id
+    try:
+        yield
+    finally:
+        _trace.id = previous
+
+
+@functools.lru_cache(maxsize=None)
+def _trace_dir():
+    import resources
+    if not resources.get_secret("TAICC_TRACE"):
+        return None
+    path = resources.data_path("traces")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+_trace_lock = threading.Lock()
+
+
+def _write_trace(phase, started, seconds, error):
+    trace_id = getattr(_trace, "id", None)
+    directory = _trace_dir() if trace_id else None
+    if directory is None:
+        return
+    event = {"phase": phase, "start": round(started, 6), "seconds": round(seconds, 6),
+             "thread": threading.current_thread().name}
+    if error:
+        event["error"] = error
+    with _trace_lock, open(os.path.join(directory, f"{trace_id}.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(event) + "\n")
+
+
+@contextlib.contextmanager
+def timed(phase):
+    """Time the block as one call of `phase`, counting it as an error if it raises."""
+    started = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        registry.error(phase)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        registry.observe(phase, seconds)
+        _write_trace(phase, started, seconds, error)
+
+
+def instrument(phase):
+    """Decorator form of `timed()`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(phase):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def lru_cache_gauge(name, help_text, *cached):
+    """Expose the hit ratio of `functools.lru_cache` functions as gauge `name`."""
+    def read():
+        values = {}
+        for fn in cached:
+            info = fn.cache_info()
+            total = info.hits + info.misses
+            values[fn.__name__] = round(info.hits / total, 4) if total else 0.0
+        return values
+    gauge(name, help_text, read)
+
+
+# -----------------------------
+# --- ENDPOINT ---
+# -----------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the Streamlit log
+
+
+@functools.lru_cache(maxsize=None)
+def start_metrics_server(port=None):
+    """Serve `/metrics` on `port` (default `METRICS_PORT`) once per process.
+
+    Returns the server, or None when no port is configured or it is taken.
+    """
+    import resources
+    port = port or resources.get_secret("METRICS_PORT")
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+    except OSError as e:
+        print(f"Could not start the metrics endpoint on port {port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
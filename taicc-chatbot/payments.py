@@ -0,0 +1,143 @@
+"""Non-blocking Razorpay payment confirmation.
+
+A single background thread per process polls Razorpay for every order that is
+still awaiting payment, backing off exponentially per order, and records the
+outcome in a shared status cache. Streamlit reruns only read that cache, so no
+script thread ever sleeps while a user is paying.
+
+Polling is the only confirmation path. The checkout runs in a sandboxed
+component iframe that cannot hand its signed response back to the script, and
+the app serves no webhook endpoint; a webhook would also reach just one
+replica's cache, while every replica can poll the orders its users watch.
+"""
+import heapq
+import threading
+import time
+
+import metrics
+
+STATUS_PENDING = "pending"
+STATUS_CAPTURED = "captured"
+STATUS_EXPIRED = "expired"
+
+
+def create_order(client, amount=1):
+    """Create a Razorpay order for `amount` rupees."""
+    with metrics.timed("razorpay.create_order"):
+        return client.order.create({
+            "amount": amount * 100,  # Razorpay expects paise
+            "currency": "INR",
+            "payment_capture": 1
+        })
+
+
+def check_razorpay_payment_status(client, order_id):
+    """Return True if any payment against the order has been captured."""
+    payments = client.order.payments(order_id)
+    for payment in payments.get('items', []):
+        if payment['status'] == 'captured':  # Payment successful
+            return True
+    return False
+
+
+class PaymentPoller:
+    """Process-wide poller and status cache for pending Razorpay orders.
+
+    `client_factory` is called on the poller thread to obtain the Razorpay
+    client, so the client can be swapped (or pointed at a local fake) without
+    restarting the poller.
+    """
+
+    def __init__(self, client_factory, initial_delay=2.0, max_delay=30.0,
+                 backoff=1.5, order_ttl=30 * 60, retention=60 * 60):
+        self.client_factory = client_factory
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.order_ttl = order_ttl
+        self.retention = retention
+
+        self._cond = threading.Condition()
+        self._status = {}     # order_id -> (status, updated_at)
+        self._schedule = {}   # order_id -> [next_delay, deadline]
+        self._queue = []      # heap of (due, order_id)
+        self._thread = None
+
+    # --- public API, safe to call from any script thread ---
+
+    def watch(self, order_id):
+        """Start polling `order_id` unless it is already known."""
+        with self._cond:
+            if order_id in self._status:
+                return
+            now = time.monotonic()
+            self._status[order_id] = (STATUS_PENDING, now)
+            self._schedule[order_id] = [self.initial_delay, now + self.order_ttl]
+            heapq.heappush(self._queue, (now, order_id))
+            self._ensure_thread()
+            self._cond.notify()
+
+    def status(self, order_id):
+        entry = self._status.get(order_id)
+        return entry[0] if entry else None
+
+    def is_captured(self, order_id):
+        return self.status(order_id) == STATUS_CAPTURED
+
+    # --- poller thread ---
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="razorpay-poller", daemon=True)
+            self._thread.start()
+
+    def _finish(self, order_id, status, now):
+        self._status[order_id] = (status, now)
+        self._schedule.pop(order_id, None)
+
+    def _prune(self, now):
+        expired = [
+            order_id for order_id, (status, updated_at) in self._status.items()
+            if status != STATUS_PENDING and now - updated_at > self.retention
+        ]
+        for order_id in expired:
+            del self._status[order_id]
+
+    def _next_due(self):
+        """Block until an order is due and return it (lock must be held)."""
+        while True:
+            while not self._queue:
+                self._cond.wait()
+            due, order_id = self._queue[0]
+            wait = due - time.monotonic()
+            if wait > 0:
+                self._cond.wait(wait)
+                continue
+            heapq.heappop(self._queue)
+            if order_id in self._schedule:
+                return order_id
+
+    def _run(self):
+        while True:
+            with self._cond:
+                order_id = self._next_due()
+
+            try:
+                with metrics.timed("razorpay.poll"):
+                    captured = check_razorpay_payment_status(self.client_factory(), order_id)
+            except Exception as e:
+                print(f"Error checking payment status: {e}")
+                captured = False
+
+            with self._cond:
+                now = time.monotonic()
+                schedule = self._schedule[order_id]
+                if captured:
+                    self._finish(order_id, STATUS_CAPTURED, now)
+                elif now >= schedule[1]:
+                    self._finish(order_id, STATUS_EXPIRED, now)
+                else:
+                    delay = schedule[0]
+                    schedule[0] = min(delay * self.backoff, self.max_delay)
+                    heapq.heappush(self._queue, (now + delay, order_id))
+                self._prune(now)
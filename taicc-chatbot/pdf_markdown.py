@@ -0,0 +1,432 @@
+"""Streaming markdown layout for the PDF report.
+
+The report markdown is tokenized in a single pass over its lines into blocks
+(headings, paragraphs, bullet and numbered items, tables and rules), and each
+block is laid out as soon as it is complete. Lines are broken here from
+cached word widths and drawn with one FPDF `cell()` per bold or italic run;
+list items get hanging indents, and table rows are boxed with `rect()` in
+columns measured up front. Work is proportional to the length of the report.
+
+Text is set in DejaVu Sans, the Unicode TTF font bundled with matplotlib, so
+₹ and accented names print as written. Scripts DejaVu lacks fall back to a
+system Noto Sans Devanagari (e.g. Debian's `fonts-noto-core`), or to the TTF
+files listed comma-separated in `PDF_FALLBACK_FONTS`; with neither, a warning
+is printed when the fonts are first located and Devanagari text is dropped.
+If no TTF font can be loaded, text falls back to Helvetica and latin-1.
+
+    python pdf_markdown.py --bench --words 10000
+"""
+import functools
+import os
+import re
+import sys
+import time
+
+import resources
+
+HEADING = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)[\s#]*$")
+RULE = re.compile(r"^\s{0,3}([-*_])(?:\s*\1){2,}\s*$")
+BULLET = re.compile(r"^(\s*)[-*+•]\s+(.*)$")
+NUMBERED = re.compile(r"^(\s*)(\d+)[.)]\s+(.*)$")
+TABLE_ROW = re.compile(r"^\s*\|(.*?)\|?\s*$")
+TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$")
+INLINE = re.compile(
+    r"\*\*(?P<bold>.+?)\*\*"
+    r"|(?<![\w*])\*(?P<star>[^*\s](?:[^*]*[^*\s])?)\*(?![\w*])"
+    r"|(?<!\w)_(?P<under>[^_\s](?:[^_]*[^_\s])?)_(?!\w)"
+    r"|`(?P<code>[^`]+)`"
+    r"|\[(?P<link>[^\]]+)\]\([^)]*\)"
+)
+
+FONT_FAMILY = "DejaVu"
+FONT_FILES = {
+    "": "DejaVuSans.ttf",
+    "B": "DejaVuSans-Bold.ttf",
+    "I": "DejaVuSans-Oblique.ttf",
+    "BI": "DejaVuSans-BoldOblique.ttf",
+}
+BODY_SIZE = 11
+LINE_HEIGHT = 6
+HEADING_SIZES = {1: 16, 2: 14, 3: 12}
+LIST_INDENT = 6
+# Searched recursively for a Devanagari font when PDF_FALLBACK_FONTS is unset
+SYSTEM_FONT_DIRS = ("/usr/share/fonts", "/usr/local/share/fonts", "~/.local/share/fonts", "~/.fonts",
+                    "/Library/Fonts", "~/Library/Fonts")
+DEVANAGARI_FONT_FILES = ("NotoSansDevanagari-Regular.ttf", "NotoSansDevanagariUI-Regular.ttf")
+
+
+# -----------------------------
+# --- TOKENIZER ---
+# -----------------------------
+def _split_row(line):
+    return [cell.strip() for cell in TABLE_ROW.match(line).group(1).split("|")]
+
+
+def iter_blocks(lines):
+    """Yield layout blocks from markdown lines in one pass.
+
+    Blocks are `("heading", level, text)`, `("paragraph", text)`,
+    `("bullet", depth, text)`, `("numbered", depth, number, text)`,
+    `("table", rows)` and `("rule",)`.
+    """
+    paragraph, table = [], []
+
+    def flush():
+        if paragraph:
+            yield ("paragraph", " ".join(paragraph))
+            paragraph.clear()
+        if table:
+            yield ("table", list(table))
+            table.clear()
+
+    for line in lines:
+        line = line.rstrip("\n")
+        if TABLE_ROW.match(line):
+            if paragraph:
+                yield from flush()
+            if not TABLE_SEPARATOR.match(line):
+                table.append(_split_row(line))
+            continue
+        if table:
+            yield from flush()
+        if not line.strip():
+            yield from flush()
+            continue
+        match = HEADING.match(line)
+        if match:
+            yield from flush()
+            yield ("heading", len(match.group(1)), match.group(2))
+            continue
+        if RULE.match(line):
+            yield from flush()
+            yield ("rule",)
+            continue
+        match = BULLET.match(line)
+        if match:
+            yield from flush()
+            yield ("bullet", len(match.group(1).expandtabs(4)) // 2, match.group(2))
+            continue
+        match = NUMBERED.match(line)
+        if match:
+            yield from flush()
+            yield ("numbered", len(match.group(1).expandtabs(4)) // 2, match.group(2), match.group(3))
+            continue
+        paragraph.append(line.strip())
+    yield from flush()
+
+
+def inline_runs(text):
+    """Split inline markdown into `(style, text)` runs; style is "", "B" or "I"."""
+    runs, pos = [], 0
+    for match in INLINE.finditer(text):
+        if match.start() > pos:
+            runs.append(("", text[pos:match.start()]))
+        if match.group("bold") is not None:
+            runs.append(("B", match.group("bold")))
+        elif match.group("star") is not None or match.group("under") is not None:
+            runs.append(("I", match.group("star") or match.group("under")))
+        else:
+            runs.append(("", match.group("code") or match.group("link")))
+        pos = match.end()
+    if pos < len(text):
+        runs.append(("", text[pos:]))
+    return runs
+
+
+def plain_text(text):
+    return "".join(run for _, run in inline_runs(text))
+
+
+# -----------------------------
+# --- FONTS ---
+# -----------------------------
+@functools.lru_cache(maxsize=None)
+def font_paths():
+    """Paths of the DejaVu styles bundled with matplotlib, or None if missing."""
+    import matplotlib
+    directory = os.path.join(matplotlib.get_data_path(), "fonts", "ttf")
+    paths = {style: os.path.join(directory, name) for style, name in FONT_FILES.items()}
+    return paths if all(os.path.exists(p) for p in paths.values()) else None
+
+
+def find_system_font(names, directories=SYSTEM_FONT_DIRS):
+    """The first installed font file with one of `names`, in order of preference."""
+    found = {}
+    for directory in directories:
+        for root, _, files in os.walk(os.path.expanduser(directory)):
+            for name in names:
+                if name in files:
+                    found.setdefault(name, os.path.join(root, name))
+    return next((found[name] for name in names if name in found), None)
+
+
+@functools.lru_cache(maxsize=None)
+def fallback_font_paths():
+    """TTF files for scripts DejaVu lacks: `PDF_FALLBACK_FONTS`, else a system Devanagari font."""
+    configured = resources.get_secret("PDF_FALLBACK_FONTS")
+    if configured:
+        paths = [p.strip() for p in configured.split(",") if p.strip()]
+        for path in paths:
+            if not os.path.exists(path):
+                print(f"PDF fallback font not found: {path}")
+        return tuple(p for p in paths if os.path.exists(p))
+    path = find_system_font(DEVANAGARI_FONT_FILES)
+    if path is None:
+        print("No Noto Sans Devanagari font found, so PDF reports will drop Devanagari text. "
+              "Install one (e.g. fonts-noto-core) or list TTF files in PDF_FALLBACK_FONTS.")
+        return ()
+    return (path,)
+
+
+def _latin1(text):
+    return text.encode("latin-1", errors="replace").decode("latin-1")
+
+
+class MarkdownLayout:
+    """Lays out markdown blocks on an FPDF document at the current position.
+
+    Lines are broken here rather than by FPDF: each word is measured once per
+    font and size, lines are filled greedily from those widths, and every
+    finished line is drawn with one `cell()` per style run.
+    """
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self._registered = set()
+        self._widths = {}
+        self.unicode = font_paths() is not None
+        self.family = FONT_FAMILY if self.unicode else "Helvetica"
+        if self.unicode:
+            fallbacks = []
+            for i, path in enumerate(fallback_font_paths()):
+                pdf.add_font(f"Fallback{i}", "", path)
+                fallbacks.append(f"Fallback{i}")
+            if fallbacks:
+                self._use_style("")
+                pdf.set_fallback_fonts(fallbacks)
+
+    def _use_style(self, style):
+        # Styles are registered on first use; each embedded font adds to output time
+        if self.unicode and style not in self._registered:
+            self.pdf.add_font(FONT_FAMILY, style, font_paths()[style])
+            self._registered.add(style)
+
+    def set_font(self, style="", size=BODY_SIZE):
+        self._use_style(style)
+        self.pdf.set_font(self.family, style, size)
+
+    def text(self, text):
+        return text if self.unicode else _latin1(text)
+
+    # --- measuring and line breaking ---
+
+    def width(self, style, size, text):
+        key = (style, size, text)
+        width = self._widths.get(key)
+        if width is None:
+            self.set_font(style, size)
+            width = self._widths[key] = self.pdf.get_string_width(text)
+        return width
+
+    def _words(self, runs, size):
+        """Unbreakable units as `(segments, width, trailing space width)`.
+
+        A unit is a word with its trailing space; touching runs such as
+        "**bold**," stay in one unit so punctuation never starts a line.
+        """
+        unit, glued = None, False
+        for style, text in runs:
+            for piece in re.finditer(r"(\s*)(\S+)(\s*)", self.text(text)):
+                lead, word, trail = piece.groups()
+                if unit and glued and lead:
+                    # The space came at the start of this run, not the end of the last
+                    unit = (unit[0], unit[1], self.width(unit[0][-1][0], size, " "))
+                if unit and glued and not lead:
+                    segments, width, _ = unit
+                    segments.append((style, word))
+                    width += self.width(style, size, word)
+                else:
+                    if unit:
+                        yield unit
+                    segments, width = [(style, word)], self.width(style, size, word)
+                space = self.width(style, size, " ") if trail else 0.0
+                unit, glued = (segments, width, space), not trail
+        if unit:
+            yield unit
+
+    def _lines(self, runs, size, available):
+        """Greedily fill lines; yields lists of `(style, text)` segments."""
+        line, used = [], 0.0
+        for segments, width, space in self._words(runs, size):
+            if line and used + width > available:
+                yield line
+                line, used = [], 0.0
+            for style, word in segments:
+                if line and line[-1][0] == style:
+                    line[-1] = (style, line[-1][1] + word)
+                else:
+                    line.append((style, word))
+            used += width
+            if space:
+                line[-1] = (line[-1][0], line[-1][1] + " ")
+                used += space
+        if line:
+            yield line
+
+    def _draw_line(self, x, segments, size, height):
+        pdf = self.pdf
+        pdf.set_x(x)
+        for style, text in segments:
+            self.set_font(style, size)
+            pdf.cell(self.width(style, size, text), height, text)
+
+    def _flow(self, runs, size=BODY_SIZE, indent=0.0, height=LINE_HEIGHT):
+        pdf = self.pdf
+        x = pdf.l_margin + indent
+        available = pdf.w - pdf.r_margin - x - 2 * pdf.c_margin
+        for segments in self._lines(runs, size, available):
+            self._draw_line(x, segments, size, height)
+            pdf.ln(height)
+
+    # --- blocks ---
+
+    def render(self, markdown):
+        for block in iter_blocks(markdown.splitlines()):
+            getattr(self, "_" + block[0])(*block[1:])
+        self.pdf.set_x(self.pdf.l_margin)
+
+    def _heading(self, level, text):
+        size = HEADING_SIZES.get(level, BODY_SIZE)
+        self.pdf.ln(3 if level > 2 else 5)
+        self._flow([("B", plain_text(text))], size, height=size * 0.5)
+        self.pdf.ln(1)
+
+    def _paragraph(self, text):
+        self._flow(inline_runs(text))
+        self.pdf.ln(2)
+
+    def _list_item(self, depth, label, text):
+        pdf = self.pdf
+        indent = LIST_INDENT * (depth + 1)
+        # The label sits in the gutter; wrapped lines hang at the indent
+        self.set_font()
+        pdf.set_x(pdf.l_margin + indent - LIST_INDENT)
+        pdf.cell(LIST_INDENT, LINE_HEIGHT, self.text(label))
+        self._flow(inline_runs(text), indent=indent)
+        pdf.ln(1)
+
+    def _bullet(self, depth, text):
+        self._list_item(depth, "•" if self.unicode else "-", text)
+
+    def _numbered(self, depth, number, text):
+        self._list_item(depth, f"{number}.", text)
+
+    def _rule(self):
+        pdf = self.pdf
+        pdf.ln(2)
+        pdf.line(pdf.l_margin, pdf.get_y(), pdf.w - pdf.r_margin, pdf.get_y())
+        pdf.ln(3)
+
+    def _table(self, rows):
+        pdf = self.pdf
+        size = BODY_SIZE - 1
+        columns = max(len(row) for row in rows)
+        rows = [[plain_text(c) for c in row] + [""] * (columns - len(row)) for row in rows]
+        styles = ["B"] + [""] * (len(rows) - 1)
+
+        # Column widths in proportion to each column's widest cell, with a floor
+        padding = 2 * pdf.c_margin
+        natural = [0.0] * columns
+        for style, row in zip(styles, rows):
+            for i, cell in enumerate(row):
+                natural[i] = max(natural[i], self.width(style, size, self.text(cell)) + padding)
+        available = pdf.w - pdf.l_margin - pdf.r_margin
+        natural = [max(w, available / columns / 3) for w in natural]
+        scale = min(1.0, available / sum(natural))
+        col_widths = [w * scale for w in natural]
+
+        pdf.ln(1)
+        pdf.set_fill_color(230, 230, 230)
+        for style, row in zip(styles, rows):
+            cells = [list(self._lines([(style, cell)], size, w - padding)) for cell, w in zip(row, col_widths)]
+            row_height = max(1, max(len(lines) for lines in cells)) * LINE_HEIGHT
+            if pdf.will_page_break(row_height):
+                pdf.add_page()
+            x, y = pdf.l_margin, pdf.get_y()
+            for lines, w in zip(cells, col_widths):
+                pdf.rect(x, y, w, row_height, style="DF" if style else "D")
+                pdf.set_y(y)
+                for segments in lines:
+                    self._draw_line(x, segments, size, LINE_HEIGHT)
+                    pdf.ln(LINE_HEIGHT)
+                x += w
+            pdf.set_xy(pdf.l_margin, y + row_height)
+        pdf.ln(3)
+
+
+# -----------------------------
+# --- BENCHMARK ---
+# -----------------------------
+def _legacy_clean(text):
+    # The pre-layout-engine path: strip all markup, then one multi_cell
+    text = re.sub(r'[\*\#\_`>~-]+', '', text)
+    text = re.sub(r'\[[^\]]*\]\([^\)]*\)', '', text)
+    text = re.sub(r'\n\s*\n+', '\n\n', text)
+    text = re.sub(r'^\s+|\s+$', '', text)
+    text = re.sub(r'\s{2,}', ' ', text)
+    text = re.sub(r'(\d+\.)', r'\n\n\1', text)
+    return text.strip()
+
+
+def _legacy_pdf(markdown):
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=12)
+    pdf.multi_cell(0, 8, _latin1(_legacy_clean(markdown)))
+    return pdf.pages_count, bytes(pdf.output())
+
+
+def _layout_pdf(markdown):
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    MarkdownLayout(pdf).render(markdown)
+    return pdf.pages_count, bytes(pdf.output())
+
+
+def synthetic_report(words):
+    """Markdown with the report's structure repeated to about `words` words."""
+    import fakes
+    section = fakes.FAKE_REPORT
+    per_section = len(section.split())
+    return "\n".join(section for _ in range(max(1, words // per_section)))
+
+
+def benchmark(words, repeat=3):
+    markdown = synthetic_report(words)
+    print(f"{len(markdown.split())} words, {len(markdown)} characters")
+    print(f"{'path':<10} {'seconds':>8} {'pages':>6} {'bytes':>9}")
+    for name, render in (("legacy", _legacy_pdf), ("layout", _layout_pdf)):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            pages, data = render(markdown)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:<10} {best:>8.3f} {pages:>6} {len(data):>9}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the markdown PDF layout.")
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--words", type=int, default=10000)
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.words)
+    else:
+        parser.print_help()
+        sys.exit(1)
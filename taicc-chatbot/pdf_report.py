@@ -0,0 +1,236 @@
+"""In-memory PDF rendering for the assessment report.
+
+Branding assets (the logo and its faded watermark) are downloaded and
+pre-processed once per process. Charts are rendered straight to PNG bytes and
+cached by their input data, and every image reaches FPDF as an in-memory
+buffer, so nothing is written to the working directory or the temp folder.
+
+fpdf, matplotlib and PIL are imported on first use rather than at import
+time, so the login and question pages never pay for them. The report text
+keeps its markdown structure; `pdf_markdown` lays it out in a Unicode font.
+"""
+import functools
+import re
+from io import BytesIO
+
+import metrics
+import pdf_markdown
+import resources
+
+LOGO_URL = "https://i.postimg.cc/441ZWPjs/Whats-App-Image-2025-02-20-at-11-29-36.jpg"
+CHART_CACHE_SIZE = 256
+
+
+# -----------------------------
+# --- BRANDING ---
+# -----------------------------
+def _load_branding():
+    """Fetch the logo once (or read `LOGO_PATH`) and pre-render the watermark."""
+    logo_path = resources.get_secret("LOGO_PATH")
+    if logo_path:
+        with open(logo_path, "rb") as f:
+            content = f.read()
+    else:
+        with metrics.timed("logo.download"):
+            response = resources.get_http_session().get(LOGO_URL, timeout=5)
+            response.raise_for_status()
+        content = response.content
+    from PIL import Image
+    logo_image = Image.open(BytesIO(content))
+    logo_image.load()
+
+    watermark = logo_image.convert("RGBA").resize((100, 100))
+    alpha = watermark.split()[3].point(lambda p: p * 0.1)
+    watermark.putalpha(alpha)
+    return {"logo": _png_bytes(logo_image), "watermark": _png_bytes(watermark)}
+
+
+def _png_bytes(image):
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+# A failed download leaves the resource unbuilt, so the next report retries
+branding = resources.LazyResource("branding", _load_branding)
+
+
+def get_branding():
+    """The branding images as PNG bytes, or None if the logo is unavailable."""
+    try:
+        return branding.get()
+    except Exception as e:
+        print(f"Could not load the report logo, continuing without it: {e}")
+        return None
+
+
+# -----------------------------
+# --- CHARTS ---
+# -----------------------------
+# Charts use the object-oriented Figure API rather than pyplot, whose global
+# state is not safe to share between pipeline worker threads. Each renderer
+# takes hashable items so identical inputs are served from the cache.
+def _figure(figsize):
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
+def _figure_png(fig):
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+@metrics.instrument("chart.bar")
+def _bar_chart(items):
+    fig = _figure((6, 3))
+    ax = fig.subplots()
+    ax.bar([k for k, _ in items], [v for _, v in items], color='skyblue')
+    ax.set_title("AI Scores by Section")
+    ax.set_ylim(0, 5)
+    fig.tight_layout()
+    return _figure_png(fig)
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+@metrics.instrument("chart.pie")
+def _pie_chart(items):
+    fig = _figure((5, 5))
+    ax = fig.subplots()
+    ax.pie([v for _, v in items], labels=[k for k, _ in items], autopct='%1.1f%%')
+    ax.set_title("Tier Distribution")
+    return _figure_png(fig)
+
+@functools.lru_cache(maxsize=CHART_CACHE_SIZE)
+@metrics.instrument("chart.line")
+def _line_chart(items):
+    fig = _figure((6, 3))
+    ax = fig.subplots()
+    ax.plot([k for k, _ in items], [v for _, v in items], marker='o', linestyle='-')
+    ax.set_title("AI Readiness Score Trend")
+    ax.set_ylim(0, 5)
+    fig.tight_layout()
+    return _figure_png(fig)
+
+metrics.lru_cache_gauge("taicc_chart_cache_hit_ratio", "Share of charts served from the render cache.",
+                        _bar_chart, _pie_chart, _line_chart)
+
+def generate_bar_chart(scores):
+    return _bar_chart(tuple(scores.items()))
+
+def generate_pie_chart(tier_dist):
+    return _pie_chart(tuple(tier_dist.items()))
+
+def generate_line_chart(score_trend):
+    return _line_chart(tuple(score_trend.items()))
+
+def render_charts(scores, tier_distribution, score_trend):
+    """PNG bytes for each chart in the report."""
+    return {
+        "bar": generate_bar_chart(scores),
+        "pie": generate_pie_chart(tier_distribution),
+        "line": generate_line_chart(score_trend),
+    }
+
+
+def warm_up():
+    """Load branding, locate the report fonts and prime matplotlib's caches."""
+    get_branding()
+    pdf_markdown.font_paths()
+    pdf_markdown.fallback_font_paths()
+    _figure_png(_figure((1, 1)))
+
+
+# -----------------------------
+# --- PDF LAYOUT ---
+# -----------------------------
+EXECUTIVE_SUMMARY = re.compile(r"^\s*(?:(#{1,6})\s*)?(?:\*\*)?\s*(?:\d+\.\s*)?Executive Summary\W*$", re.M | re.I)
+# A markdown heading (group 1: its #s, group 2: set if numbered) or a numbered section
+SECTION_START = re.compile(r"^\s*(?:(#{1,6})\s+(?:\*\*)?\s*(\d+\.)?|\*\*\s*\d+\.|\d+\.\s)", re.M)
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def split_report(full_report_text):
+    """Split the report markdown into its executive summary and the detailed remainder.
+
+    The summary is everything under the "Executive Summary" heading up to the
+    next numbered section or heading of the same or a higher level, so its own
+    subheadings stay in it; without that heading it is the first paragraphs,
+    up to about 500 characters.
+    """
+    heading = EXECUTIVE_SUMMARY.search(full_report_text)
+    if heading:
+        # A summary that is not a markdown heading ends at any heading
+        level = len(heading.group(1)) if heading.group(1) else 6
+        for detailed in SECTION_START.finditer(full_report_text, heading.end()):
+            hashes, numbered = detailed.group(1), detailed.group(2)
+            if hashes is None or numbered or len(hashes) <= level:
+                return (full_report_text[heading.end():detailed.start()].strip(),
+                        full_report_text[detailed.start():].strip())
+    paragraph_end = PARAGRAPH_BREAK.search(full_report_text, min(500, len(full_report_text)))
+    split_at = paragraph_end.start() if paragraph_end else len(full_report_text)
+    return full_report_text[:split_at].strip(), full_report_text[split_at:].strip()
+
+
+@metrics.instrument("pdf.build")
+def build_pdf(user_data, full_report_text, maturity, charts):
+    """Lay out the full report and return the PDF bytes."""
+    executive_summary, detailed_report = split_report(full_report_text)
+    assets = get_branding()
+    full_width = {"new_x": "LMARGIN", "new_y": "NEXT"}
+
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    # Logo and title block
+    if assets:
+        pdf.image(BytesIO(assets["logo"]), x=10, y=8, w=40)
+
+    layout = pdf_markdown.MarkdownLayout(pdf)
+    layout.set_font('B', 16)
+    pdf.cell(0, 10, "TAICC AI Readiness Assessment Report", align="C", **full_width)
+    pdf.ln(15)
+
+    # Watermark image
+    if assets:
+        pdf.image(BytesIO(assets["watermark"]), x=60, y=100, w=90)
+
+    # User info block
+    layout.set_font(size=12)
+    pdf.cell(0, 8, "User Details:", **full_width)
+    for k, v in user_data.items():
+        pdf.cell(0, 8, layout.text(f"{k}: {v}"), **full_width)
+    pdf.ln(5)
+    pdf.cell(0, 8, layout.text(f"AI Maturity Level: {maturity}"), **full_width)
+    pdf.ln(10)
+
+    # Executive Summary Section
+    layout.set_font('B', 14)
+    pdf.cell(0, 10, "Executive Summary", **full_width)
+    layout.render(executive_summary)
+
+    # Add bar chart after executive summary
+    pdf.ln(10)
+    pdf.image(BytesIO(charts["bar"]), x=pdf.l_margin, w=pdf.w - 2*pdf.l_margin)
+
+    # Detailed Report Section
+    pdf.ln(20)
+    layout.set_font('B', 14)
+    pdf.cell(0, 10, "Detailed Report", **full_width)
+    layout.render(detailed_report)
+
+    # Insert pie chart after detailed report
+    pdf.ln(10)
+    pdf.image(BytesIO(charts["pie"]), x=pdf.l_margin, w=pdf.w - 2*pdf.l_margin)
+
+    # Insert line chart last
+    pdf.ln(20)
+    pdf.image(BytesIO(charts["line"]), x=pdf.l_margin, w=pdf.w - 2*pdf.l_margin)
+
+    # Footer
+    pdf.ln(10)
+    layout.set_font('I', 10)
+    pdf.cell(0, 10, "Report generated by TAICC AI Readiness Assessment Tool", align="C", **full_width)
+
+    with metrics.timed("pdf.output"):
+        return bytes(pdf.output())
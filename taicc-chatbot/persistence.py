@@ -0,0 +1,187 @@
+"""Write-behind persistence of assessment results to Google Sheets.
+
+Results are first written to a local append-only SQLite journal keyed by the
+submission ID, which makes the write idempotent: repeated reruns of the
+results page for the same submission add nothing. A background flusher then
+ships pending rows to the sheet in batches with `append_rows`, backing off
+exponentially while Sheets is unavailable or rate-limiting, so a Sheets outage
+never adds latency to, or loses, a user's result.
+
+Flushers in several processes may share one journal; each claims a batch with
+a short lease before sending it.
+
+An append that fails may still have reached the sheet (e.g. a timeout after
+Sheets committed the rows), so appends are never retried blindly. Before a
+batch is sent again, the sheet's submission ID column is read and rows
+already there are marked flushed instead of being appended twice.
+"""
+import functools
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+import metrics
+import resources
+from analytics import ROW_SUBMISSION_ID
+
+BATCH_SIZE = 50
+FLUSH_INTERVAL = 2.0
+MAX_BACKOFF = 5 * 60
+CLAIM_LEASE = 2 * 60
+
+
+class SubmissionJournal:
+
+    def __init__(self, path, sheet_call=None, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, max_backoff=MAX_BACKOFF):
+        self.path = path
+        # sheet_call(fn) runs fn(worksheet) once; defaults to the shared lazy sheet
+        self.sheet_call = sheet_call or (lambda fn: resources.sheet.call(fn, retries=0))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.owner = uuid.uuid4().hex
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS submissions ("
+                " submission_id TEXT PRIMARY KEY,"
+                " row TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " flushed_at REAL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " claimed_by TEXT,"
+                " claimed_until REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS submissions_pending ON submissions (flushed_at, created_at)"
+            )
+
+    def enqueue(self, submission_id, row):
+        """Journal a row once per submission; returns False if already journaled."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO submissions (submission_id, row, created_at) VALUES (?, ?, ?)",
+                (submission_id, json.dumps(row), time.time()),
+            )
+        self._ensure_flusher()
+        self._wake.set()
+        return cursor.rowcount == 1
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM submissions WHERE flushed_at IS NULL").fetchone()[0]
+
+    def is_flushed(self, submission_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT flushed_at FROM submissions WHERE submission_id = ?", (submission_id,)).fetchone()
+        return bool(row and row[0])
+
+    # --- flusher ---
+
+    def _ensure_flusher(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sheets-flusher", daemon=True)
+                self._thread.start()
+
+    def _claim_batch(self):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE submissions SET claimed_by = ?, claimed_until = ?, attempts = attempts + 1"
+                    " WHERE submission_id IN ("
+                    "  SELECT submission_id FROM submissions"
+                    "  WHERE flushed_at IS NULL AND (claimed_until IS NULL OR claimed_until < ?)"
+                    "  ORDER BY created_at LIMIT ?)",
+                    (self.owner, now + CLAIM_LEASE, now, self.batch_size),
+                )
+                rows = self._conn.execute(
+                    "SELECT submission_id, row, attempts FROM submissions"
+                    " WHERE claimed_by = ? AND flushed_at IS NULL AND claimed_until > ?"
+                    " ORDER BY created_at",
+                    (self.owner, now),
+                ).fetchall()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(sid, json.loads(row), attempts) for sid, row, attempts in rows]
+
+    def _mark(self, submission_ids, flushed):
+        placeholders = ",".join("?" * len(submission_ids))
+        flushed_at = time.time() if flushed else None
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE submissions SET flushed_at = ?, claimed_by = NULL, claimed_until = NULL"
+                f" WHERE submission_id IN ({placeholders})",
+                (flushed_at, *submission_ids),
+            )
+
+    def _already_in_sheet(self, submission_ids):
+        column = self.sheet_call(lambda ws: ws.col_values(ROW_SUBMISSION_ID + 1))
+        return set(submission_ids) & set(column)
+
+    def flush_once(self):
+        """Ship one batch to the sheet; returns the number of rows sent."""
+        batch = self._claim_batch()
+        if not batch:
+            return 0
+        ids = [sid for sid, _, _ in batch]
+        try:
+            if any(attempts > 1 for _, _, attempts in batch):
+                # An earlier attempt may have landed even though it reported failure
+                present = self._already_in_sheet(ids)
+                if present:
+                    self._mark(sorted(present), flushed=True)
+                    batch = [entry for entry in batch if entry[0] not in present]
+                    ids = [sid for sid, _, _ in batch]
+                    if not batch:
+                        return 0
+            with metrics.timed("sheets.append"):
+                self.sheet_call(lambda ws: ws.append_rows([row for _, row, _ in batch]))
+        except Exception:
+            self._mark(ids, flushed=False)
+            raise
+        self._mark(ids, flushed=True)
+        return len(batch)
+
+    def _run(self):
+        backoff = self.flush_interval
+        while True:
+            try:
+                sent = self.flush_once()
+                self.last_error = None
+                backoff = self.flush_interval
+                if sent == self.batch_size:
+                    continue  # more may be waiting
+            except Exception as e:
+                self.last_error = e
+                print(f"Could not flush results to Google Sheets, retrying in {backoff:.0f}s: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def get_submission_journal():
+    """The process-wide journal; its flusher also ships rows left by earlier runs."""
+    journal = SubmissionJournal(resources.data_path("submissions.sqlite3"))
+    journal._ensure_flusher()
+    metrics.gauge("taicc_journal_pending_rows", "Results waiting to be flushed to Google Sheets.",
+                  lambda: {"": journal.pending_count()})
+    return journal
@@ -0,0 +1,156 @@
+"""Background results pipeline.
+
+When a user submits an assessment, the results page hands the slow work (the
+Gemini report, chart rendering, PDF layout and saving to Google Sheets) to a
+process-wide thread pool as one job per submission ID. Tasks without
+dependencies start immediately and run concurrently; a task with dependencies
+is queued only once they have finished, so waiting tasks never hold a worker.
+
+Submitting the same submission ID again returns the existing job, so Streamlit
+reruns only read finished artifacts and never repeat the work.
+
+A task can name a pool of its own. Report tasks that hold a place in the LLM
+gateway queue run on `REPORT_POOL`, which has a thread for every call the
+gateway lets run or wait, so they start at once and never hold up charts and
+persistence on the shared pool.
+"""
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import metrics
+from llm_gateway import get_llm_gateway
+
+TASK_PENDING = "pending"
+TASK_RUNNING = "running"
+TASK_DONE = "done"
+TASK_FAILED = "failed"
+
+MAX_WORKERS = 8
+REPORT_POOL = "report"
+JOB_TTL = 2 * 60 * 60
+
+
+class Job:
+    """The tracked tasks and artifacts of one submission."""
+
+    def __init__(self, submission_id, context=None):
+        self.submission_id = submission_id
+        self.created_at = time.monotonic()
+        self.futures = {}
+        # Live objects the page may read while tasks run, e.g. a report stream
+        self.context = context or {}
+
+    def status(self, name):
+        future = self.futures[name]
+        if not future.done():
+            return TASK_RUNNING if future.running() else TASK_PENDING
+        return TASK_FAILED if future.exception() else TASK_DONE
+
+    def statuses(self):
+        return {name: self.status(name) for name in self.futures}
+
+    def done(self):
+        return all(f.done() for f in self.futures.values())
+
+    def result(self, name):
+        """The task's artifact, or None if it is unfinished or failed."""
+        future = self.futures[name]
+        if future.done() and not future.exception():
+            return future.result()
+        return None
+
+    def error(self, name):
+        future = self.futures[name]
+        return future.exception() if future.done() else None
+
+
+class ResultsPipeline:
+    """Runs each submission's tasks; `pools` maps extra pool names to their sizes."""
+
+    def __init__(self, max_workers=MAX_WORKERS, ttl=JOB_TTL, pools=None):
+        self.ttl = ttl
+        self._executors = {None: ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="results")}
+        for name, workers in (pools or {}).items():
+            self._executors[name] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"results-{name}")
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def get(self, submission_id):
+        return self._jobs.get(submission_id)
+
+    def submit(self, submission_id, tasks, context=None):
+        """Start (or return the running) job for `submission_id`.
+
+        `tasks` maps a task name to `(fn, deps)` or `(fn, deps, pool)`. `fn` is
+        called with the results of the tasks named in `deps`, which must be
+        declared earlier, on the named pool or else the shared one.
+        `context` is kept on the job only when the job is first created.
+        """
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(submission_id)
+            if job is not None:
+                return job
+            job = Job(submission_id, context)
+            for name, (fn, deps, *pool) in tasks.items():
+                self._schedule(job, name, fn, deps, self._executors[pool[0] if pool else None])
+            self._jobs[submission_id] = job
+            return job
+
+    def _evict(self):
+        now = time.monotonic()
+        stale = [sid for sid, job in self._jobs.items() if job.done() and now - job.created_at > self.ttl]
+        for sid in stale:
+            del self._jobs[sid]
+
+    def _schedule(self, job, name, fn, deps, executor):
+        fn = _traced(job.submission_id, name, fn)
+        if not deps:
+            job.futures[name] = executor.submit(fn)
+            return
+
+        placeholder = Future()
+        job.futures[name] = placeholder
+        dep_futures = [job.futures[d] for d in deps]
+        remaining = [len(dep_futures)]
+        lock = threading.Lock()
+
+        def copy_outcome(inner):
+            if inner.exception():
+                placeholder.set_exception(inner.exception())
+            else:
+                placeholder.set_result(inner.result())
+
+        def on_dep_done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            failed = next((f.exception() for f in dep_futures if f.exception()), None)
+            if not placeholder.set_running_or_notify_cancel():
+                return
+            if failed:
+                placeholder.set_exception(failed)
+                return
+            inner = executor.submit(fn, *[f.result() for f in dep_futures])
+            inner.add_done_callback(copy_outcome)
+
+        for f in dep_futures:
+            f.add_done_callback(on_dep_done)
+
+
+def _traced(submission_id, name, fn):
+    """Time the task and attribute the phases it runs to its submission."""
+    def run(*args):
+        with metrics.tracing(submission_id), metrics.timed(f"task.{name}"):
+            return fn(*args)
+    return run
+
+
+@functools.lru_cache(maxsize=None)
+def get_results_pipeline():
+    """The process-wide results pipeline, with a report pool sized to the LLM gateway."""
+    gateway = get_llm_gateway()
+    return ResultsPipeline(pools={REPORT_POOL: gateway.max_concurrency + gateway.max_queue})
@@ -0,0 +1,109 @@
+"""Offline pre-generation of the report library.
+
+The cacheable report prompt depends only on the domain, tier, score bucket and
+maturity label, and all four come from small fixed sets: the domains and
+tiers of `questions_full.json`, and the (bucket, maturity) pairs that real
+scores between 1 and 5 produce under `score_bucket()` and
+`determine_maturity()`. This job generates a body for every combination and
+stores it in the report library that `reports.py` serves from.
+
+Generation runs on a few threads through the process-wide `llm_gateway`, so
+it respects the same concurrency and rate limits as the app. Each body is
+committed as soon as it arrives. A rerun skips every slot whose body is
+current for today's prompt and model, so an interrupted job resumes, and
+after a prompt or model change only regenerates what changed.
+
+    python pregenerate.py --status
+    python pregenerate.py --workers 4
+    python pregenerate.py --domain Pharma --limit 10 --out /tmp/library.sqlite3
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import resources
+from question_bank import get_question_bank
+from report_cache import ReportLibrary
+from reports import REPORT_LIBRARY_PATH, build_prompt, cache_key, generate_body, score_bucket
+from scoring import determine_maturity, score_map
+
+WORKERS = 4
+# Offline jobs can wait much longer for a gateway slot than a user can
+QUEUE_TIMEOUT = 10 * 60
+SCORE_STEP = 0.01
+
+
+def score_slots():
+    """Every (score bucket, maturity) pair an average score can produce.
+
+    Each pair comes with a representative score inside it, for `build_prompt`.
+    """
+    low, high = min(score_map.values()), max(score_map.values())
+    slots = {}
+    for step in range(round(low / SCORE_STEP), round(high / SCORE_STEP) + 1):
+        score = step * SCORE_STEP
+        slots.setdefault((score_bucket(score), determine_maturity(score)), score)
+    return slots
+
+
+def combinations(domains=None):
+    """`(domain, tier, bucket, maturity, prompt, key)` for every library slot."""
+    bank = get_question_bank()
+    slots = score_slots()
+    for domain in bank.domains:
+        if domains and domain not in domains:
+            continue
+        for tier in bank.tiers:
+            for (bucket, maturity), score in slots.items():
+                prompt = build_prompt(domain, tier, score, maturity)
+                yield domain, tier, bucket, maturity, prompt, cache_key(prompt)
+
+
+def pregenerate(library, jobs, workers=WORKERS):
+    """Generate and store each job's body; returns `(generated, failed)`."""
+    generated, failed = 0, []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(generate_body, job[4], QUEUE_TIMEOUT): job for job in jobs}
+        for future in as_completed(futures):
+            domain, tier, bucket, maturity, _, key = futures[future]
+            try:
+                body = future.result()
+            except Exception as e:
+                failed.append((domain, tier, bucket, maturity, f"{type(e).__name__}: {e}"))
+                continue
+            library.put(domain, tier, bucket, maturity, key, resources.GEMINI_MODEL, body)
+            generated += 1
+            if generated % 25 == 0:
+                print(f"{generated}/{len(jobs)} generated in {time.perf_counter() - started:.0f}s")
+    return generated, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate report bodies for every domain, tier and score.")
+    parser.add_argument("--out", default=REPORT_LIBRARY_PATH, help="library file to create or resume")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="generations in flight")
+    parser.add_argument("--domain", action="append", help="only this domain (repeatable)")
+    parser.add_argument("--limit", type=int, help="generate at most this many bodies")
+    parser.add_argument("--status", action="store_true", help="count missing or outdated bodies and exit")
+    args = parser.parse_args(argv)
+
+    library = ReportLibrary(args.out)
+    current = library.keys()
+    slots = list(combinations(args.domain))
+    jobs = [job for job in slots if job[5] not in current]
+    print(f"{len(slots)} slots, {len(slots) - len(jobs)} current, {len(jobs)} to generate "
+          f"({len(library)} stored in {args.out})")
+    if args.status:
+        return 1 if jobs else 0
+
+    generated, failed = pregenerate(library, jobs[:args.limit], args.workers)
+    print(f"Generated {generated} bodies, {len(failed)} failed")
+    for domain, tier, bucket, maturity, error in failed[:10]:
+        print(f"  {domain} / {tier} / {bucket} / {maturity}: {error}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""Pre-indexed question bank, parsed and validated once per process.
+
+`questions_full.json` maps domain -> tier -> list of question strings. The bank
+flattens it into one tuple of interned question texts, so a question's ID is
+its position in that tuple, and indexes it by (domain, tier).
+
+An optional msgpack snapshot (`python question_bank.py --snapshot`) skips JSON
+parsing on cold start. It is only used while its recorded hash still matches
+the JSON file, and is silently ignored when msgpack is not installed.
+"""
+import functools
+import hashlib
+import json
+import os
+import sys
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+BASE_DIR = os.path.dirname(__file__)
+QUESTIONS_PATH = os.path.join(BASE_DIR, "questions_full.json")
+SNAPSHOT_PATH = os.path.join(BASE_DIR, "questions_full.msgpack")
+
+# Domain and Tier explanations, keyed exactly as in questions_full.json
+domain_explanations = {
+    "BFSI (Banking, NBFCs, Stock Broking,": "Banking, Financial Services, and Insurance including NBFCs, Co-op Banks, Stock Broking, and more.",
+    "Manufacturing (Automobiles, Textiles,": "Industries such as Automobiles, Textiles, and Machinery.",
+    "Healthcare (Hospitals, Clinics, Diagnostics,": "Hospitals, diagnostics, health-tech platforms, and telemedicine.",
+    "Hospitality": "Hotels, resorts, restaurants, and travel accommodations.",
+    "Pharma": "Pharmaceutical research, biotech, and medicine production.",
+    "Travel & Tourism": "Tour operators, online travel platforms, airlines, etc.",
+    "Education & EdTech": "Schools, universities, online learning platforms.",
+    "Retail & E-commerce": "Retail chains, marketplaces, and D2C brands.",
+    "Logistics & Supply Chain": "Warehousing, distribution, and delivery services.",
+    "Agritech": "Smart farming, agri-inputs, and precision agriculture.",
+    "IT & ITES (Information Technology & IT-Enabled Services)": "Software companies, IT services, and BPOs.",
+    "Legal & Compliance": "Law firms, compliance tools, and contract automation.",
+    "Energy & Utilities": "Power generation, oil & gas, renewables.",
+    "Telecommunications": "Network providers, internet services, and 5G tech.",
+    "Media & Entertainment": "Broadcasting, streaming platforms, and gaming.",
+    "FMCG & Consumer Goods": "Packaged goods and fast-moving consumer brands.",
+    "Public Sector / Government Services": "Government departments, PSUs, and public welfare.",
+    "Automotive": "OEMs, auto ancillaries, and connected vehicles.",
+    "Environmental & Sustainability": "Climate tech, carbon tracking, and ESG.",
+    "Transportation & Logistics": "Fleet operators, freight, public transit, and mobility services.",
+    "Food & Beverage": "Food processing, restaurant chains, and beverage brands.",
+    "Consumer Goods": "Durables, apparel, electronics, and household products.",
+    "Information Technology": "Technology product companies, SaaS, and digital platforms."
+}
+
+tier_explanations = {
+    "Tier 1": "Enterprise Leaders – Large organizations with significant AI investments and robust strategies.",
+    "Tier 2": "Strategic Innovators – Established companies actively experimenting and implementing AI.",
+    "Tier 3": "Growth Enablers – Mid-sized firms beginning structured AI adoption efforts.",
+    "Tier 4": "Agile Starters – Startups or small businesses with a high willingness to explore AI.",
+    "Tier 5": "Traditional Operators – Individuals or firms with minimal or no current AI engagement."
+}
+
+
+class QuestionBank:
+    """Immutable question index. A question ID is its position in `texts`."""
+
+    def __init__(self, domains, tiers, grid):
+        # grid[d][t] is the list of question strings for domains[d], tiers[t]
+        self.domains = tuple(sys.intern(d) for d in domains)
+        self.tiers = tuple(sys.intern(t) for t in tiers)
+        texts = []
+        index = {}
+        for domain, row in zip(self.domains, grid):
+            for tier, questions in zip(self.tiers, row):
+                start = len(texts)
+                texts.extend(sys.intern(q) for q in questions)
+                index[(domain, tier)] = tuple(enumerate(texts[start:], start))
+        self.texts = tuple(texts)
+        self._index = index
+
+    def __len__(self):
+        return len(self.texts)
+
+    def for_tier(self, domain, tier):
+        """Return `((question_id, text), ...)` for one domain and tier."""
+        return self._index[(domain, tier)]
+
+    def text(self, question_id):
+        return self.texts[question_id]
+
+
+def validate(raw):
+    """Check the parsed JSON and return `(domains, tiers, grid)`.
+
+    Raises ValueError listing every problem, including domains or tiers that
+    have no explanation and would otherwise show up as blank labels.
+    """
+    if not isinstance(raw, dict) or not raw:
+        raise ValueError("questions_full.json must be a non-empty object of domains")
+    domains = list(raw.keys())
+    tiers = list(next(iter(raw.values())).keys())
+    problems = []
+    grid = []
+    for domain in domains:
+        if list(raw[domain].keys()) != tiers:
+            problems.append(f"{domain!r} has tiers {list(raw[domain].keys())}, expected {tiers}")
+            continue
+        row = []
+        for tier in tiers:
+            questions = raw[domain][tier]
+            if not questions or not all(isinstance(q, str) and q.strip() for q in questions):
+                problems.append(f"{domain!r} / {tier!r} has missing or blank questions")
+            row.append(questions)
+        grid.append(row)
+    _raise_if(problems + _missing_explanations(domains, tiers))
+    return domains, tiers, grid
+
+
+def _missing_explanations(domains, tiers):
+    return ([f"no domain explanation for {d!r}" for d in domains if d not in domain_explanations]
+            + [f"no tier explanation for {t!r}" for t in tiers if t not in tier_explanations])
+
+
+def _raise_if(problems):
+    if problems:
+        raise ValueError("Invalid question bank:\n  " + "\n  ".join(problems))
+
+
+def _source_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _load_snapshot(source_hash, snapshot_path):
+    if msgpack is None or not os.path.exists(snapshot_path):
+        return None
+    try:
+        with open(snapshot_path, "rb") as f:
+            snapshot = msgpack.unpackb(f.read())
+    except Exception as e:
+        print(f"Ignoring unreadable question snapshot: {e}")
+        return None
+    if snapshot.get("source_sha256") != source_hash:
+        return None
+    return snapshot["domains"], snapshot["tiers"], snapshot["grid"]
+
+
+def load_question_bank(path=QUESTIONS_PATH, snapshot_path=SNAPSHOT_PATH):
+    with open(path, "rb") as f:
+        data = f.read()
+    parsed = _load_snapshot(_source_hash(data), snapshot_path)
+    if parsed is None:
+        parsed = validate(json.loads(data))
+    else:
+        _raise_if(_missing_explanations(parsed[0], parsed[1]))
+    return QuestionBank(*parsed)
+
+
+@functools.lru_cache(maxsize=None)
+def get_question_bank():
+    """The process-wide question bank."""
+    return load_question_bank()
+
+
+def write_snapshot(path=QUESTIONS_PATH, snapshot_path=SNAPSHOT_PATH):
+    if msgpack is None:
+        raise RuntimeError("msgpack is required to write a question bank snapshot")
+    with open(path, "rb") as f:
+        data = f.read()
+    domains, tiers, grid = validate(json.loads(data))
+    snapshot = {"source_sha256": _source_hash(data), "domains": domains, "tiers": tiers, "grid": grid}
+    with open(snapshot_path, "wb") as f:
+        f.write(msgpack.packb(snapshot))
+    return snapshot_path
+
+
+if __name__ == "__main__":
+    if "--snapshot" in sys.argv:
+        print(f"Wrote {write_snapshot()}")
+    else:
+        bank = load_question_bank()
+        print(f"{len(bank.domains)} domains x {len(bank.tiers)} tiers, {len(bank)} questions")
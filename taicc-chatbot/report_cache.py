@@ -0,0 +1,188 @@
+"""Pluggable caches for generated report bodies.
+
+Backends share a tiny interface: `get(key)` returns the cached string or None
+and `set(key, value)` stores it. `ReportCache` wraps any backend and counts
+hits and misses; `TieredCache` chains a fast in-memory LRU in front of the
+durable SQLite store.
+
+`ReportLibrary` is different: a file of pre-generated bodies, one per
+(domain, tier, score bucket, maturity) slot, written by `pregenerate.py` and
+shipped with the app.
+"""
+import collections
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class LRUCache:
+    """In-process LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize=512, ttl=24 * 60 * 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCache:
+    """On-disk cache shared by every process on the node."""
+
+    def __init__(self, path, ttl=30 * 24 * 60 * 60):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS reports ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM reports WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reports (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+
+
+class TieredCache:
+    """Look up backends in order and backfill the faster ones on a hit."""
+
+    def __init__(self, *backends):
+        self.backends = backends
+
+    def get(self, key):
+        for i, backend in enumerate(self.backends):
+            value = backend.get(key)
+            if value is not None:
+                for faster in self.backends[:i]:
+                    faster.set(key, value)
+                return value
+        return None
+
+    def set(self, key, value):
+        for backend in self.backends:
+            backend.set(key, value)
+
+
+class ReportCache:
+    """A cache backend plus hit/miss counters."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def get_or_create(self, key, create):
+        value = self.get(key)
+        if value is None:
+            value = create()
+            self.set(key, value)
+        return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class ReportLibrary:
+    """Pre-generated report bodies, one per (domain, tier, score bucket, maturity).
+
+    Each entry records the cache key it was generated under (a hash of the
+    model and prompt), so a reader can tell a current body from one written
+    for an older prompt or model. Bodies are stored zlib-compressed.
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self._lock = threading.Lock()
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS bodies ("
+                " domain TEXT NOT NULL, tier TEXT NOT NULL, score_bucket REAL NOT NULL,"
+                " maturity TEXT NOT NULL, key TEXT NOT NULL, model TEXT NOT NULL,"
+                " body BLOB NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (domain, tier, score_bucket, maturity))"
+            )
+            self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS bodies_key ON bodies (key)")
+
+    def lookup(self, domain, tier, score_bucket, maturity):
+        """`(body, key)` for the slot, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, key FROM bodies"
+                " WHERE domain = ? AND tier = ? AND score_bucket = ? AND maturity = ?",
+                (domain, tier, score_bucket, maturity),
+            ).fetchone()
+        return (zlib.decompress(row[0]).decode(), row[1]) if row else None
+
+    def keys(self):
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT key FROM bodies")}
+
+    def put(self, domain, tier, score_bucket, maturity, key, model, body):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO bodies"
+                " (domain, tier, score_bucket, maturity, key, model, body, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (domain, tier, score_bucket, maturity, key, model,
+                 zlib.compress(body.encode(), 9), time.time()),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM bodies").fetchone()[0]
@@ -0,0 +1,360 @@
+"""Gemini report generation with a content-addressed cache.
+
+The prompt is split in two. The cacheable part depends only on the domain,
+tier, a rounded score bucket and the maturity label, and asks the model to
+write placeholders instead of the client's details. The personalized fields
+(name, company, exact score, contact details) are filled in afterwards, so
+most users are served a cached body instead of a fresh generation.
+
+Before generating on a cache miss, the shipped report library (see
+`pregenerate.py`) is consulted for the same domain, tier, score bucket and
+maturity. Its body is served at once; if it was generated for an older prompt
+or model, a current one is generated in the background and cached for the
+next user.
+
+Gemini calls go through the process-wide `llm_gateway`. If a call is not
+admitted in time, times out or fails, the user gets a template report built
+from their maturity level instead; it is never cached, so the next request
+for the same bucket tries Gemini again. The reason is recorded on the
+`ReportStream` as `fallback`, so callers can tell a template report apart.
+"""
+import functools
+import hashlib
+import os
+import threading
+import time
+
+import metrics
+import resources
+from llm_gateway import GatewayRejected, LLMTimeout, get_llm_gateway
+from report_cache import LRUCache, ReportCache, ReportLibrary, SQLiteCache, TieredCache
+from scoring import maturity_descriptions, readiness_levels
+
+CLIENT_PLACEHOLDER = "[CLIENT_NAME]"
+COMPANY_PLACEHOLDER = "[COMPANY_NAME]"
+SCORE_PLACEHOLDER = "[SCORE]"
+
+# Scores are bucketed to the nearest half point for the cacheable prompt
+SCORE_BUCKET = 0.5
+REPORT_LIBRARY_PATH = os.path.join(resources.BASE_DIR, "report_library.sqlite3")
+
+REPORT_PROMPT = """
+    You are a senior AI consultant preparing a comprehensive AI readiness report for a corporate client.
+
+    Client Details:
+    - Name: {client}
+    - Company: {company}
+    - Industry Domain: {domain}
+    - Organization Tier: {tier}
+    - AI Readiness Score: approximately {score_bucket} out of 5 ({maturity})
+
+    Write the client's name exactly as {client}, the company name exactly as {company}
+    and the exact score exactly as {score}; these placeholders are filled in later.
+
+    --- Report Requirements ---
+    1. Executive Summary
+    2. Current Maturity Level
+    3. Detailed Strengths and Weaknesses Analysis
+    4. Actionable Recommendations
+    5. Potential Business Impact
+    6. Conclusion and Call to Action
+
+    Use a formal business tone with bullet points, tables, and clear sections. Justify an investment price of ₹199.
+    """
+
+# Next steps for the template report, by maturity level
+FALLBACK_RECOMMENDATIONS = {
+    "Beginner": [
+        "Appoint an executive sponsor and name an owner for AI initiatives.",
+        "Run AI awareness sessions for leadership and key teams.",
+        "List the repetitive, data-heavy processes that could benefit most from AI.",
+    ],
+    "Emerging": [
+        "Turn early experiments into a written AI strategy with measurable goals.",
+        "Consolidate the data your pilots depend on and assign data owners.",
+        "Pick one pilot with clear ROI and take it to production.",
+    ],
+    "Established": [
+        "Build a roadmap that scales successful projects across business units.",
+        "Put AI governance, risk and ethics policies in place.",
+        "Invest in upskilling so teams can run and improve AI systems themselves.",
+    ],
+    "Advanced": [
+        "Standardize deployment and monitoring of models across the organization.",
+        "Track the business value of each AI system against agreed KPIs.",
+        "Explore AI-led products and services for your customers.",
+    ],
+    "AI Leader": [
+        "Keep a pipeline of new use cases and retire systems that no longer pay off.",
+        "Share practices with partners and the wider industry to stay ahead.",
+        "Review responsible-AI controls as your systems grow in reach.",
+    ],
+}
+
+
+def score_bucket(avg_score):
+    return round(round(avg_score / SCORE_BUCKET) * SCORE_BUCKET, 1)
+
+
+def build_prompt(domain, tier, avg_score, maturity):
+    """The non-personalized prompt shared by everyone in the same bucket."""
+    return REPORT_PROMPT.format(
+        client=CLIENT_PLACEHOLDER,
+        company=COMPANY_PLACEHOLDER,
+        score=SCORE_PLACEHOLDER,
+        domain=domain,
+        tier=tier,
+        score_bucket=score_bucket(avg_score),
+        maturity=maturity,
+    )
+
+
+def cache_key(prompt, model_name=resources.GEMINI_MODEL):
+    return hashlib.sha256(f"{model_name}\n{prompt}".encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def get_report_cache():
+    """The process-wide report cache; `REPORT_CACHE_BACKEND` picks the store."""
+    backend = resources.get_secret("REPORT_CACHE_BACKEND", "tiered")
+    if backend == "memory":
+        cache = ReportCache(LRUCache())
+    elif backend == "sqlite":
+        cache = ReportCache(SQLiteCache(resources.data_path("report_cache.sqlite3")))
+    else:
+        cache = ReportCache(TieredCache(LRUCache(), SQLiteCache(resources.data_path("report_cache.sqlite3"))))
+    metrics.gauge("taicc_report_cache", "Report cache hits, misses and hit ratio.", cache.stats)
+    return cache
+
+
+@functools.lru_cache(maxsize=None)
+def get_report_library():
+    """The shipped library of pre-generated bodies (`REPORT_LIBRARY`), or None."""
+    path = resources.get_secret("REPORT_LIBRARY", REPORT_LIBRARY_PATH)
+    if not path or not os.path.exists(path):
+        return None
+    return ReportLibrary(path, readonly=True)
+
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh_in_background(prompt, key):
+    """Generate and cache a current body for `key`, once at a time per key."""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def refresh():
+        try:
+            get_report_cache().set(key, generate_body(prompt))
+        except Exception as e:
+            print(f"Could not refresh a pre-generated report: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=refresh, name="report-refresh", daemon=True).start()
+
+
+def _prebuilt(domain, tier, avg_score, maturity, prompt, key):
+    library = get_report_library()
+    entry = library.lookup(domain, tier, score_bucket(avg_score), maturity) if library else None
+    if entry is None:
+        return None
+    body, library_key = entry
+    if library_key != key:
+        _refresh_in_background(prompt, key)
+    return body
+
+
+class ReportStream:
+    """A report body that fills in as chunks arrive, with its timings.
+
+    The generating worker calls `append()` and `finish()`; the page reads
+    `text()` as often as it likes from another thread. Timings run from the
+    stream's creation, so a stream made when the job is submitted includes
+    the time the job waited to start. A stream that is not
+    `live` calls Gemini without streaming and receives the body whole, for
+    callers that only need the outcome.
+    """
+
+    def __init__(self, live=True):
+        self.live = live
+        self._lock = threading.Lock()
+        self._chunks = []
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.cached = False
+        # Why the template report was served instead of Gemini's, if it was
+        self.fallback = None
+
+    def append(self, chunk):
+        if not chunk:
+            return
+        with self._lock:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self._chunks.append(chunk)
+
+    def text(self):
+        with self._lock:
+            return "".join(self._chunks)
+
+    def replace(self, text):
+        """Swap whatever has streamed so far for `text`."""
+        with self._lock:
+            self._chunks = [text]
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    def timings(self):
+        """Seconds to the first token and to the end of generation."""
+        ttft = self.first_token_at - self.started_at if self.first_token_at else None
+        total = self.finished_at - self.started_at if self.finished_at else None
+        return {"time_to_first_token": ttft, "total_time": total, "cached": self.cached,
+                "fallback": self.fallback}
+
+
+def _chunk_text(chunk):
+    try:
+        return chunk.text
+    except ValueError:
+        return ""  # chunks without text parts, e.g. a trailing finish reason
+
+
+def fallback_report_body(domain, tier, maturity):
+    """A deterministic report body with the same sections and placeholders as Gemini's."""
+    labels = [label for _, _, label in readiness_levels]
+    position = labels.index(maturity) if maturity in labels else 0
+    next_level = labels[position + 1] if position + 1 < len(labels) else None
+    level_rows = "\n".join(
+        f"| {'**' + label + '**' if label == maturity else label} | {low:.1f} - {high:.1f} | {maturity_descriptions[label]} |"
+        for low, high, label in readiness_levels
+    )
+    recommendations = "\n".join(f"- {step}" for step in FALLBACK_RECOMMENDATIONS.get(maturity, []))
+    if next_level:
+        gap = f"To reach the {next_level} level: {maturity_descriptions[next_level]}"
+    else:
+        gap = "The priority is to sustain leadership as AI practice and regulation evolve."
+    return f"""## Executive Summary
+{CLIENT_PLACEHOLDER}, {COMPANY_PLACEHOLDER} scored {SCORE_PLACEHOLDER} out of 5 on the TAICC AI Readiness Assessment for the {domain} domain ({tier}), which places it at the **{maturity}** level: {maturity_descriptions.get(maturity, "")}
+
+## 1. Current Maturity Level
+| Level | Score Range | Description |
+|-------|-------------|-------------|
+{level_rows}
+
+## 2. Detailed Strengths and Weaknesses Analysis
+- Strength: {maturity_descriptions.get(maturity, "")}
+- Gap: {gap}
+
+## 3. Actionable Recommendations
+{recommendations}
+
+## 4. Potential Business Impact
+Moving up one maturity level typically brings faster decisions, lower operating costs and better customer experiences for {domain} organizations.
+
+## 5. Conclusion and Call to Action
+A detailed, consultant-led AI roadmap for {COMPANY_PLACEHOLDER}, available for ₹199, turns these recommendations into a prioritized plan.
+"""
+
+
+def _fallback(domain, tier, maturity, error):
+    get_llm_gateway().record_fallback()
+    print(f"Serving the template report instead of Gemini: {error}")
+    return fallback_report_body(domain, tier, maturity)
+
+
+def generate_body(prompt, queue_timeout=None, admission=None):
+    """One non-streaming Gemini call for `prompt` through the LLM gateway."""
+    with get_llm_gateway().slot(queue_timeout, admission) as timeout, metrics.timed("gemini.generate"):
+        response = resources.get_gemini_model().generate_content(prompt, request_options={"timeout": timeout})
+        return response.text.strip()
+
+
+def _generate_streaming(prompt, stream, queue_timeout=None, admission=None):
+    with get_llm_gateway().slot(queue_timeout, admission) as timeout, metrics.timed("gemini.generate"):
+        deadline = time.monotonic() + timeout
+        response = resources.get_gemini_model().generate_content(
+            prompt, stream=True, request_options={"timeout": timeout})
+        for chunk in response:
+            stream.append(_chunk_text(chunk))
+            if time.monotonic() > deadline:
+                raise LLMTimeout(f"Report generation took longer than {timeout:g}s")
+    if stream.first_token_at is not None:
+        metrics.observe("gemini.first_token", stream.first_token_at - stream.started_at)
+    return stream.text().strip()
+
+
+def _report_body(domain, tier, avg_score, maturity, stream, queue_timeout, admission):
+    prompt = build_prompt(domain, tier, avg_score, maturity)
+    key = cache_key(prompt)
+    cache = get_report_cache()
+    body = cache.get(key) or _prebuilt(domain, tier, avg_score, maturity, prompt, key)
+    if body is not None:
+        stream.cached = True
+        stream.append(body)
+        return body
+    try:
+        if stream.live:
+            body = _generate_streaming(prompt, stream, queue_timeout, admission)
+        else:
+            body = generate_body(prompt, queue_timeout, admission)
+            stream.append(body)
+        cache.set(key, body)
+    except Exception as e:
+        body = _fallback(domain, tier, maturity, e)
+        stream.replace(body)
+        stream.fallback = e.reason if isinstance(e, GatewayRejected) else type(e).__name__
+    return body
+
+
+def generate_report_body(domain, tier, avg_score, maturity, stream=None, queue_timeout=None, admission=None):
+    """Return the report body with placeholders, generating it on a cache miss.
+
+    The outcome is recorded on `stream`: whether the body was cached and, if
+    the template report was served, why (`stream.fallback`). With a live
+    `ReportStream`, Gemini is called in streaming mode and every chunk is
+    appended as it arrives; otherwise the body is appended whole.
+    `queue_timeout` overrides how long to wait for a gateway slot, and
+    `admission` is the gateway queue place taken when the job was submitted.
+    """
+    stream = stream or ReportStream(live=False)
+    try:
+        body = _report_body(domain, tier, avg_score, maturity, stream, queue_timeout, admission)
+    finally:
+        if admission is not None:
+            admission.release()  # a cached body never takes its gateway slot
+    stream.finish()
+    return body
+
+
+def personalize(body, user, avg_score):
+    client_name = user.get("Name") or "[Client Name]"
+    company_name = user.get("Company") or "[Company Name]"
+    body = (body.replace(CLIENT_PLACEHOLDER, client_name)
+                .replace(COMPANY_PLACEHOLDER, company_name)
+                .replace(SCORE_PLACEHOLDER, str(avg_score)))
+    return (
+        f"Client: {client_name}\n"
+        f"Company: {company_name}\n"
+        f"Email: {user.get('Email', '')}\n"
+        f"Phone: {user.get('Phone', '')}\n\n"
+        f"{body}"
+    )
+
+
+def generate_professional_summary(user, domain, tier, avg_score, maturity, stream=None, queue_timeout=None,
+                                  admission=None):
+    """Runs on a pipeline worker thread, so it must not touch st.session_state."""
+    body = generate_report_body(domain, tier, avg_score, maturity, stream, queue_timeout, admission)
+    return personalize(body, user, avg_score)
@@ -0,0 +1,176 @@
+"""Process-wide, lazily built clients for Gemini, Google Sheets and Razorpay.
+
+Streamlit re-executes `app.py` on every interaction, but imported modules stay
+in `sys.modules`, so the clients held here are built once per process on first
+real use and then shared by every session. Nothing in this module touches the
+network at import time.
+"""
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import payments
+
+GEMINI_MODEL = "gemini-2.5-flash-lite-preview-09-2025"
+SHEETS_SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+HTTP_POOL_SIZE = 20
+
+BASE_DIR = os.path.dirname(__file__)
+
+
+def get_secret(name, default=None):
+    """Read a secret from the environment first, then from `st.secrets`."""
+    value = os.environ.get(name)
+    if value is not None:
+        return value
+    try:
+        import streamlit as st
+        return st.secrets[name]
+    except Exception:
+        return default
+
+
+def data_path(*parts):
+    """Path under the local data directory (`TAICC_DATA_DIR`, default `.data/`)."""
+    base = get_secret("TAICC_DATA_DIR", os.path.join(BASE_DIR, ".data"))
+    os.makedirs(base, exist_ok=True)
+    return os.path.join(base, *parts)
+
+
+class LazyResource:
+    """A client built on first use, health-checked, and rebuilt after failures.
+
+    `health_check(value)` runs at most once every `check_interval` seconds when
+    the resource is handed out; if it raises, the client is rebuilt.
+    """
+
+    def __init__(self, name, factory, health_check=None, check_interval=300):
+        self.name = name
+        self.factory = factory
+        self.health_check = health_check
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._checked_at = 0.0
+
+    @property
+    def built(self):
+        return self._value is not None
+
+    def get(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._value is not None and self.health_check and now - self._checked_at > self.check_interval:
+                try:
+                    self.health_check(self._value)
+                except Exception as e:
+                    print(f"{self.name} failed its health check, reconnecting: {e}")
+                    self._value = None
+                self._checked_at = now
+            if self._value is None:
+                self._value = self.factory()
+                self._checked_at = now
+            return self._value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+
+    def set(self, value):
+        """Install a prebuilt value, e.g. a local stand-in for load tests."""
+        with self._lock:
+            self._value = value
+            self._checked_at = time.monotonic()
+
+    def call(self, fn, retries=1):
+        """Run `fn(client)`, rebuilding the client after a failure.
+
+        Failed calls are retried `retries` times; pass 0 for calls that are
+        not safe to repeat blindly, such as appends.
+        """
+        for attempt in range(retries + 1):
+            try:
+                return fn(self.get())
+            except Exception:
+                self.invalidate()
+                if attempt == retries:
+                    raise
+
+
+# -----------------------------
+# --- FACTORIES ---
+# -----------------------------
+def _build_http_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _build_gemini_model():
+    if get_secret("GEMINI_FAKE"):
+        import fakes
+        return fakes.FakeGeminiModel(delay=float(get_secret("GEMINI_FAKE_DELAY", 0.05)))
+    import google.generativeai as genai
+    genai.configure(api_key=get_secret("GEMINI_API_KEY"))
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+
+def _build_sheet():
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+    account = get_secret("gcp_service_account")
+    if isinstance(account, str):
+        account = json.loads(account)
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(dict(account), SHEETS_SCOPE)
+    client = gspread.authorize(creds)
+    return client.open(get_secret("SHEET_NAME")).sheet1
+
+
+def _check_sheet(sheet):
+    sheet.spreadsheet.fetch_sheet_metadata()
+
+
+def _build_razorpay_client():
+    import razorpay
+    options = {}
+    # Point at a local fake Razorpay API (e.g. "http://127.0.0.1:8765/v1") for testing
+    base_url = get_secret("RAZORPAY_BASE_URL")
+    if base_url:
+        options["base_url"] = base_url
+    auth = (get_secret("RAZORPAY_KEY_ID"), get_secret("RAZORPAY_KEY_SECRET"))
+    return razorpay.Client(session=get_http_session(), auth=auth, **options)
+
+
+http_session = LazyResource("http session", _build_http_session)
+gemini_model = LazyResource("gemini", _build_gemini_model)
+sheet = LazyResource("google sheet", _build_sheet, health_check=_check_sheet)
+razorpay_client = LazyResource("razorpay", _build_razorpay_client)
+payment_poller = LazyResource("payment poller", lambda: payments.PaymentPoller(get_razorpay_client))
+
+
+def get_http_session():
+    return http_session.get()
+
+
+def get_gemini_model():
+    return gemini_model.get()
+
+
+def get_sheet():
+    return sheet.get()
+
+
+def get_razorpay_client():
+    return razorpay_client.get()
+
+
+def get_payment_poller():
+    """One background poller per process, shared by every session."""
+    return payment_poller.get()
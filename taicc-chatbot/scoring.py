@@ -0,0 +1,138 @@
+"""Per-dimension scoring engine.
+
+Every question in the bank is mapped to one of the readiness dimensions used
+by the legacy `ai_readiness_data.csv` export, with an optional weight. The
+mapping is the reviewed `question_dimensions.json`, keyed by question text;
+a bank containing any question it does not label is rejected at load, so a
+new question cannot silently land in some default dimension. The keyword
+rules in `dimension_rules.py` only help draft labels offline.
+
+Scores are computed with NumPy over flat arrays of (submission, question,
+answer) triples, so a single session and thousands of historical submissions
+go through the same vectorized code path.
+"""
+import functools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from question_bank import get_question_bank
+
+BASE_DIR = os.path.dirname(__file__)
+DIMENSIONS_PATH = os.path.join(BASE_DIR, "question_dimensions.json")
+
+# Score mapping and readiness levels
+score_map = {"Not at all": 1, "Slightly": 2, "Moderately": 3, "Very": 4, "Fully": 5}
+readiness_levels = [
+    (0, 1.0, "Beginner"),
+    (1.1, 2.0, "Emerging"),
+    (2.1, 3.0, "Established"),
+    (3.1, 4.0, "Advanced"),
+    (4.1, 5.0, "AI Leader")
+]
+maturity_descriptions = {
+    "Beginner": "Just starting AI journey, minimal awareness.",
+    "Emerging": "Early experiments, limited AI integration.",
+    "Established": "Defined AI strategy, some successful projects.",
+    "Advanced": "Mature AI adoption, integrated into processes.",
+    "AI Leader": "Industry-leading AI innovation and scale.",
+}
+
+OVERALL = "Overall Score"
+DIMENSIONS = (
+    "AI Strategy",
+    "Data Readiness",
+    "Tech Infrastructure",
+    "Workforce & Culture",
+    "Customer Experience",
+)
+
+
+def determine_maturity(avg):
+    # Each level runs up to its upper bound, so scores such as 2.05 that fall
+    # between the displayed ranges still get a label
+    for low, high, label in readiness_levels:
+        if avg <= high:
+            return label
+    return "Undefined"
+
+
+class DimensionMap:
+    """Per-question dimension index and weight, aligned with question IDs."""
+
+    def __init__(self, bank, mapping):
+        dimensions = mapping.get("dimensions", {})
+        weights = mapping.get("weights", {})
+        problems = [f"unknown dimension {dim!r} for {text!r}"
+                    for text, dim in dimensions.items() if dim not in DIMENSIONS]
+        problems += [f"no dimension for {text!r}" for text in dict.fromkeys(bank.texts)
+                     if text not in dimensions]
+        if problems:
+            raise ValueError("Invalid question dimensions:\n  " + "\n  ".join(problems))
+
+        dim_index = {dim: i for i, dim in enumerate(DIMENSIONS)}
+        self.dimension_ids = np.array([dim_index[dimensions[t]] for t in bank.texts], dtype=np.int8)
+        self.weights = np.array([float(weights.get(t, 1.0)) for t in bank.texts])
+
+    def dimension(self, question_id):
+        return DIMENSIONS[self.dimension_ids[question_id]]
+
+
+def load_question_dimensions(path=DIMENSIONS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def get_dimension_map():
+    """The process-wide dimension map for the question bank."""
+    return DimensionMap(get_question_bank(), load_question_dimensions())
+
+
+def score_long(submission_ids, question_ids, values, dimension_map=None):
+    """Score many submissions given one flat row per answered question.
+
+    Returns a DataFrame indexed by submission with one column per dimension
+    plus `Overall Score`, all weighted means rounded to two decimals. A
+    dimension with no answered questions in a submission is NaN.
+    """
+    dimension_map = dimension_map or get_dimension_map()
+    codes, index = pd.factorize(pd.Series(submission_ids), sort=False)
+    question_ids = np.asarray(question_ids, dtype=np.intp)
+    values = np.asarray(values, dtype=np.float64)
+
+    n_subs, n_dims = len(index), len(DIMENSIONS)
+    weights = dimension_map.weights[question_ids]
+    cells = codes * n_dims + dimension_map.dimension_ids[question_ids]
+
+    size = n_subs * n_dims
+    weighted = np.bincount(cells, weights=weights * values, minlength=size).reshape(n_subs, n_dims)
+    totals = np.bincount(cells, weights=weights, minlength=size).reshape(n_subs, n_dims)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        per_dimension = weighted / totals
+        overall = weighted.sum(axis=1) / totals.sum(axis=1)
+
+    frame = pd.DataFrame(per_dimension, index=index, columns=list(DIMENSIONS))
+    frame[OVERALL] = overall
+    return frame.round(2)
+
+
+def score_batch(answers, dimension_map=None):
+    """Score `{submission_id: {question_id: value}}` in one vectorized call."""
+    sids, qids, vals = [], [], []
+    for sid, submission in answers.items():
+        sids.extend([sid] * len(submission))
+        qids.extend(submission.keys())
+        vals.extend(submission.values())
+    return score_long(sids, qids, vals, dimension_map)
+
+
+def score_answers(answers, dimension_map=None):
+    """Scores of one session as `{dimension: score, ..., "Overall Score": avg}`.
+
+    Dimensions without any question in the session are left out.
+    """
+    row = score_batch({0: answers}, dimension_map).iloc[0]
+    return {name: float(score) for name, score in row.items() if not np.isnan(score)}
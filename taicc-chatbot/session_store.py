@@ -0,0 +1,160 @@
+"""Server-side session checkpoints, so any replica can resume any user.
+
+Progress normally lives only in `st.session_state`, which pins a user to one
+process. Here each session gets a resumable assessment token (kept in the
+page URL as `?session=<token>`), and on every page transition the fields that
+define progress are checkpointed to a shared store under that token. A new
+session that arrives with a token, on this replica or any other, restores the
+checkpoint and carries on, including a payment already confirmed.
+
+The store also owns submissions: `claim(submission_id)` is true for exactly
+one caller across every replica sharing it. Only that caller journals the
+row, so a results page resumed on another replica shows the report without
+writing the submission a second time.
+
+Backends share a tiny interface: `load(token)` returns the checkpoint dict or
+None, `save(token, data)` stores it and `claim(submission_id)` is the
+once-only check above. `SESSION_STORE` picks one:
+
+- `sqlite` (default): a file under the data directory, for a single node.
+- `redis`: any Redis-protocol server at `SESSION_REDIS_URL`, for N replicas
+  behind a plain round-robin balancer.
+"""
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import resources
+from question_bank import get_question_bank
+
+SESSION_TTL = 7 * 24 * 60 * 60
+REDIS_PREFIX = "taicc:session:"
+CLAIM_PREFIX = "taicc:claim:"
+
+# Session state that defines a user's progress; everything else is derived
+CHECKPOINT_FIELDS = (
+    "page", "user_data", "selected_domain", "selected_tier", "order_id", "order_amount",
+    "paid", "question_section", "submission_id",
+)
+TIME_FIELDS = ("start_time", "end_time")
+
+
+def new_token():
+    return secrets.token_urlsafe(16)
+
+
+def snapshot(state):
+    """The compact checkpoint of a session state mapping."""
+    data = {field: state[field] for field in CHECKPOINT_FIELDS if field in state}
+    for field in TIME_FIELDS:
+        if field in state:
+            data[field] = state[field].isoformat()
+    domain, tier = state.get("selected_domain"), state.get("selected_tier")
+    if domain and tier and "answers" in state:
+        # One digit per question of the tier, in order; 0 is unanswered
+        answers = state["answers"]
+        data["answers"] = "".join(str(int(answers[qid])) for qid, _ in get_question_bank().for_tier(domain, tier))
+    return data
+
+
+def restore(state, data, answers):
+    """Apply checkpoint `data` to `state`; `answers` is a blank answer array."""
+    for field in CHECKPOINT_FIELDS:
+        if field in data:
+            state[field] = data[field]
+    for field in TIME_FIELDS:
+        if field in data:
+            state[field] = datetime.fromisoformat(data[field])
+    digits = data.get("answers")
+    if digits:
+        questions = get_question_bank().for_tier(data["selected_domain"], data["selected_tier"])
+        for (qid, _), digit in zip(questions, digits):
+            answers[qid] = int(digit)
+    state["answers"] = answers
+
+
+class SQLiteSessionStore:
+    """Checkpoints in a local SQLite file, shared by every process on the node."""
+
+    def __init__(self, path, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " token TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS claims ("
+                " submission_id TEXT PRIMARY KEY, claimed_at REAL NOT NULL)"
+            )
+
+    def load(self, token):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE token = ? AND updated_at >= ?",
+                (token, time.time() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, token, data):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (token, data, updated_at) VALUES (?, ?, ?)",
+                (token, json.dumps(data, separators=(",", ":")), now),
+            )
+            self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,))
+
+    def claim(self, submission_id):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM claims WHERE claimed_at < ?", (now - self.ttl,))
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO claims (submission_id, claimed_at) VALUES (?, ?)",
+                (submission_id, now),
+            )
+        return cursor.rowcount == 1
+
+
+class RedisSessionStore:
+    """Checkpoints in a Redis-protocol server; entries expire after `ttl` seconds.
+
+    `client` needs only `get(name)` and `set(name, value, ex=seconds, nx=False)`,
+    so a local stand-in such as `fakes.FakeRedis` can replace a real server.
+    """
+
+    def __init__(self, client, ttl=SESSION_TTL):
+        self.client = client
+        self.ttl = ttl
+
+    def load(self, token):
+        value = self.client.get(REDIS_PREFIX + token)
+        return json.loads(value) if value else None
+
+    def save(self, token, data):
+        self.client.set(REDIS_PREFIX + token, json.dumps(data, separators=(",", ":")), ex=self.ttl)
+
+    def claim(self, submission_id):
+        return bool(self.client.set(CLAIM_PREFIX + submission_id, "1", ex=self.ttl, nx=True))
+
+
+def _build_store():
+    backend = resources.get_secret("SESSION_STORE", "sqlite")
+    if backend == "redis":
+        import redis
+        return RedisSessionStore(redis.Redis.from_url(resources.get_secret("SESSION_REDIS_URL")))
+    return SQLiteSessionStore(resources.data_path("sessions.sqlite3"))
+
+
+store = resources.LazyResource("session store", _build_store)
+
+
+def get_session_store():
+    """The process-wide session store chosen by `SESSION_STORE`."""
+    return store.get()
@@ -0,0 +1,106 @@
+"""Cold start: background preloading and the login page's import budget.
+
+The login and question pages need none of the heavy dependencies (matplotlib,
+fpdf, PIL, gspread, oauth2client, razorpay, google-generativeai); each is
+imported by the code that first uses it. With `WARM_UP=1`, the first page
+served also starts a background thread that imports them and builds the
+report branding, so the first results page does not pay for them either.
+
+`python startup.py --check` imports everything `app.py` imports in a fresh
+interpreter and fails if that takes longer than the budget or pulls in any
+of the heavy modules.
+"""
+import argparse
+import ast
+import functools
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import resources
+
+HEAVY_MODULES = (
+    "matplotlib.figure",
+    "fpdf",
+    "PIL.Image",
+    "google.generativeai",
+    "gspread",
+    "oauth2client.service_account",
+    "razorpay",
+)
+# Seconds to import everything app.py needs for the login page, Streamlit included
+LOGIN_IMPORT_BUDGET = 1.5
+APP_PATH = os.path.join(resources.BASE_DIR, "app.py")
+
+
+def preload():
+    """Import the heavy dependencies and prepare the report assets."""
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Could not preload {name}: {e}")
+    import pdf_report
+    pdf_report.warm_up()
+
+
+@functools.lru_cache(maxsize=None)
+def warm_up_in_background():
+    """Start `preload()` once per process when `WARM_UP` is set."""
+    if not resources.get_secret("WARM_UP"):
+        return None
+    thread = threading.Thread(target=preload, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def app_imports(path=APP_PATH):
+    """The top-level import statements of `app.py`, as source lines."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{imports}
+print(json.dumps({{"seconds": time.perf_counter() - start, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure_login_imports(runs=3):
+    """Best-of-`runs` import time in fresh interpreters, and the heavy modules loaded."""
+    probe = _PROBE.format(imports="\n".join(app_imports()))
+    env = {k: v for k, v in os.environ.items() if k != "WARM_UP"}
+    best, loaded = None, []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", probe], cwd=resources.BASE_DIR, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        best = result["seconds"] if best is None else min(best, result["seconds"])
+        modules = set(result["modules"])
+        loaded = [name for name in HEAVY_MODULES if name in modules]
+    return best, loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start checks for the app.")
+    parser.add_argument("--check", action="store_true", help="enforce the login page import budget")
+    parser.add_argument("--budget", type=float, default=LOGIN_IMPORT_BUDGET, help="seconds")
+    args = parser.parse_args(argv)
+
+    seconds, loaded = measure_login_imports()
+    print(f"Login page imports: {seconds:.3f}s (budget {args.budget:.3f}s)")
+    if loaded:
+        print(f"Heavy modules imported eagerly: {', '.join(loaded)}")
+    if args.check and (seconds > args.budget or loaded):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Keep every store a test opens out of the real data directory."""
+    monkeypatch.setenv("TAICC_DATA_DIR", str(tmp_path / "data"))
+    return tmp_path / "data"
+
+
+@pytest.fixture
+def fresh_reports(monkeypatch):
+    """An empty in-memory report cache, no report library and the fake Gemini model."""
+    import reports
+    import resources
+    monkeypatch.setenv("REPORT_CACHE_BACKEND", "memory")
+    monkeypatch.setenv("REPORT_LIBRARY", "")
+    monkeypatch.setenv("GEMINI_FAKE", "1")
+    monkeypatch.setenv("GEMINI_FAKE_DELAY", "0")
+    reports.get_report_cache.cache_clear()
+    reports.get_report_library.cache_clear()
+    resources.gemini_model.invalidate()
+    yield
+    reports.get_report_cache.cache_clear()
+    reports.get_report_library.cache_clear()
+    resources.gemini_model.invalidate()
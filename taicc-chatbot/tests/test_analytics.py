@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from analytics import CohortAnalytics, histogram_bucket
+from assessment import build_row
+
+
+def _row(submission_id, timestamp, tier="Tier 1", score=3.0, domain="Pharma"):
+    return build_row(datetime.fromisoformat(timestamp), {"Name": "Ann"}, domain, tier, score,
+                     "Established", submission_id)
+
+
+def test_a_replayed_submission_is_counted_once(tmp_path):
+    analytics = CohortAnalytics(str(tmp_path / "analytics.sqlite3"))
+    row = _row("s1", "2025-02-10 10:00:00", score=4.0)
+    assert analytics.record_row(row)
+    assert not analytics.record_row(row)
+
+    # A second process on the same file sees the submission as counted too
+    assert not CohortAnalytics(analytics.path).record_row(row)
+    assert (analytics.total(), analytics.average_score()) == (1, 4.0)
+
+
+def test_rows_without_a_submission_id_are_keyed_by_content(tmp_path):
+    analytics = CohortAnalytics(str(tmp_path / "analytics.sqlite3"))
+    legacy = _row("", "2025-02-10 10:00:00")
+    assert analytics.record_row(legacy)
+    assert not analytics.record_row(list(legacy))
+    assert analytics.record_row(_row("", "2025-02-10 10:00:01"))
+    assert analytics.total() == 2
+
+
+def test_tier_distribution_and_score_trend(tmp_path):
+    analytics = CohortAnalytics(str(tmp_path / "analytics.sqlite3"))
+    for i, (timestamp, tier, score) in enumerate([
+        ("2024-03-01 09:00:00", "Tier 1", 1.0),
+        ("2024-05-01 09:00:00", "Tier 1", 2.0),
+        ("2024-08-01 09:00:00", "Tier 2", 5.0),
+        ("2024-11-01 09:00:00", "Tier 1", 3.0),
+        ("2024-11-02 09:00:00", "Tier 1", 4.0),
+        ("2025-01-15 09:00:00", "Tier 1", 2.5),
+    ]):
+        analytics.record_row(_row(f"s{i}", timestamp, tier, score))
+
+    assert analytics.tier_distribution() == {"Tier 1": 5, "Tier 2": 1}
+    # The latest four quarters, oldest first
+    assert analytics.score_trend() == {"2024-Q2": 2.0, "2024-Q3": 5.0, "2024-Q4": 3.5, "2025-Q1": 2.5}
+    assert analytics.score_trend("Tier 1", quarters=2) == {"2024-Q4": 3.5, "2025-Q1": 2.5}
+    assert analytics.score_trend("Tier 3") == {}
+    assert analytics.average_score("Tier 1") == 2.5
+
+
+def test_histogram_buckets_are_half_points(tmp_path):
+    assert [histogram_bucket(s) for s in (1.0, 1.49, 1.5, 4.99, 5.0)] == ["1.0", "1.0", "1.5", "4.5", "5.0"]
+    analytics = CohortAnalytics(str(tmp_path / "analytics.sqlite3"))
+    for i, score in enumerate((1.2, 1.4, 3.7)):
+        analytics.record_row(_row(f"s{i}", "2025-01-01 00:00:00", score=score))
+    assert analytics.score_histogram() == {"1.0": 2, "3.5": 1}
+
+
+def test_dimension_averages_skip_rows_without_them(tmp_path):
+    analytics = CohortAnalytics(str(tmp_path / "analytics.sqlite3"))
+    for i, strategy in enumerate((2.0, 4.0)):
+        row = build_row(datetime(2025, 1, 1), {}, "Pharma", "Tier 1", 3.0, "Established", f"s{i}",
+                        {"AI Strategy": strategy, "Data Readiness": 3.0})
+        analytics.record_row(row)
+    analytics.record_row(_row("legacy", "2025-01-01 00:00:00")[:10])
+    assert analytics.dimension_averages() == {"AI Strategy": 3.0, "Data Readiness": 3.0}
+    assert analytics.total() == 3
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import assessment
+import fakes
+import resources
+from question_bank import get_question_bank
+
+DOMAIN, TIER = "Pharma", "Tier 2"
+
+pytestmark = pytest.mark.usefixtures("fresh_reports")
+
+
+def _record(submission_id, answers):
+    return {"submission_id": submission_id, "name": "Ann", "company": "Acme", "email": "a@x.com",
+            "phone": "1", "domain": DOMAIN, "tier": TIER, "answers": answers}
+
+
+def test_batch_writes_a_pdf_per_record_and_flags_bad_rows(tmp_path):
+    count = len(get_question_bank().for_tier(DOMAIN, TIER))
+    source = tmp_path / "answers.jsonl"
+    source.write_text("\n".join(json.dumps(r) for r in [
+        _record("s1", ["Very"] * count),
+        _record("s2", [2] * count),
+        _record("s3", [3] * (count - 1)),
+    ]))
+    out = tmp_path / "out"
+
+    assert assessment.main([str(source), "--out", str(out), "--workers", "2", "--processes", "2"]) == 1
+
+    results = {r["submission_id"]: r for r in map(json.loads, (out / "results.jsonl").read_text().splitlines())}
+    assert results["s3"]["error"] == f"Expected {count} answers, got {count - 1}"
+    for sid, score in (("s1", 4.0), ("s2", 2.0)):
+        assert "error" not in results[sid]
+        assert results[sid]["scores"]["Overall Score"] == score
+        assert (out / f"{sid}.pdf").read_bytes().startswith(b"%PDF")
+
+
+def test_template_reports_are_flagged_and_fail_the_batch(tmp_path):
+    resources.gemini_model.set(fakes.FakeGeminiModel(delay=0, failure_rate=1.0))
+    count = len(get_question_bank().for_tier(DOMAIN, TIER))
+    source = tmp_path / "answers.jsonl"
+    source.write_text(json.dumps(_record("s1", ["Very"] * count)))
+    out = tmp_path / "out"
+
+    assert assessment.main([str(source), "--out", str(out), "--no-pdf"]) == 1
+
+    result = json.loads((out / "results.jsonl").read_text())
+    assert result["fallback"] == "FakeServiceError"
+    assert "error" not in result and "Advanced" in result["report"]
+
+
+@pytest.mark.parametrize("submission_id", ["../../escape", "/tmp/abs", "a.b", "sub dir"])
+def test_unsafe_submission_ids_become_error_rows(tmp_path, submission_id):
+    count = len(get_question_bank().for_tier(DOMAIN, TIER))
+    source = tmp_path / "answers.jsonl"
+    source.write_text(json.dumps(_record(submission_id, ["Very"] * count)))
+    out = tmp_path / "out"
+
+    assert assessment.main([str(source), "--out", str(out), "--processes", "1"]) == 1
+
+    result = json.loads((out / "results.jsonl").read_text())
+    assert result["error"].startswith(f"Invalid submission_id {submission_id!r}")
+    assert [p.name for p in out.iterdir()] == ["results.jsonl"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["answers.jsonl", "out"]
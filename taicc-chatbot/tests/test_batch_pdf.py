@@ -0,0 +1,43 @@
+import json
+import zipfile
+
+import batch_pdf
+
+
+def _jobs():
+    good = next(batch_pdf.synthetic_jobs(1))
+    bad = dict(good, submission_id="bad")
+    del bad["scores"]
+    return [good, bad]
+
+
+def test_a_failing_job_comes_back_as_an_error():
+    submission_id, pdf, error = batch_pdf.render_job(_jobs()[1])
+    assert (submission_id, pdf) == ("bad", None)
+    assert error == "KeyError: 'scores'"
+
+
+def test_batch_renders_the_rest_and_exits_non_zero(tmp_path, capsys):
+    source = tmp_path / "results.jsonl"
+    source.write_text("".join(json.dumps(job) + "\n" for job in _jobs()))
+    out = tmp_path / "reports"
+
+    assert batch_pdf.main([str(source), "--out", str(out), "--processes", "1", "--no-peers"]) == 1
+
+    assert [p.name for p in out.iterdir()] == ["bench-00000.pdf"]
+    assert (out / "bench-00000.pdf").read_bytes().startswith(b"%PDF")
+    err = capsys.readouterr().err
+    assert "1 reports, 1 failed" in err and "bad: KeyError: 'scores'" in err
+
+
+def test_unsafe_ids_are_rejected_for_directories_and_zips(tmp_path):
+    good = next(batch_pdf.synthetic_jobs(1))
+    jobs = [good, dict(good, submission_id="../escape"), dict(good, submission_id="/tmp/abs")]
+    for out in (tmp_path / "reports", tmp_path / "reports.zip"):
+        done, failures, _ = batch_pdf.render_batch(jobs, str(out), processes=1)
+        assert done == 1
+        assert [sid for sid, _ in failures] == ["../escape", "/tmp/abs"]
+        assert all(error.startswith("ValueError: Invalid submission_id") for _, error in failures)
+    with zipfile.ZipFile(tmp_path / "reports.zip") as archive:
+        assert archive.namelist() == ["bench-00000.pdf"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["reports", "reports.zip"]
@@ -0,0 +1,126 @@
+from datetime import datetime
+
+import pandas as pd
+
+import fakes
+from assessment import build_row
+from history_store import HistoryStore
+
+HEADER = ["Timestamp", "Name", "Company", "Email", "Phone", "Domain", "Tier", "Score", "Maturity", "Submission ID"]
+
+
+def _row(submission_id, timestamp, domain="Pharma", tier="Tier 2", score=3.0):
+    return build_row(datetime.fromisoformat(timestamp), {"Name": submission_id}, domain, tier, score,
+                     "Established", submission_id)
+
+
+def _ids(store):
+    return sorted(store.scan(["submission_id"])["submission_id"])
+
+
+def test_incremental_sync_keeps_rows_older_than_the_newest(tmp_path):
+    sheet = fakes.FakeWorksheet(latency=0)
+    store = HistoryStore(str(tmp_path / "history"))
+    sheet.rows += [HEADER, _row("a", "2025-05-01 10:00:05")]
+    assert store.sync_sheet(sheet.get_values) == 1
+
+    # A flusher retry lands after a newer row was already mirrored
+    sheet.rows += [_row("b", "2025-05-01 10:00:03"), _row("c", "2025-05-01 10:00:06")]
+    assert store.sync_sheet(sheet.get_values) == 2
+    assert _ids(store) == ["a", "b", "c"]
+    assert store.sync_sheet(sheet.get_values) == 0
+
+
+def test_incremental_sync_reads_only_new_rows(tmp_path):
+    sheet = fakes.FakeWorksheet(latency=0)
+    store = HistoryStore(str(tmp_path / "history"))
+    sheet.rows += [HEADER] + [_row(f"s{i}", f"2025-05-01 10:00:{i:02d}") for i in range(10)]
+    store.sync_sheet(sheet.get_values)
+
+    ranges = []
+    sheet.rows.append(_row("s10", "2025-05-01 10:00:10"))
+    store.sync_sheet(lambda cells: ranges.append(cells) or sheet.get_values(cells))
+    assert ranges == ["A11:O"]
+    assert len(_ids(store)) == 11
+
+
+def test_rescan_after_an_edit_adds_only_unseen_rows(tmp_path):
+    sheet = fakes.FakeWorksheet(latency=0)
+    store = HistoryStore(str(tmp_path / "history"))
+    sheet.rows += [HEADER, _row("a", "2025-05-01 10:00:00"), _row("b", "2025-05-01 10:00:01")]
+    store.sync_sheet(sheet.get_values)
+
+    # A row inserted by hand above the last synced row forces a rescan
+    sheet.rows.insert(1, _row("late", "2025-04-30 09:00:00"))
+    sheet.rows.append(_row("b", "2025-05-01 10:00:01"))  # a duplicate append
+    assert store.sync_sheet(sheet.get_values) == 1
+    assert _ids(store) == ["a", "b", "late"]
+
+
+def test_legacy_csv_is_ingested_once_without_a_tier(tmp_path):
+    csv = tmp_path / "legacy.csv"
+    csv.write_text(
+        "Timestamp,Name,Email,Company,Phone,Level,Summary,AI Strategy,Data Readiness,"
+        "Tech Infrastructure,Workforce & Culture,Customer Experience\n"
+        '2025-04-16T01:06:13.188894,Ann,a@x.com,Acme,99,Basic,"Line one\n\nLine two",3.8,3.4,3,3,3\n'
+    )
+    store = HistoryStore(str(tmp_path / "history"))
+    assert store.ingest_csv(str(csv), chunk_rows=1) == 1
+    assert store.ingest_csv(str(csv)) == 0
+
+    record = store.scan().iloc[0]
+    assert record["legacy_level"] == "Basic"
+    assert pd.isna(record["tier"])
+    assert record["score"] == 3.24
+    assert record["summary"] == "Line one\n\nLine two"
+
+
+def test_summarize_filters_and_groups(tmp_path):
+    sheet = fakes.FakeWorksheet(latency=0)
+    sheet.rows += [
+        _row("a", "2025-01-10 10:00:00", "Pharma", "Tier 1", 2.0),
+        _row("b", "2025-02-10 10:00:00", "Pharma", "Tier 1", 4.0),
+        _row("c", "2025-02-11 10:00:00", "Hospitality", "Tier 1", 1.0),
+        _row("d", "2025-02-12 10:00:00", "Pharma", "Tier 2", 5.0),
+    ]
+    store = HistoryStore(str(tmp_path / "history"))
+    store.sync_sheet(sheet.get_values)
+
+    summary = store.summarize(["domain", "tier"], filters={"domain": "Pharma"})
+    assert summary[["domain", "tier", "count", "average_score"]].values.tolist() == [
+        ["Pharma", "Tier 1", 2, 3.0], ["Pharma", "Tier 2", 1, 5.0]]
+    assert store.summarize("tier", since="2025-02-01")["count"].tolist() == [2, 1]
+    assert store.peer_percentile(3.0, domain="Pharma") == round(100 / 3, 1)
+
+
+def test_a_date_only_until_includes_that_whole_day(tmp_path):
+    sheet = fakes.FakeWorksheet(latency=0)
+    sheet.rows += [
+        _row("a", "2025-02-27 23:59:59"),
+        _row("b", "2025-02-28 00:00:00"),
+        _row("c", "2025-02-28 18:30:00"),
+        _row("d", "2025-03-01 00:00:00"),
+    ]
+    store = HistoryStore(str(tmp_path / "history"))
+    store.sync_sheet(sheet.get_values)
+
+    assert sorted(store.scan(["submission_id"], until="2025-02-28")["submission_id"]) == ["a", "b", "c"]
+    assert sorted(store.scan(["submission_id"], until="2025-02-28T00:00:00")["submission_id"]) == ["a", "b"]
+    assert sorted(store.scan(["submission_id"], since="2025-02-28", until="2025-02-28")["submission_id"]) == ["b", "c"]
+
+
+def test_dimension_scores_are_mirrored_from_the_sheet(tmp_path):
+    scores = {"AI Strategy": 4.0, "Data Readiness": 2.5, "Tech Infrastructure": 3.0,
+              "Workforce & Culture": 1.5, "Customer Experience": 5.0, "Overall Score": 3.2}
+    sheet = fakes.FakeWorksheet(latency=0)
+    sheet.rows += [
+        build_row(datetime(2025, 5, 1, 10), {"Name": "Ann"}, "Pharma", "Tier 2", 3.2, "Advanced", "new", scores),
+        _row("old", "2025-05-01 10:00:01")[:10],  # written before the dimension columns
+    ]
+    store = HistoryStore(str(tmp_path / "history"))
+    store.sync_sheet(sheet.get_values)
+
+    records = store.scan().set_index("submission_id")
+    assert records.loc["new", "Data Readiness"] == 2.5
+    assert records.loc["new", "Customer Experience"] == 5.0
+    assert pd.isna(records.loc["old", "AI Strategy"])
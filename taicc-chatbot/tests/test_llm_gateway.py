@@ -0,0 +1,113 @@
+import collections
+import threading
+import time
+
+import pytest
+
+from llm_gateway import GatewayRejected, LLMGateway
+from pipeline import REPORT_POOL, ResultsPipeline
+
+
+def _hold(gateway, entered, release):
+    with gateway.slot():
+        entered.set()
+        release.wait(5)
+
+
+def test_calls_beyond_the_concurrency_cap_wait_for_a_slot():
+    gateway = LLMGateway(max_concurrency=1, rate_per_minute=6000, queue_timeout=5)
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(gateway, entered, release))
+    holder.start()
+    entered.wait(5)
+
+    admitted = threading.Event()
+    waiter = threading.Thread(target=_hold, args=(gateway, admitted, release))
+    waiter.start()
+    assert not admitted.wait(0.2)
+    assert gateway.stats()["queued"] == 1
+
+    release.set()
+    assert admitted.wait(5)
+    holder.join()
+    waiter.join()
+    assert (gateway.stats()["admitted"], gateway.stats()["in_flight"]) == (2, 0)
+
+
+def test_full_queue_sheds_and_waiting_times_out():
+    gateway = LLMGateway(max_concurrency=1, rate_per_minute=6000, max_queue=0, queue_timeout=0.1)
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(gateway, entered, release))
+    holder.start()
+    entered.wait(5)
+    try:
+        with pytest.raises(GatewayRejected) as shed:
+            with gateway.slot():
+                pass
+        assert shed.value.reason == "shed"
+
+        gateway.max_queue = 1
+        with pytest.raises(GatewayRejected) as timed_out:
+            with gateway.slot(queue_timeout=0.05):
+                pass
+        assert timed_out.value.reason == "queue_timeout"
+    finally:
+        release.set()
+        holder.join()
+
+    gateway.record_fallback()
+    stats = gateway.stats()
+    assert (stats["shed"], stats["queue_timeouts"], stats["in_flight"]) == (1, 1, 0)
+    assert stats["fallback_ratio"] == round(1 / 3, 4)
+
+
+def test_rate_limit_spaces_out_calls_after_the_burst():
+    gateway = LLMGateway(max_concurrency=2, rate_per_minute=60, queue_timeout=0.2)
+    for _ in range(2):  # the burst
+        with gateway.slot():
+            pass
+    with pytest.raises(GatewayRejected) as error:
+        with gateway.slot():
+            pass
+    assert error.value.reason == "queue_timeout"
+
+
+def test_the_queue_deadline_runs_from_admission():
+    gateway = LLMGateway(max_concurrency=1, rate_per_minute=6000, queue_timeout=5)
+    admission = gateway.admission(queue_timeout=0.05)
+    assert gateway.stats()["queued"] == 1
+    time.sleep(0.1)  # e.g. waiting for a worker thread
+    with pytest.raises(GatewayRejected) as error:
+        with gateway.slot(admission=admission):
+            pass
+    assert error.value.reason == "queue_timeout"
+    assert gateway.stats()["queued"] == 0
+
+
+def test_a_burst_of_jobs_is_bounded_by_the_deadline_from_submission():
+    gateway = LLMGateway(max_concurrency=2, rate_per_minute=60000, max_queue=4, queue_timeout=0.3)
+    pipeline = ResultsPipeline(max_workers=2, pools={REPORT_POOL: 2 + 4})
+
+    def report(admission):
+        try:
+            with gateway.slot(admission=admission):
+                time.sleep(0.2)
+        except GatewayRejected as e:
+            return e.reason, time.monotonic()
+        return "report", time.monotonic()
+
+    submitted = time.monotonic()
+    jobs = []
+    for i in range(20):
+        admission = gateway.admission()
+        pool = REPORT_POOL if admission.waiting else None
+        jobs.append(pipeline.submit(f"s{i}", {"summary": (lambda a=admission: report(a), (), pool)}))
+    assert gateway.stats()["queued"] <= 6
+    outcomes = [job.futures["summary"].result(5) for job in jobs]
+
+    counts = collections.Counter(outcome for outcome, _ in outcomes)
+    assert counts["shed"] == 14
+    assert counts["report"] >= 2 and counts["report"] + counts["queue_timeout"] == 6
+    # Nobody waits longer than the queue deadline plus one call
+    assert max(finished for _, finished in outcomes) - submitted < 0.3 + 0.2 + 0.2
+    assert gateway.stats()["queued"] == 0
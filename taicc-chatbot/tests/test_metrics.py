@@ -0,0 +1,63 @@
+import re
+
+from metrics import LATENCY_BUCKETS, Registry
+
+NAME = r"[a-zA-Z_:][a-zA-Z0-9_:]*"
+LABEL_VALUE = r'"(?:[^"\\\n]|\\[\\"n])*"'
+SAMPLE = re.compile(rf'({NAME})(?:\{{[a-zA-Z_]\w*={LABEL_VALUE}(?:,[a-zA-Z_]\w*={LABEL_VALUE})*\}})? (\S+)')
+COMMENT = re.compile(rf"# (HELP|TYPE) ({NAME}) (.*)")
+
+
+def _parse(text):
+    """Check every line of a scrape; returns `({name: type}, [(name, line, value)])`."""
+    assert text.endswith("\n")
+    types, samples = {}, []
+    for line in text.splitlines():
+        comment = COMMENT.fullmatch(line)
+        if comment:
+            if comment.group(1) == "TYPE":
+                assert comment.group(3) in ("counter", "gauge", "histogram")
+                types[comment.group(2)] = comment.group(3)
+            continue
+        sample = SAMPLE.fullmatch(line)
+        assert sample, f"malformed line: {line!r}"
+        float(sample.group(2))
+        samples.append((sample.group(1), line, float(sample.group(2))))
+    return types, samples
+
+
+def test_histograms_render_cumulative_buckets_sum_and_count():
+    registry = Registry()
+    for seconds in (0.004, 0.2, 0.2, 100.0):
+        registry.observe("gemini.generate", seconds)
+    registry.error("gemini.generate")
+
+    types, samples = _parse(registry.render())
+    assert types == {"taicc_phase_seconds": "histogram", "taicc_phase_quantile_seconds": "gauge",
+                     "taicc_phase_errors_total": "counter"}
+    buckets = [(line, value) for name, line, value in samples if name == "taicc_phase_seconds_bucket"]
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    assert buckets[0] == ('taicc_phase_seconds_bucket{phase="gemini.generate",le="0.005"} 1', 1)
+    assert buckets[-1] == ('taicc_phase_seconds_bucket{phase="gemini.generate",le="+Inf"} 4', 4)
+    assert [value for _, value in buckets] == sorted(value for _, value in buckets)
+    values = {line.split(" ")[0]: value for _, line, value in samples}
+    assert values['taicc_phase_seconds_bucket{phase="gemini.generate",le="0.25"}'] == 3
+    assert values['taicc_phase_seconds_sum{phase="gemini.generate"}'] == 100.404
+    assert values['taicc_phase_seconds_count{phase="gemini.generate"}'] == 4
+    assert values['taicc_phase_errors_total{phase="gemini.generate"}'] == 1
+
+
+def test_gauges_escape_labels_and_help_text():
+    registry = Registry()
+    registry.gauge("taicc_queue", 'Queue depth\nper "pool"', lambda: {"": 3, 'a"b\\c\nd': 1.5})
+    registry.gauge("taicc_broken", "Raises on read.", lambda: 1 / 0)
+
+    text = registry.render()
+    types, samples = _parse(text)
+    assert types == {"taicc_queue": "gauge"} | {k: v for k, v in types.items() if k.startswith("taicc_phase")}
+    assert '# HELP taicc_queue Queue depth\\nper "pool"' in text.splitlines()
+    assert [line for name, line, _ in samples if name == "taicc_queue"] == [
+        "taicc_queue 3",
+        'taicc_queue{name="a\\"b\\\\c\\nd"} 1.5',
+    ]
+    assert "taicc_broken" not in text
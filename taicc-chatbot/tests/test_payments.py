@@ -0,0 +1,35 @@
+import time
+
+import fakes
+from payments import STATUS_CAPTURED, STATUS_EXPIRED, STATUS_PENDING, PaymentPoller
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_poller_backs_off_until_the_payment_is_captured():
+    client = fakes.FakeRazorpayClient(latency=0, capture_after=3)
+    poller = PaymentPoller(lambda: client, initial_delay=0.02, max_delay=0.05)
+    assert poller.status("order_1") is None
+
+    poller.watch("order_1")
+    poller.watch("order_1")  # already watched
+    assert poller.status("order_1") == STATUS_PENDING
+    assert _wait_for(lambda: poller.is_captured("order_1"))
+    assert poller.status("order_1") == STATUS_CAPTURED
+    time.sleep(0.1)
+    assert client.calls == 3  # no polling once captured
+
+
+def test_unpaid_order_expires_and_poll_errors_are_retried():
+    client = fakes.FakeRazorpayClient(latency=0, failure_rate=1.0)
+    poller = PaymentPoller(lambda: client, initial_delay=0.01, max_delay=0.01, order_ttl=0.1)
+    poller.watch("order_2")
+    assert _wait_for(lambda: poller.status("order_2") == STATUS_EXPIRED)
+    assert client.calls > 1
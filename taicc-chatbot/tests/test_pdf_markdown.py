@@ -0,0 +1,57 @@
+import pdf_markdown
+from pdf_markdown import DEVANAGARI_FONT_FILES, find_system_font, inline_runs, iter_blocks, plain_text
+
+REPORT = """## Executive Summary
+Ann, this report assesses
+**Acme**.
+
+| Area | Strength |
+|------|----------|
+| Data | Digitized |
+Closing line.
+- Appoint an owner.
+  * Nested item
+1. Pilot a use case
+---
+"""
+
+
+def test_iter_blocks_tokenizes_the_report_in_order():
+    assert list(iter_blocks(REPORT.splitlines())) == [
+        ("heading", 2, "Executive Summary"),
+        ("paragraph", "Ann, this report assesses **Acme**."),
+        ("table", [["Area", "Strength"], ["Data", "Digitized"]]),
+        ("paragraph", "Closing line."),
+        ("bullet", 0, "Appoint an owner."),
+        ("bullet", 1, "Nested item"),
+        ("numbered", 0, "1", "Pilot a use case"),
+        ("rule",),
+    ]
+
+
+def test_inline_runs_split_styles_and_keep_spacing():
+    assert inline_runs("Scored **3.2** of *five*, see `notes` and [the plan](https://x.y) for snake_case") == [
+        ("", "Scored "), ("B", "3.2"), ("", " of "), ("I", "five"), ("", ", see "), ("", "notes"),
+        ("", " and "), ("", "the plan"), ("", " for snake_case"),
+    ]
+    assert plain_text("**₹199** _now_") == "₹199 now"
+
+
+def test_the_preferred_system_devanagari_font_is_found(tmp_path):
+    for path in (tmp_path / "a/noto/NotoSansDevanagariUI-Regular.ttf", tmp_path / "b/NotoSansDevanagari-Regular.ttf"):
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"")
+    directories = [str(tmp_path / "missing"), str(tmp_path / "a"), str(tmp_path / "b")]
+    assert find_system_font(DEVANAGARI_FONT_FILES, directories) == str(tmp_path / "b/NotoSansDevanagari-Regular.ttf")
+    assert find_system_font(DEVANAGARI_FONT_FILES, [str(tmp_path / "missing")]) is None
+
+
+def test_a_missing_devanagari_font_is_reported(monkeypatch, capsys):
+    monkeypatch.delenv("PDF_FALLBACK_FONTS", raising=False)
+    monkeypatch.setattr(pdf_markdown, "find_system_font", lambda names: None)
+    pdf_markdown.fallback_font_paths.cache_clear()
+    try:
+        assert pdf_markdown.fallback_font_paths() == ()
+    finally:
+        pdf_markdown.fallback_font_paths.cache_clear()
+    assert "PDF reports will drop Devanagari text" in capsys.readouterr().out
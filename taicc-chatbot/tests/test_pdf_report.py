@@ -0,0 +1,35 @@
+import pytest
+
+from pdf_report import split_report
+
+
+def test_summary_keeps_its_subheadings():
+    report = ("## Executive Summary\nAcme is Advanced.\n\n### Key points\n- Data is digitized.\n\n"
+              "## 2. Current Maturity Level\nDetails.")
+    summary, detailed = split_report(report)
+    assert summary == "Acme is Advanced.\n\n### Key points\n- Data is digitized."
+    assert detailed == "## 2. Current Maturity Level\nDetails."
+
+
+@pytest.mark.parametrize("next_section", [
+    "# Appendix",
+    "## Current Maturity Level",
+    "### 2. Current Maturity Level",
+    "**2. Current Maturity Level**",
+    "2. Current Maturity Level",
+])
+def test_summary_ends_at_a_same_level_heading_or_numbered_section(next_section):
+    summary, detailed = split_report(f"## Executive Summary\nAcme is Advanced.\n{next_section}\nDetails.")
+    assert (summary, detailed) == ("Acme is Advanced.", f"{next_section}\nDetails.")
+
+
+def test_a_bold_summary_heading_ends_at_any_heading():
+    summary, detailed = split_report("**1. Executive Summary**\nAcme is Advanced.\n### Strengths\nData.")
+    assert (summary, detailed) == ("Acme is Advanced.", "### Strengths\nData.")
+
+
+def test_without_the_heading_the_summary_is_the_opening_paragraphs():
+    report = "Intro. " * 100 + "\n\nRest of the report."
+    summary, detailed = split_report(report)
+    assert summary == report.split("\n\n")[0].strip()
+    assert detailed == "Rest of the report."
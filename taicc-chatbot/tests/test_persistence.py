@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+import fakes
+import persistence
+from persistence import SubmissionJournal
+
+
+class CommitThenTimeoutSheet(fakes.FakeWorksheet):
+    """Commits the first append, then reports it as failed, like a timeout."""
+
+    def __init__(self):
+        super().__init__(latency=0)
+        self.timeouts = 1
+
+    def append_rows(self, rows, **kwargs):
+        super().append_rows(rows)
+        if self.timeouts:
+            self.timeouts -= 1
+            raise TimeoutError("read timed out")
+
+
+def _journal(path, sheet, **kwargs):
+    journal = SubmissionJournal(str(path), sheet_call=lambda fn: fn(sheet), **kwargs)
+    journal._ensure_flusher = lambda: None  # flush by hand
+    return journal
+
+
+def _row(submission_id):
+    return ["2025-05-01 10:00:00", "Ann", "Acme", "a@x.com", "1", "Pharma", "Tier 1", 3.0, "Established",
+            submission_id]
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    journal = _journal(tmp_path / "j.sqlite3", fakes.FakeWorksheet(latency=0))
+    assert journal.enqueue("s1", _row("s1"))
+    assert not journal.enqueue("s1", _row("s1"))
+    assert journal.pending_count() == 1
+
+
+def test_retry_after_a_committed_timeout_does_not_duplicate_rows(tmp_path):
+    sheet = CommitThenTimeoutSheet()
+    journal = _journal(tmp_path / "j.sqlite3", sheet)
+    journal.enqueue("s1", _row("s1"))
+    journal.enqueue("s2", _row("s2"))
+
+    with pytest.raises(TimeoutError):
+        journal.flush_once()
+    assert len(sheet.rows) == 2 and journal.pending_count() == 2
+
+    journal.enqueue("s3", _row("s3"))
+    assert journal.flush_once() == 1
+    assert [row[-1] for row in sheet.rows] == ["s1", "s2", "s3"]
+    assert journal.pending_count() == 0
+
+
+def test_a_claimed_batch_is_leased_to_one_flusher(tmp_path, monkeypatch):
+    sheet = fakes.FakeWorksheet(latency=0)
+    first = _journal(tmp_path / "j.sqlite3", sheet, batch_size=2)
+    second = _journal(tmp_path / "j.sqlite3", sheet, batch_size=2)
+    for i in range(3):
+        first.enqueue(f"s{i}", _row(f"s{i}"))
+
+    assert [sid for sid, _, _ in first._claim_batch()] == ["s0", "s1"]
+    assert [sid for sid, _, _ in second._claim_batch()] == ["s2"]
+    third = _journal(tmp_path / "j.sqlite3", sheet, batch_size=2)
+    assert third._claim_batch() == []
+
+    # Once the lease runs out, another flusher may take the batch over
+    now = time.time()
+    monkeypatch.setattr(persistence.time, "time", lambda: now + persistence.CLAIM_LEASE + 1)
+    assert [sid for sid, _, _ in third._claim_batch()] == ["s0", "s1"]
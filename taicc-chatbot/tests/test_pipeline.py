@@ -0,0 +1,82 @@
+import threading
+import time
+
+from pipeline import TASK_DONE, TASK_FAILED, TASK_PENDING, ResultsPipeline
+
+
+def _wait(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.done():
+        assert time.monotonic() < deadline, job.statuses()
+        time.sleep(0.01)
+
+
+def test_a_task_waits_for_all_of_its_dependencies():
+    pipeline = ResultsPipeline(max_workers=2)
+    release = threading.Event()
+
+    def summary():
+        release.wait(5)
+        return "report"
+
+    job = pipeline.submit("s1", {
+        "summary": (summary, ()),
+        "charts": (lambda: "charts", ()),
+        "pdf": (lambda report, charts: f"{report}+{charts}", ("summary", "charts")),
+    })
+    job.futures["charts"].result(5)
+    time.sleep(0.05)
+    assert job.status("pdf") == TASK_PENDING
+    assert job.result("pdf") is None
+
+    release.set()
+    _wait(job)
+    assert job.result("pdf") == "report+charts"
+    assert set(job.statuses().values()) == {TASK_DONE}
+
+
+def test_an_upstream_failure_fails_its_dependents():
+    pipeline = ResultsPipeline(max_workers=2)
+    ran = []
+
+    def summary():
+        raise RuntimeError("gemini down")
+
+    job = pipeline.submit("s1", {
+        "summary": (summary, ()),
+        "charts": (lambda: "charts", ()),
+        "pdf": (lambda report, charts: ran.append("pdf"), ("summary", "charts")),
+        "email": (lambda pdf: ran.append("email"), ("pdf",)),
+    })
+    _wait(job)
+    assert job.statuses() == {"summary": TASK_FAILED, "charts": TASK_DONE, "pdf": TASK_FAILED, "email": TASK_FAILED}
+    assert str(job.error("pdf")) == str(job.error("email")) == "gemini down"
+    assert ran == []
+
+
+def test_resubmitting_returns_the_job_until_it_expires():
+    pipeline = ResultsPipeline(max_workers=1, ttl=0.05)
+    calls = []
+    tasks = {"persist": (lambda: calls.append(1), ())}
+    job = pipeline.submit("s1", tasks)
+    _wait(job)
+    assert pipeline.submit("s1", tasks) is job
+    assert calls == [1]
+
+    time.sleep(0.1)
+    pipeline.submit("s2", tasks)  # eviction runs on submit
+    assert pipeline.get("s1") is None
+    _wait(pipeline.submit("s1", tasks))
+    assert calls == [1, 1, 1]
+
+
+def test_unfinished_jobs_are_never_expired():
+    pipeline = ResultsPipeline(max_workers=1, ttl=0)
+    release = threading.Event()
+    job = pipeline.submit("s1", {"summary": (lambda: release.wait(5), ())})
+    time.sleep(0.05)
+    pipeline.submit("s2", {})
+    assert pipeline.get("s1") is job
+    release.set()
+    _wait(job)
+
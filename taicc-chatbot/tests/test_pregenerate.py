@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+import fakes
+import pregenerate
+import reports
+import resources
+from question_bank import get_question_bank
+from report_cache import ReportLibrary
+from reports import ReportStream, build_prompt, cache_key, generate_report_body, score_bucket
+from scoring import determine_maturity
+
+pytestmark = pytest.mark.usefixtures("fresh_reports")
+
+ARGS = ("Pharma", "Tier 2", 3.4, "Advanced")
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    path = str(tmp_path / "library.sqlite3")
+    monkeypatch.setenv("REPORT_LIBRARY", path)
+    reports.get_report_library.cache_clear()
+    yield ReportLibrary(path)
+    reports.get_report_library.cache_clear()
+
+
+def test_score_slots_cover_every_bucket_and_maturity_once():
+    slots = pregenerate.score_slots()
+    for (bucket, maturity), score in slots.items():
+        assert (score_bucket(score), determine_maturity(score)) == (bucket, maturity)
+    # A bucket straddling a maturity boundary gets one slot per label
+    assert {m for b, m in slots if b == 2.0} == {"Emerging", "Established"}
+    assert sorted({b for b, _ in slots}) == [1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0]
+    assert len(slots) == 13
+
+
+def test_combinations_give_each_slot_a_distinct_prompt_hash():
+    bank = get_question_bank()
+    jobs = list(pregenerate.combinations(["Pharma"]))
+    assert len(jobs) == len(bank.tiers) * len(pregenerate.score_slots())
+    assert {job[0] for job in jobs} == {"Pharma"}
+    assert len({job[5] for job in jobs}) == len(jobs)
+    assert all(job[5] == cache_key(job[4]) for job in jobs)
+
+
+def test_library_stores_bodies_by_slot_with_their_prompt_hash(library):
+    library.put("Pharma", "Tier 2", 3.5, "Advanced", "key-1", "model", "Body ₹")
+    library.put("Pharma", "Tier 2", 3.5, "Advanced", "key-2", "model", "Newer body")
+    reader = ReportLibrary(library.path, readonly=True)
+    assert reader.lookup("Pharma", "Tier 2", 3.5, "Advanced") == ("Newer body", "key-2")
+    assert reader.lookup("Pharma", "Tier 2", 4.0, "Advanced") is None
+    assert (reader.keys(), len(reader)) == ({"key-2"}, 1)
+
+
+def test_a_current_library_body_is_served_without_a_call(library):
+    resources.gemini_model.set(fakes.FakeGeminiModel(delay=0, failure_rate=1.0))
+    key = cache_key(build_prompt(*ARGS))
+    library.put("Pharma", "Tier 2", score_bucket(3.4), "Advanced", key, resources.GEMINI_MODEL, "Library body")
+
+    stream = ReportStream(live=False)
+    assert generate_report_body(*ARGS, stream) == "Library body"
+    assert (stream.cached, stream.fallback) == (True, None)
+    assert not reports._refreshing
+
+
+def test_a_stale_library_body_is_served_and_refreshed_in_the_background(library):
+    library.put("Pharma", "Tier 2", score_bucket(3.4), "Advanced", "old-prompt", "old-model", "Old body")
+
+    assert generate_report_body(*ARGS) == "Old body"
+    key = cache_key(build_prompt(*ARGS))
+    deadline = time.monotonic() + 5
+    while reports.get_report_cache().backend.get(key) is None:
+        assert time.monotonic() < deadline, "the refresh never cached a body"
+        time.sleep(0.01)
+    assert reports.get_report_cache().get(key) == fakes.FAKE_REPORT.strip()
+    # The next user for the slot gets the current body from the cache
+    assert generate_report_body(*ARGS) == fakes.FAKE_REPORT.strip()
@@ -0,0 +1,61 @@
+import pytest
+
+import report_cache
+from report_cache import LRUCache, ReportCache, SQLiteCache, TieredCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(report_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_lru_entries_expire_after_the_ttl(clock):
+    cache = LRUCache(ttl=60)
+    cache.set("k", "body")
+    clock[0] += 59
+    assert cache.get("k") == "body"
+    clock[0] += 2
+    assert cache.get("k") is None
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "b" is now the least recently used
+    cache.set("c", "3")
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("1", None, "3")
+
+
+def test_sqlite_entries_persist_and_expire(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteCache(path, ttl=60).set("k", "body")
+    reopened = SQLiteCache(path, ttl=60)
+    assert reopened.get("k") == "body"
+    clock[0] += 61
+    assert reopened.get("k") is None
+
+
+def test_tiered_hit_in_sqlite_backfills_the_lru(tmp_path):
+    lru, sqlite = LRUCache(), SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    sqlite.set("k", "body")
+    cache = TieredCache(lru, sqlite)
+    assert lru.get("k") is None
+    assert cache.get("k") == "body"
+    assert lru.get("k") == "body"
+
+    cache.set("new", "fresh")
+    assert (lru.get("new"), sqlite.get("new")) == ("fresh", "fresh")
+    assert cache.get("missing") is None
+
+
+def test_report_cache_counts_hits_and_misses():
+    cache = ReportCache(LRUCache())
+    created = []
+    assert cache.get_or_create("k", lambda: created.append(1) or "body") == "body"
+    assert cache.get_or_create("k", lambda: created.append(1) or "other") == "body"
+    assert cache.get("missing") is None
+    assert created == [1]
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_ratio": 1 / 3}
@@ -0,0 +1,42 @@
+import pytest
+
+import fakes
+import llm_gateway
+import reports
+import resources
+from reports import ReportStream, fallback_report_body, generate_report_body
+
+pytestmark = pytest.mark.usefixtures("fresh_reports")
+
+ARGS = ("Pharma", "Tier 2", 3.4, "Advanced")
+
+
+def test_failed_generation_serves_an_uncached_template_with_its_reason():
+    resources.gemini_model.set(fakes.FakeGeminiModel(delay=0, failure_rate=1.0))
+    stream = ReportStream(live=False)
+    assert generate_report_body(*ARGS, stream) == fallback_report_body("Pharma", "Tier 2", "Advanced")
+    assert stream.fallback == "FakeServiceError"
+
+    resources.gemini_model.set(fakes.FakeGeminiModel(delay=0))
+    stream = ReportStream(live=False)
+    assert generate_report_body(*ARGS, stream) == fakes.FAKE_REPORT.strip()
+    assert (stream.fallback, stream.cached) == (None, False)
+
+    stream = ReportStream(live=False)
+    generate_report_body(*ARGS, stream)
+    assert stream.cached
+
+
+@pytest.mark.parametrize("live", [True, False])
+def test_gateway_rejection_is_reported_as_the_fallback_reason(live):
+    gateway = llm_gateway.LLMGateway(max_concurrency=1, max_queue=0)
+    llm_gateway.gateway.set(gateway)
+    try:
+        with gateway.slot():  # the only slot is busy
+            stream = ReportStream(live=live)
+            body = generate_report_body(*ARGS, stream)
+    finally:
+        llm_gateway.gateway.invalidate()
+    assert stream.fallback == "shed"
+    assert stream.text() == body == fallback_report_body("Pharma", "Tier 2", "Advanced")
+    assert reports.get_report_cache().get(reports.cache_key(reports.build_prompt(*ARGS))) is None
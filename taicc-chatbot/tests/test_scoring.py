@@ -0,0 +1,45 @@
+import collections
+
+import pytest
+
+from question_bank import QuestionBank, get_question_bank
+from scoring import DIMENSIONS, DimensionMap, get_dimension_map, load_question_dimensions, score_answers
+
+
+def _bank(*questions):
+    return QuestionBank(["Pharma"], ["Tier 1"], [[list(questions)]])
+
+
+def test_every_bank_question_has_a_reviewed_dimension():
+    dimension_map = get_dimension_map()
+    bank = get_question_bank()
+    counts = collections.Counter(dimension_map.dimension(qid) for qid in range(len(bank)))
+    assert set(counts) == set(DIMENSIONS)
+    # No dimension absorbs the questions the others do not claim
+    assert max(counts.values()) < 0.4 * len(bank)
+
+
+def test_an_unmapped_question_is_rejected():
+    mapping = {"dimensions": {"Do you have an AI roadmap?": "AI Strategy"}, "weights": {}}
+    with pytest.raises(ValueError) as error:
+        DimensionMap(_bank("Do you have an AI roadmap?", "Do you use AI chatbots?"), mapping)
+    assert "no dimension for 'Do you use AI chatbots?'" in str(error.value)
+
+
+def test_an_unknown_dimension_is_rejected():
+    mapping = {"dimensions": {"Do you use AI chatbots?": "Chatbots"}}
+    with pytest.raises(ValueError, match="unknown dimension 'Chatbots'"):
+        DimensionMap(_bank("Do you use AI chatbots?"), mapping)
+
+
+def test_scores_follow_the_mapping_and_weights():
+    mapping = {
+        "dimensions": {"q1": "AI Strategy", "q2": "AI Strategy", "q3": "Customer Experience"},
+        "weights": {"q2": 3},
+    }
+    scores = score_answers({0: 1, 1: 5, 2: 2}, DimensionMap(_bank("q1", "q2", "q3"), mapping))
+    assert scores == {"AI Strategy": 4.0, "Customer Experience": 2.0, "Overall Score": 3.6}
+
+
+def test_mapping_file_labels_only_known_dimensions():
+    assert set(load_question_dimensions()["dimensions"].values()) == set(DIMENSIONS)
@@ -0,0 +1,35 @@
+import pytest
+
+import fakes
+from session_store import RedisSessionStore, SQLiteSessionStore
+
+
+def _replicas(kind, tmp_path):
+    if kind == "sqlite":
+        path = str(tmp_path / "sessions.sqlite3")
+        return SQLiteSessionStore(path), SQLiteSessionStore(path)
+    client = fakes.FakeRedis()
+    return RedisSessionStore(client), RedisSessionStore(client)
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "redis"])
+def test_a_submission_is_claimed_by_one_replica_only(kind, tmp_path):
+    first, second = _replicas(kind, tmp_path)
+    assert first.claim("s1")
+    assert not second.claim("s1")
+    assert not first.claim("s1")
+    assert second.claim("s2")
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "redis"])
+def test_a_checkpoint_resumes_on_another_replica(kind, tmp_path):
+    first, second = _replicas(kind, tmp_path)
+    first.save("token", {"page": "questions", "paid": True})
+    assert second.load("token") == {"page": "questions", "paid": True}
+    assert second.load("other") is None
+
+
+def test_claims_expire_with_the_session_ttl(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl=-1)
+    assert store.claim("s1")
+    assert store.claim("s1")
@@ -0,0 +1,7 @@
+import startup
+
+
+def test_login_page_imports_stay_light_and_within_budget():
+    seconds, loaded = startup.measure_login_imports(runs=1)
+    assert loaded == []
+    assert seconds <= startup.LOGIN_IMPORT_BUDGET